@@ -0,0 +1,98 @@
+"""
+Description: measures parse-and-lookup latency for random tip addresses, comparing parsing a new location and walking
+the nested storage for every read with the precompiled address table and per guild address -> tips map, and reports
+how the location cache does on a mix of suffixed, mistyped and table addresses.
+
+Run from the repository root: python -m benchmarks.address_lookup_benchmark [lookup count]
+"""
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+LOOKUP_COUNT = 100_000
+
+
+def prepare_data_dir():
+    # the holocrons read and write relative to data/, so work on a scratch copy of the config
+    repo_root = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="holocron_bench_")
+    for holocron_name in ["conquest", "rise"]:
+        os.makedirs(f"{work_dir}/data/{holocron_name}", exist_ok=True)
+        for name in ["base.json", "labels.json"]:
+            shutil.copy(f"{repo_root}/data/{holocron_name}/{name}", f"{work_dir}/data/{holocron_name}/{name}")
+    os.chdir(work_dir)
+    return repo_root, work_dir
+
+
+def parse_and_walk(holocron, address):
+    # the previous read path: a new location parsed from the address, then the nested storage walked
+    location = holocron.location_cls(address, None, holocron.labels)
+    location.parse_location()
+    address_tips, holocron.shard.address_tips = holocron.shard.address_tips, {}
+    try:
+        return holocron.get_tips(location)
+    finally:
+        holocron.shard.address_tips = address_tips
+
+
+def table_lookup(holocron, address):
+    return holocron.get_tips(holocron.get_location(address))
+
+
+def time_lookups(lookup, holocron, addresses):
+    started = time.perf_counter()
+    for address in addresses:
+        lookup(holocron, address)
+    return time.perf_counter() - started
+
+
+async def main():
+    from extensions.holocrons.conquest_holocron import ConquestHolocron
+    from extensions.holocrons.rise_holocron import RiseHolocron
+    from entities.locations import InvalidLocationError
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else LOOKUP_COUNT
+    bot = commands.Bot(command_prefix=".", intents=discord.Intents.default())
+    rng = random.Random(count)
+    for holocron in [ConquestHolocron(bot), RiseHolocron(bot)]:
+        # tip addresses that parse, the same ones users read
+        addresses = [address for address, entry in holocron.address_table.entries.items()
+                     if not entry.location.is_group_location or entry.location.has_group_tips()]
+        sample = [rng.choice(addresses) for _ in range(count)]
+        assert all(parse_and_walk(holocron, address) is table_lookup(holocron, address) for address in addresses)
+
+        before = time_lookups(parse_and_walk, holocron, sample)
+        after = time_lookups(table_lookup, holocron, sample)
+        print(f"{holocron.name}: {count} lookups over {len(addresses)} addresses")
+        print(f"  parse + walk:  {before * 1000:8.1f} ms ({before / count * 1e6:.2f} us per lookup)")
+        print(f"  address table: {after * 1000:8.1f} ms ({after / count * 1e6:.2f} us per lookup), "
+              f"{before / after:.1f}x faster")
+
+        # suffixes and typos miss the address table, so they are served by the location cache
+        typos = [f"{address}x" for address in rng.sample(addresses, min(50, len(addresses)))]
+        for _ in range(count):
+            address = rng.choice(typos) if rng.random() < 0.1 else rng.choice(addresses)
+            try:
+                holocron.get_location(address, "x" if rng.random() < 0.2 else None)
+            except InvalidLocationError:
+                pass
+        print(f"  location cache: {holocron.location_cache.cache_info()}, "
+              f"hit rate {holocron.location_cache.hit_rate:.1%}")
+        await holocron.close_storage()
+
+
+if __name__ == "__main__":
+    root, scratch = prepare_data_dir()
+    try:
+        sys.path.insert(0, root)
+        asyncio.run(main())
+    finally:
+        os.chdir(root)
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,76 @@
+"""
+Description: measures `.ctr vs` ranking over a synthetic counter holocron of thousands of squads and tens of thousands
+of counter tips: time to build the character index and time to rank an opponent team against every squad.
+
+Run from the repository root: python -m benchmarks.counter_ranking_benchmark [squad count]
+"""
+import json
+import random
+import statistics
+import sys
+import time
+
+from entities.characters import CharacterDictionary, characters_filepath
+from entities.counters import Squad, CounterTip
+from util.storage.character_index import CharacterIndex
+
+SQUAD_COUNT = 5_000
+TIPS_PER_SQUAD = 10
+UNIT_COUNT = 300
+QUERY_COUNT = 200
+
+
+def build_squads(count, names, rng):
+    # popular characters show up in many squads, as in the game's meta
+    weights = [1 / (rank + 5) for rank in range(len(names))]
+    squads = []
+    for index in range(count):
+        lineup = list(dict.fromkeys(rng.choices(names, weights=weights, k=5)))
+        squad = Squad(lead_id=f"lead{index}", lead=lineup[0], squad="/".join(lineup),
+                      variants=["/".join(lineup[:3] + rng.choices(names, k=2))] if index % 3 == 0 else None)
+        for tip_index in range(TIPS_PER_SQUAD):
+            squad.tips.append(CounterTip(squad="/".join(rng.choices(names, weights=weights, k=5)),
+                                         content=f"tip {tip_index} for {squad.lead_id}"))
+            squad.tips[-1].creation_micros += tip_index
+        squads.append(squad)
+    return squads
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SQUAD_COUNT
+    rng = random.Random(7)
+    # the game's characters, padded out with made up ones to a full roster
+    with open(characters_filepath) as characters_file:
+        entries = json.load(characters_file)
+    entries.update({f"UNIT{index}": {"name": f"Unit{index}"} for index in range(UNIT_COUNT - len(entries))})
+    characters = CharacterDictionary(entries)
+    names = list(characters.names.values())
+    squads = build_squads(count, names, rng)
+
+    start = time.perf_counter()
+    index = CharacterIndex.from_squads(characters, squads)
+    print(f"{count} squads, {count * TIPS_PER_SQUAD} counter tips, {len(index.unit_bits)} characters")
+    print(f"build: {time.perf_counter() - start:.2f} s")
+    # weights are worked out on the first ranking after squads change
+    start = time.perf_counter()
+    index.prepare_weights()
+    print(f"weights: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    # opponent teams are stored squads with a character swapped, as pasted from a game
+    teams = []
+    for query in range(QUERY_COUNT):
+        lineup = rng.choice(squads).squad.split("/")
+        lineup[-1] = rng.choice(names)
+        teams.append(characters.parse_query("/".join(lineup)))
+
+    timings = []
+    for units in teams:
+        start = time.perf_counter()
+        index.rank_squads(units)
+        timings.append(time.perf_counter() - start)
+    print(f"rank:  {statistics.median(timings) * 1000:.2f} ms median, "
+          f"{sorted(timings)[int(len(timings) * 0.95)] * 1000:.2f} ms p95, {max(timings) * 1000:.2f} ms max")
+
+
+if __name__ == "__main__":
+    main()
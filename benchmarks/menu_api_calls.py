@@ -0,0 +1,201 @@
+"""
+Description: counts the Discord api calls each menu costs before it is usable, and for each page change, in both the
+reaction and button Menu Styles, and asserts the button menus take a single call.
+
+Run from the repository root: python -m benchmarks.menu_api_calls
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from itertools import count
+
+import discord
+from discord.ext import commands
+
+message_ids = count(1)
+
+
+class ApiCalls:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, name):
+        self.calls.append(name)
+
+    def take(self):
+        calls, self.calls = self.calls, []
+        return calls
+
+
+class FakeGuild:
+    id = 0
+    roles = []
+
+
+class FakeMember:
+    class guild_permissions:
+        administrator = True
+
+    def __init__(self, user_id=1, name="member"):
+        self.id = user_id
+        self.display_name = name
+        self.roles = []
+
+
+class FakeMessage:
+    def __init__(self, api, channel, content, view):
+        self.api = api
+        self.id = next(message_ids)
+        self.channel = channel
+        self.guild = FakeGuild()
+        self.content = content
+        self.view = view
+
+    async def add_reaction(self, emoji):
+        self.api.record("add_reaction")
+
+    async def clear_reactions(self):
+        self.api.record("clear_reactions")
+
+    async def edit(self, content=None, view=None):
+        self.api.record("edit")
+        self.content = content
+
+
+class FakeChannel:
+    def __init__(self, api):
+        self.api = api
+        self.id = 1
+        self.sent = []
+
+    async def send(self, content=None, view=None, **kwargs):
+        self.api.record("send")
+        self.sent.append(FakeMessage(self.api, self, content, view))
+        return self.sent[-1]
+
+
+class FakeResponse:
+    def __init__(self, api):
+        self.api = api
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def defer(self):
+        self.api.record("defer")
+        self.done = True
+
+    async def edit_message(self, content=None, view=None):
+        self.api.record("edit_message")
+        self.done = True
+
+
+class FakeInteraction:
+    type = discord.InteractionType.component
+
+    def __init__(self, api, message, user, custom_id):
+        self.message = message
+        self.user = user
+        self.data = {"custom_id": custom_id}
+        self.response = FakeResponse(api)
+
+
+async def choose(api, message, emoji, user, style):
+    # a user picking emoji from a menu, routed through the menu registry either way
+    from entities.menus import MenuChoice, menu_registry, press_button
+
+    if style == "buttons":
+        button = next(item for item in message.view.children if str(item.emoji) == emoji)
+        await press_button(FakeInteraction(api, message, user, button.custom_id))
+    else:
+        entry = menu_registry.match(message.id, user.id, emoji)
+        await menu_registry.dispatch(entry, MenuChoice(message, emoji), user)
+
+
+async def measure(style):
+    from entities.command_parser import HolocronCommand
+    from entities.counters import Squad
+    from entities.paginator import Paginator, send_pages
+    from entities.tip import Tip
+    from extensions.holocrons.conquest_holocron import ConquestHolocron
+    from extensions.holocrons.counter_holocron import CounterHolocron
+    from util.settings.menu_style_handler import set_menu_style
+    from util.settings.response_handler import set_response_method
+    from util.storage.journal import TipJournal
+
+    set_menu_style("0", style)
+    set_response_method("0", "channel")
+    api = ApiCalls()
+    channel = FakeChannel(api)
+    user = FakeMember()
+    bot = commands.Bot(command_prefix=".", intents=discord.Intents.default())
+    conquest = ConquestHolocron(bot)
+    counter = CounterHolocron(bot)
+    location = conquest.get_location("s1f1")
+    for index in range(8):
+        conquest.commit_change(TipJournal.ADD, location, Tip(content=f"tip {index}", author="member", user_id=user.id))
+    for index in range(200):
+        squad = Squad(lead_id=f"lead{index}", lead=f"Squad Leader {index}", squad="A/B/C", author="member")
+        counter.commit_change(TipJournal.SQUAD, counter.get_location(squad.lead_id), squad)
+
+    results = {}
+
+    async def menu(name, send):
+        api.take()
+        await send()
+        results[name] = len(api.take())
+        return channel.sent[-1]
+
+    await menu("modifier menu",
+               lambda: conquest.send_with_modifiers(channel, user, conquest.format_tips(location), location))
+    await menu("group list",
+               lambda: conquest.holocron_group_list(HolocronCommand("s1b"), conquest.get_location("s1b"), channel,
+                                                    user))
+    edit_menu = await menu("edit selection",
+                           lambda: conquest.edit_tip(HolocronCommand("edit", "s1f1"), FakeGuild(), user, location,
+                                                     channel))
+    await choose(api, edit_menu, "➡️", user, style)
+    results["edit selection page"] = len(api.take())
+
+    list_menu = await menu("squad list", lambda: send_pages(channel, Paginator(user.id, counter.get_list())))
+    await choose(api, list_menu, "➡️", user, style)
+    results["squad list page"] = len(api.take())
+
+    await conquest.close_storage()
+    await counter.close_storage()
+    return results
+
+
+async def main():
+    reactions = await measure("reactions")
+    buttons = await measure("buttons")
+    print(f"{'menu':<22}{'reactions':>10}{'buttons':>10}")
+    for name in reactions:
+        print(f"{name:<22}{reactions[name]:>10}{buttons[name]:>10}")
+
+    # with buttons the menu comes with its message, and a page change answers the press with one edit
+    assert all(calls == 1 for calls in buttons.values()), buttons
+    assert all(reactions[name] > buttons[name] for name in reactions), reactions
+
+
+def prepare_data_dir():
+    repo_root = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="holocron_bench_")
+    for holocron_name in ["conquest", "counter"]:
+        shutil.copytree(f"{repo_root}/data/{holocron_name}", f"{work_dir}/data/{holocron_name}",
+                        ignore=shutil.ignore_patterns("*storage*", "*journal*", "guilds", "archive"))
+    os.chdir(work_dir)
+    return repo_root, work_dir
+
+
+if __name__ == "__main__":
+    root, scratch = prepare_data_dir()
+    try:
+        sys.path.insert(0, root)
+        asyncio.run(main())
+    finally:
+        os.chdir(root)
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,81 @@
+"""
+Description: measures the menu registry under a steady stream of menus: time per register past the size limit, memory
+held per waiting menu, and the time to save and restore a full registry.
+
+Run from the repository root: python -m benchmarks.menu_registry_benchmark [menu count]
+"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from discord.ext import commands
+
+from entities.command_parser import CommandTypes
+from entities.interactions import AwaitingReaction
+from entities.menus import MenuRegistry
+
+MENU_COUNT = 200_000
+MAX_MENUS = 10_000
+EMOJI = [f"{index}⃣" for index in range(1, 6)] + ["➡️", "🚫"]
+
+
+class MenuCog(commands.Cog):
+    async def handle_reaction(self, choice, user, state):
+        pass
+
+
+def fill(registry, count):
+    handler = MenuCog().handle_reaction
+    for message_id in range(count):
+        state = AwaitingReaction([10 ** 15 + index for index in range(5)], CommandTypes.EDIT, "s1f1")
+        registry.register(message_id, message_id % 500, EMOJI, handler, state)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else MENU_COUNT
+
+    registry = MenuRegistry(max_entries=MAX_MENUS)
+    start = time.perf_counter()
+    fill(registry, count)
+    elapsed = time.perf_counter() - start
+    print(f"{count} menus, at most {MAX_MENUS} kept: {elapsed / count * 1e6:.2f} us per register, "
+          f"{len(registry.entries)} waiting")
+
+    gc.collect()
+    tracemalloc.start()
+    held = MenuRegistry(max_entries=MAX_MENUS)
+    fill(held, MAX_MENUS)
+    gc.collect()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"memory: {allocated / MAX_MENUS:.0f} bytes per waiting menu")
+
+    expiring = MenuRegistry(max_entries=MAX_MENUS)
+    fill(expiring, MAX_MENUS)
+    for entry in expiring.entries.values():
+        entry.expiry = 0
+    start = time.perf_counter()
+    expiring.drop_expired()
+    print(f"expiry: {(time.perf_counter() - start) * 1000:.2f} ms to drop {MAX_MENUS} menus")
+
+    filepath = os.path.join(tempfile.mkdtemp(prefix="holocron_bench_"), "menus.json")
+    start = time.perf_counter()
+    held.save(filepath)
+    saved = time.perf_counter() - start
+    restored = MenuRegistry(max_entries=MAX_MENUS)
+    start = time.perf_counter()
+    restored.load(filepath)
+    loaded = time.perf_counter() - start
+    print(f"persistence: save {saved * 1000:.1f} ms, load {loaded * 1000:.1f} ms, "
+          f"{os.path.getsize(filepath) / 1024:.0f} KiB for {len(restored.entries)} menus")
+    os.remove(filepath)
+    os.rmdir(os.path.dirname(filepath))
+
+    assert len(registry.entries) == MAX_MENUS and not expiring.entries and len(restored.entries) == MAX_MENUS
+
+
+if __name__ == "__main__":
+    main()
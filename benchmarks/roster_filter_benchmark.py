@@ -0,0 +1,63 @@
+"""
+Description: measures roster filtering of counter tips: bulk import of a guild's rosters, their saved size, and the
+time to filter a squad's counter tips down to those a member owns every unit of.
+
+Run from the repository root: python -m benchmarks.roster_filter_benchmark [member count]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from entities.characters import CharacterDictionary, characters_filepath
+from entities.counters import CounterTip
+from util.storage.rosters import RosterStore
+
+MEMBER_COUNT = 50
+UNIT_COUNT = 300
+OWNED_UNITS = 220
+TIP_COUNT = 50_000
+LOCATION_SIZE = 50
+
+
+def main():
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else MEMBER_COUNT
+    rng = random.Random(7)
+    # the game's characters, padded out with made up ones to a full roster
+    with open(characters_filepath) as characters_file:
+        entries = json.load(characters_file)
+    entries.update({f"UNIT{index}": {"name": f"Unit{index}"} for index in range(UNIT_COUNT - len(entries))})
+    characters = CharacterDictionary(entries)
+    unit_ids = list(characters.names)
+    names = list(characters.names.values())
+
+    store = RosterStore()
+    imported = {member: rng.sample(unit_ids, OWNED_UNITS) for member in range(member_count)}
+    start = time.perf_counter()
+    store.bulk_import(imported)
+    print(f"import: {member_count} rosters of {OWNED_UNITS} units in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    filepath = os.path.join(tempfile.mkdtemp(), "rosters.json")
+    store.save(filepath)
+    print(f"saved:  {os.path.getsize(filepath)} bytes, {os.path.getsize(filepath) / member_count:.0f} per member")
+
+    tips = [CounterTip(squad="/".join(rng.sample(names, 5)), content="counter") for tip in range(TIP_COUNT)]
+    start = time.perf_counter()
+    kept = store.filter_owned(tips, store.get(0), characters)
+    print(f"first filter of {TIP_COUNT} tips: {(time.perf_counter() - start) * 1000:.1f} ms, {len(kept)} owned")
+
+    # later reads find the squads already worked out, as a squad's counters are read again and again
+    timings = []
+    for member in range(member_count):
+        start = time.perf_counter()
+        store.filter_owned(tips, store.get(member), characters)
+        timings.append(time.perf_counter() - start)
+    print(f"filter: {statistics.median(timings) * 1000:.1f} ms median for {TIP_COUNT} tips, "
+          f"{statistics.median(timings) / TIP_COUNT * LOCATION_SIZE * 1e6:.0f} us for a squad of {LOCATION_SIZE} tips")
+
+
+if __name__ == "__main__":
+    main()
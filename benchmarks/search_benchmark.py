@@ -0,0 +1,89 @@
+"""
+Description: measures the tip search index over a synthetic holocron: build time, memory held by the index, the cost
+of keeping it current as tips change, and query latency for rare, common and multi word queries.
+
+Run from the repository root: python -m benchmarks.search_benchmark [tip count]
+"""
+import gc
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from util.storage.search_index import SearchIndex
+
+TIP_COUNT = 1_000_000
+VOCABULARY_SIZE = 20_000
+WORDS_PER_TIP = 14
+QUERY_REPEATS = 20
+
+
+def build_vocabulary():
+    # game words first, so they are the common ones, then filler words of falling frequency
+    words = ["tank", "healer", "focus", "jawa", "mandalorians", "ewoks", "stun", "taunt", "droids", "jedi", "sith",
+             "rebels", "empire", "relic", "omicron", "wave", "boss", "feat", "dispel", "turn", "meter", "speed"]
+    words += [f"word{index}" for index in range(VOCABULARY_SIZE - len(words))]
+    return words
+
+
+def build_texts(count, rng):
+    words = build_vocabulary()
+    # zipf-like word frequencies, as in natural text once stop words are dropped: the most common words are in about
+    # one tip in ten
+    weights = [1 / (rank + 20) for rank in range(len(words))]
+    samples = rng.choices(words, weights=weights, k=count * WORDS_PER_TIP)
+    return [" ".join(samples[index * WORDS_PER_TIP:(index + 1) * WORDS_PER_TIP]) for index in range(count)]
+
+
+def time_queries(index, query):
+    timings = []
+    for repeat in range(QUERY_REPEATS):
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, max(timings) * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TIP_COUNT
+    rng = random.Random(7)
+    texts = build_texts(count, rng)
+    documents = [((f"s{index % 500}", index), None, text) for index, text in enumerate(texts)]
+
+    # memory is traced on a tenth of the tips, as tracing slows the build several times over
+    sample = documents[:max(count // 10, 1)]
+    gc.collect()
+    tracemalloc.start()
+    sample_index = SearchIndex.from_documents(sample)
+    gc.collect()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sample_index
+
+    start = time.perf_counter()
+    index = SearchIndex.from_documents(documents)
+    built = time.perf_counter() - start
+    print(f"{count} tips, {len(index.postings)} terms")
+    print(f"build:  {built:.1f} s, about {allocated / len(sample) * count / 1024 / 1024:.0f} MiB "
+          f"({allocated / len(sample):.0f} bytes per tip)")
+
+    changes = 10_000
+    start = time.perf_counter()
+    for change in range(changes):
+        key = documents[rng.randrange(count)][0]
+        index.add(key, None, texts[rng.randrange(count)])
+    print(f"update: {(time.perf_counter() - start) / changes * 1e6:.1f} us per edited tip")
+
+    for query in ["word15000", "word900", "jawa", "tank healer", "mandalorians stun boss", "the"]:
+        median, worst = time_queries(index, query)
+        matches = sum(len(index.postings.get(token, ((),))[0]) for token in query.split())
+        print(f"query `{query}`: {median:.2f} ms median, {worst:.2f} ms max, {matches} postings")
+
+    start = time.perf_counter()
+    index.compact()
+    print(f"compact: {(time.perf_counter() - start):.1f} s after {changes} edits")
+
+
+if __name__ == "__main__":
+    main()
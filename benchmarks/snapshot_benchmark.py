@@ -0,0 +1,67 @@
+"""
+Description: compares the binary snapshot format against the previous pickle storage for load time, save time and
+file size on synthetic conquest storage.
+
+Run from the repository root: python -m benchmarks.snapshot_benchmark [tip counts...]
+"""
+import io
+import pickle
+import random
+import sys
+import time
+
+from entities.tip import Tip
+from util.storage import snapshot as snapshot_format
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+AUTHORS = [f"member{index}" for index in range(50)]
+
+
+def build_storage(tip_count):
+    # same shape as conquest storage built from data/conquest/base.json
+    storage = {
+        "globals": {feat: [] for feat in range(1, 9)},
+        "sectors": {sector: {
+            "feats": {feat: [] for feat in range(1, 5)},
+            "boss": {"tips": [], "feats": {1: [], 2: []}},
+            "mini": {"tips": [], "feats": {1: [], 2: []}},
+            "nodes": {},
+        } for sector in range(1, 6)},
+    }
+    tip_lists = list(storage["globals"].values())
+    for sector in storage["sectors"].values():
+        tip_lists.extend(sector["feats"].values())
+        tip_lists.extend(sector["boss"]["feats"].values())
+        tip_lists.extend(sector["mini"]["feats"].values())
+
+    rng = random.Random(tip_count)
+    for index in range(tip_count):
+        tip = Tip(content=f"Tip {index}: bring {rng.choice(['Rex', 'Cal', 'Padme', 'JMK'])} and focus the healer",
+                  author=rng.choice(AUTHORS), rating=rng.randint(-3, 10), user_id=rng.getrandbits(60))
+        tip_lists[index % len(tip_lists)].append(tip)
+    return storage
+
+
+def time_call(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main(sizes):
+    print(f"{'tips':>10} {'format':>9} {'save ms':>10} {'load ms':>10} {'size KiB':>10}")
+    for tip_count in sizes:
+        storage = build_storage(tip_count)
+        formats = [
+            ("pickle", lambda: pickle.dumps(storage), lambda data: pickle.load(io.BytesIO(data))),
+            ("snapshot", lambda: snapshot_format.dumps(storage), lambda data: snapshot_format.load(io.BytesIO(data))),
+        ]
+        for label, save, load in formats:
+            data, save_time = time_call(save)
+            _, load_time = time_call(lambda: load(data))
+            print(f"{tip_count:>10} {label:>9} {save_time * 1000:>10.1f} {load_time * 1000:>10.1f} "
+                  f"{len(data) / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,104 @@
+"""
+Description: measures how long a burst of tip additions stalls the event loop, comparing the old synchronous
+full-snapshot save on every change with the journal plus background storage writer.
+
+Run from the repository root: python -m benchmarks.storage_writer_benchmark
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+BURST_SIZE = 1000
+EXISTING_TIPS = 5000
+HEARTBEAT_INTERVAL = 0.001
+
+
+def prepare_data_dir():
+    # the holocron reads and writes relative to data/, so work on a scratch copy of the config
+    repo_root = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="holocron_bench_")
+    for name in ["base.json", "labels.json"]:
+        os.makedirs(f"{work_dir}/data/conquest", exist_ok=True)
+        shutil.copy(f"{repo_root}/data/conquest/{name}", f"{work_dir}/data/conquest/{name}")
+    os.chdir(work_dir)
+    return repo_root, work_dir
+
+
+async def measure_stall(burst):
+    worst_lag = 0
+    total_lag = 0
+    running = True
+
+    async def heartbeat():
+        nonlocal worst_lag, total_lag
+        while running:
+            expected = time.perf_counter() + HEARTBEAT_INTERVAL
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            lag = max(0.0, time.perf_counter() - expected)
+            worst_lag = max(worst_lag, lag)
+            total_lag += lag
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await burst()
+    elapsed = time.perf_counter() - started
+    running = False
+    await heartbeat_task
+    return elapsed, worst_lag, total_lag
+
+
+async def main():
+    from entities.tip import Tip
+    from extensions.holocrons.conquest_holocron import ConquestHolocron
+    from util.storage.journal import TipJournal
+
+    bot = commands.Bot(command_prefix=".", intents=discord.Intents.default())
+    holocron = ConquestHolocron(bot)
+    locations = [holocron.get_location(f"s{sector}f{feat}") for sector in range(1, 6) for feat in range(1, 5)]
+    for index in range(EXISTING_TIPS):
+        holocron.get_tips(locations[index % len(locations)]).append(Tip(content=f"existing tip {index}" * 4))
+    holocron.save_storage()
+    await holocron.storage_writer.flush()
+    holocron.storage_writer.start()
+
+    async def synchronous_burst():
+        # the previous behaviour, the whole storage pickled on the event loop for every change
+        shard = holocron.shard
+        for index in range(BURST_SIZE):
+            holocron.get_tips(locations[index % len(locations)]).append(Tip(content=f"burst tip {index}"))
+            holocron.take_snapshot(shard)
+            holocron.write_shard(shard)
+            await asyncio.sleep(0)
+
+    async def journaled_burst():
+        for index in range(BURST_SIZE):
+            holocron.commit_change(TipJournal.ADD, locations[index % len(locations)], Tip(content=f"burst {index}"))
+            await asyncio.sleep(0)
+
+    for label, burst in [("synchronous snapshot per change", synchronous_burst),
+                         ("journal + storage writer", journaled_burst)]:
+        writes_before = holocron.storage_writer.write_count
+        elapsed, worst_lag, total_lag = await measure_stall(burst)
+        await holocron.storage_writer.flush()
+        holocron.storage_writer.start()
+        background_writes = holocron.storage_writer.write_count - writes_before
+        print(f"{label}: {BURST_SIZE} adds in {elapsed * 1000:.1f} ms, worst loop stall {worst_lag * 1000:.2f} ms, "
+              f"total stall {total_lag * 1000:.1f} ms, background writes {background_writes}")
+
+    await holocron.close_storage()
+
+
+if __name__ == "__main__":
+    root, scratch = prepare_data_dir()
+    try:
+        sys.path.insert(0, root)
+        asyncio.run(main())
+    finally:
+        os.chdir(root)
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,66 @@
+"""
+Description: measures the memory held per tip by a synthetic holocron, comparing the previous dict based Tip (full
+datetime, its own author string) with the slotted Tip (integer timestamp, interned author).
+
+Run from the repository root: python -m benchmarks.tip_memory_benchmark [tip count]
+"""
+import datetime
+import gc
+import sys
+import tracemalloc
+
+from entities.tip import Tip
+
+TIP_COUNT = 500_000
+AUTHORS = [f"member{index:03d}" for index in range(200)]
+LOCATIONS = 200
+
+
+class DictTip:
+    # the Tip layout before __slots__, kept here only to compare against
+    def __init__(self, content="", author="n/a", rating=0, user_id=0):
+        self.content = content
+        self.author = author
+        self.rating = rating
+        self.user_id = user_id
+        self.creation_time = datetime.datetime.utcnow()
+        self.edited = False
+
+
+def fresh_copy(text):
+    # unpickling gave every tip its own copy of the author, rebuilt here the same way
+    return text.encode().decode()
+
+
+def build_holocron(tip_cls, count):
+    storage = {location: [] for location in range(LOCATIONS)}
+    for index in range(count):
+        tip = tip_cls(content=f"Use a tenacity team and focus the healer first, then the tank ({index})",
+                      author=fresh_copy(AUTHORS[index % len(AUTHORS)]), rating=index % 7, user_id=10 ** 17 + index)
+        storage[index % LOCATIONS].append(tip)
+    return storage
+
+
+def measure(tip_cls, count):
+    gc.collect()
+    tracemalloc.start()
+    storage = build_holocron(tip_cls, count)
+    gc.collect()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del storage
+    return allocated
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TIP_COUNT
+    before = measure(DictTip, count)
+    after = measure(Tip, count)
+    print(f"{count} tips")
+    print(f"dict tip:    {before / count:7.1f} bytes per tip, {before / 1024 / 1024:8.1f} MiB total")
+    print(f"slotted tip: {after / count:7.1f} bytes per tip, {after / 1024 / 1024:8.1f} MiB total")
+    print(f"saved:       {(before - after) / count:7.1f} bytes per tip ({(1 - after / before) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import re
+
+from entities.locations import InvalidLocationError
+
+
+class AddressEntry:
+    __slots__ = ("location", "children")
+
+    def __init__(self, location):
+        self.location = location
+        # section id -> child location for group listings, None where the child is disabled. filled on first listing
+        self.children = {}
+
+
+class AddressTable:
+    """
+    Every canonical address of a Holocron (`s1b2`, `ds3cm1`, `g4`, and the groups above them like `s1b` or `ds3`)
+    mapped to its parsed location. Built once from base.json and labels.json, so reading a known address skips
+    parsing. Locations in the table are shared between commands and guilds and must not be modified.
+    """
+
+    def __init__(self, location_cls, labels, tip_addresses):
+        self.location_cls = location_cls
+        self.labels = labels
+        self.entries = {}
+        for address in tip_addresses:
+            for group_address in self.get_group_addresses(address):
+                if group_address not in self.entries:
+                    self.add(group_address)
+
+    @staticmethod
+    def get_group_addresses(address):
+        # the address followed by each group above it, e.g. s1b2, s1b, s1, s
+        fragments = [fragment for fragment in re.split("(\\d+)", address) if fragment]
+        return ["".join(fragments[:depth]) for depth in range(len(fragments), 0, -1)]
+
+    def add(self, address):
+        location = self.location_cls(address, None, self.labels)
+        try:
+            location.parse_location()
+        except InvalidLocationError:
+            # disabled or incomplete addresses, like planets without labels or `ds1cm`, keep being parsed per use
+            return
+        location.freeze()
+        self.entries[address] = AddressEntry(location)
+
+    def get(self, address) -> AddressEntry | None:
+        return self.entries.get(address)
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,26 +1,48 @@
+import asyncio
 import datetime
 import json
 import os.path
-import pickle
-import sys
+import re
 from copy import deepcopy
 from functools import partial
 
 import discord
 from discord.ext import commands, tasks
 
-from entities import tip as tip_module
+from entities.address_table import AddressTable
 from entities.command_parser import HolocronCommand, CommandTypes
+from entities.conversations import conversations
 from entities.interactions import AwaitingReaction
+from entities.location_cache import LocationCache
+from entities.menus import MenuChoice, send_menu, update_menu, menu_registry
 from entities.locations import HolocronLocation, LocationDisabledError, InvalidLocationError
+from entities.paginator import Paginator, send_pages, split_message
 from entities.tip import Tip
 from util import helpmgr
 from util.command_checks import check_higher_perms
 from util.datautils import clamp
+from util.dateutils import datetime_to_epoch_micros
 from util.settings.response_handler import get_response_type
-from util.settings.tip_sorting_handler import sort_tips
-
-sys.modules['data.Tip'] = tip_module
+from util.settings.tip_sorting_handler import ordered_tips, get_sort_method, sort_titles
+from util.storage import snapshot as snapshot_format
+from util.storage.guild_shards import ShardCache, StorageShard, current_guild_id, guild_key, estimate_tip_bytes, \
+    estimate_storage_bytes
+from util.storage.journal import TipJournal
+from util.storage.search_index import SearchIndex
+from util.storage.season_archive import SeasonArchive, write_archive
+from util.storage.tip_list import TipList, dedupe_keys
+from util.storage.tip_stats import TipStats
+from util.storage.user_tip_index import UserTipIndex
+from util.storage.sqlite_store import SqliteTipStore, SqliteUserTipIndex
+from util.storage.storage_writer import StorageWriter
+
+# set HOLOCRON_STORAGE=sqlite to keep tips as rows in a database instead of snapshot files
+storage_backend = os.environ.get("HOLOCRON_STORAGE", "snapshot")
+sqlite_filepath = "data/holocron.sqlite3"
+# estimated memory the loaded guild shards of each Holocron may use before the least recently used are dropped
+shard_memory_budget = int(os.environ.get("HOLOCRON_SHARD_MEMORY_MB", "256")) * 1024 * 1024
+# parsed addresses each Holocron keeps beyond its address table, including invalid ones
+location_cache_size = int(os.environ.get("HOLOCRON_LOCATION_CACHE_SIZE", "1024"))
 
 
 class Holocron:
@@ -29,29 +51,52 @@ class Holocron:
     Methods needing implementation at top, commands not included.
     """
 
-    def __init__(self, bot: commands.Bot, name):
+    def __init__(self, bot: commands.Bot, name, location_cls):
         self.bot = bot
         self.name = name
-        self.storage_filepath = f"data/{self.name}/{self.name}_storage.pckl"
+        self.location_cls = location_cls
+        # unsharded storage from before tips were kept per guild, used to seed each guild's first shard
+        self.storage_filepath = f"data/{self.name}/{self.name}_storage.snapshot"
+        self.legacy_storage_filepath = f"data/{self.name}/{self.name}_storage.pckl"
+        self.journal_filepath = f"data/{self.name}/{self.name}_journal.pckl"
+        os.makedirs(f"data/{self.name}/guilds", exist_ok=True)
+        # written once the guilds the bot was in at its first sharded start have their copy of the unsharded storage.
+        # guilds without a shard start empty from then on
+        self.seed_marker_filepath = f"data/{self.name}/guilds/seeded.json"
+        self.seeding_done = os.path.exists(self.seed_marker_filepath)
+
+        self.max_journal_records = 500
+        self.sqlite_store = SqliteTipStore(sqlite_filepath) if storage_backend == "sqlite" else None
+        self.shards = ShardCache(self.name, self.load_shard, self.can_evict_shard, shard_memory_budget)
+        # shards with a change or snapshot request the storage writer has not picked up yet
+        self.dirty_shards = set()
+        self.storage_writer = StorageWriter(self.write_storage, self.prepare_storage)
+        # modification time of labels.json when the cached locations were parsed
+        self.labels_mtime = None
+        self.location_cache = self.build_location_cache()
+        self.address_table = self.build_address_table()
+        # SearchIndex over the labels of every tip location, built on the first search
+        self.location_index = None
 
-        self.awaiting_reactions = {}
-        self.clean_awaiting_reactions.start()
         self.modifier_emoji_list = ["➕", "✍", "➖"]
         self.modifier_command_types = [CommandTypes.ADD, CommandTypes.EDIT, CommandTypes.DELETE]
         self.default_num_tips = 5
 
-        self.tip_storage = None
-        self.load_storage()
-
-        self.labels = self.load_labels()
-        self.location_cls = None
+        self.storage_writer.start()
+        self.compact_storage.start()
 
     # Requires Implementation
     def dummy_populate(self):
         raise NotImplementedError
 
     def get_tips(self, location: HolocronLocation):
-        raise NotImplementedError
+        # grammar parsed locations know where their tips are kept. holocrons with other layouts override this
+        if location.storage_path is None:
+            raise NotImplementedError
+        tips = self.tip_storage
+        for key in location.storage_path:
+            tips = tips[key]
+        return tips
 
     def get_all_tips(self):
         raise NotImplementedError
@@ -66,33 +111,310 @@ class Holocron:
         raise NotImplementedError
 
     def get_list(self):
+        # lines of the list, produced as they are paged
+        raise NotImplementedError
+
+    def iter_tip_addresses(self, storage=None):
+        # yields (storage address, tips) for every list of tips in storage, or in the current guild's storage. used to
+        # archive a season and to index tips
+        raise NotImplementedError
+
+    def get_stat_path(self, location: HolocronLocation):
+        # tuple of the aggregates a tip at location counts toward, outermost first
+        raise NotImplementedError
+
+    def iter_stat_groups(self):
+        # yields (stat path, tips) for every list of tips in storage, used to rebuild the stats
         raise NotImplementedError
 
     # Base Functionality
+    def build_address_table(self):
+        # parsed locations for every address in base.json, shared by all guilds. None to parse each address per use
+        addresses = (address for address, tips in self.iter_tip_addresses(self.build_empty_storage()))
+        return AddressTable(self.location_cls, self.load_labels(), addresses)
+
+    def build_location_cache(self):
+        # None where parsing depends on more than the address and labels
+        return LocationCache(location_cache_size)
+
     def get_location(self, location_string, location_string_suffix=None, **kwargs) -> HolocronLocation:
+        is_map, is_group = kwargs.get("is_map", False), kwargs.get("is_group", False)
+        if self.address_table and location_string_suffix is None and not is_map and not is_group:
+            entry = self.address_table.get(location_string)
+            if entry:
+                return entry.location
+
+        if self.location_cache is None:
+            return self.parse_location(location_string, location_string_suffix, **kwargs)
+
+        # other keyword arguments, like command_type, do not change how conquest and rise addresses parse
+        cache_key = (location_string, location_string_suffix, is_map, is_group)
+        location_obj = self.location_cache.get(cache_key)
+        if location_obj is not None:
+            return location_obj
+
+        try:
+            location_obj = self.parse_location(location_string, location_string_suffix, **kwargs)
+        except InvalidLocationError as error:
+            self.location_cache.put(cache_key, error)
+            raise
+        location_obj.freeze()
+        self.location_cache.put(cache_key, location_obj)
+        return location_obj
+
+    def parse_location(self, location_string, location_string_suffix=None, **kwargs) -> HolocronLocation:
         location_obj = self.location_cls(location_string, location_string_suffix, self.labels)
         location_obj.parse_location(**kwargs)
         return location_obj
 
-    def load_storage(self):
+    # Storage
+    @property
+    def shard(self) -> StorageShard:
+        # storage of the guild the running command came from, loaded on first use
+        return self.shards.get(current_guild_id.get())
+
+    @property
+    def tip_storage(self):
+        return self.shard.tip_storage
+
+    @tip_storage.setter
+    def tip_storage(self, storage):
+        self.shard.tip_storage = storage
+
+    @property
+    def labels(self):
+        return self.shard.labels
+
+    @property
+    def address_tips(self):
+        # storage address -> tip list for the current guild, so reading a location is a single lookup
+        shard = self.shard
+        if shard.address_tips is None:
+            shard.address_tips = dict(self.iter_tip_addresses())
+        return shard.address_tips
+
+    @property
+    def stats(self) -> TipStats:
+        shard = self.shard
+        if shard.stats is None:
+            shard.stats = TipStats.from_groups(self.iter_stat_groups())
+        return shard.stats
+
+    @property
+    def user_tips(self) -> UserTipIndex:
+        shard = self.shard
+        if shard.user_tips is None and self.sqlite_store:
+            shard.user_tips = SqliteUserTipIndex(self.sqlite_store, shard.namespace,
+                                                 partial(self.iter_tip_addresses, shard.tip_storage))
+        elif shard.user_tips is None:
+            shard.user_tips = UserTipIndex.from_addresses(self.iter_tip_addresses())
+        return shard.user_tips
+
+    @property
+    def search_index(self) -> SearchIndex:
+        shard = self.shard
+        if shard.search_index is None:
+            shard.search_index = SearchIndex.from_documents(
+                ((address, tip.get_key()), (address, tip), tip.get_search_text())
+                for address, tips in self.iter_tip_addresses() for tip in tips)
+        return shard.search_index
+
+    def build_location_index(self):
+        # the name and label text of every tip location in the address table
+        documents = []
+        for address, entry in self.address_table.entries.items() if self.address_table else ():
+            location = entry.location
+            if location.is_group_location:
+                continue
+            try:
+                text = f"{location.get_location_name()} {location.get_detail()}"
+            except (KeyError, NotImplementedError):
+                continue
+            documents.append((address, location, text))
+        return SearchIndex.from_documents(documents)
+
+    def search(self, query, limit=10):
+        # (locations, (address, tip) pairs) best matching the query, best first
+        if self.location_index is None:
+            self.location_index = self.build_location_index()
+        locations = [location for location, score in self.location_index.search(query, limit=5)]
+        return locations, [address_tip for address_tip, score in self.search_index.search(query, limit)]
+
+    def format_search(self, command: HolocronCommand):
+        query = " ".join(([command.address] if command.address else []) + command.command_args)
+        if not query:
+            return [f"Follow `search` with the words to look for."]
+        locations, address_tips = self.search(query)
+        if not locations and not address_tips:
+            return [f"Nothing in {self.name} matches `{query}`."]
+
+        output = [f"__**Search results for `{query}`**__"]
+        if locations:
+            output.append("**Locations**")
+            for location in locations:
+                output.append(f"`{location.address}` - {location.get_tip_title()}")
+        if address_tips:
+            output.append("**Tips**")
+            for index, (address, tip) in enumerate(address_tips):
+                output.append(f"{index + 1} - `{address}` {tip.create_selection_message()}")
+        return output
+
+    def format_with(self, command: HolocronCommand):
+        raise NotImplementedError
+
+    def format_versus(self, command: HolocronCommand):
+        raise NotImplementedError
+
+    def verify_stats(self, shard: StorageShard):
+        # consistency check of the incremental counters against a full scan. returns False if they had drifted
+        token = current_guild_id.set(shard.guild_id)
+        try:
+            rebuilt = TipStats.from_groups(self.iter_stat_groups())
+        finally:
+            current_guild_id.reset(token)
+        consistent = shard.stats is None or shard.stats == rebuilt
+        if not consistent:
+            print(f"{self.name} stats for guild {shard.guild_id} were out of date and have been rebuilt")
+        shard.stats = rebuilt
+        return consistent
+
+    def format_top_authors(self):
+        top_authors = self.stats.top_authors()
+        if not top_authors:
+            return ""
+        return "Top Authors: " + ", ".join(f"{author} ({count})" for author, count in top_authors) + "\n"
+
+    def load_shard(self, shard: StorageShard):
+        # journal replay resolves locations and tips through the current guild, so point it at this shard
+        token = current_guild_id.set(shard.guild_id)
+        try:
+            if self.sqlite_store:
+                self.load_sqlite_shard(shard)
+            elif self.load_snapshot_shard(shard):
+                # seeded from the unsharded storage or repaired, give the guild a snapshot of its own
+                self.request_snapshot(shard)
+        finally:
+            current_guild_id.reset(token)
+        # anything indexed during replay may point into storage that has since been replaced
+        shard.reset_indexes()
+
+    def has_stored_snapshot(self):
+        return os.path.exists(self.storage_filepath) or os.path.exists(self.legacy_storage_filepath)
+
+    def load_snapshot_shard(self, shard: StorageShard):
+        # returns whether the shard differs from its snapshot: seeded from the unsharded storage, or tip keys repaired
+        snapshot_seq = 0
+        seeded = False
+        if os.path.exists(shard.storage_filepath):
+            with open(shard.storage_filepath, "rb") as storage_file:
+                snapshot_seq, shard.tip_storage = snapshot_format.load(storage_file)
+            shard.labels = self.load_labels()
+        elif self.has_stored_snapshot() and not self.seeding_done:
+            self.load_unsharded_storage(shard)
+            seeded = True
+        else:
+            shard.tip_storage = self.build_empty_storage()
+            shard.labels = self.load_labels()
+
+        for seq, op, address, payload in shard.journal.load(after_seq=snapshot_seq):
+            self.apply_change(op, self.get_location(address), payload)
+        shard.memory_estimate = estimate_storage_bytes(shard.tip_storage)
+
+        moved = sum(dedupe_keys(tips) for address, tips in self.iter_tip_addresses(shard.tip_storage))
+        if moved:
+            print(f"{self.name} storage for guild {shard.guild_id} had {moved} tips sharing a key, given keys of "
+                  f"their own")
+        return seeded or moved > 0
+
+    def load_unsharded_storage(self, shard: StorageShard):
+        # every guild used to share one storage, so the guilds the bot was in then start from a copy of it. the
+        # unsharded files are only read, and are left in place as a backup
         if os.path.exists(self.storage_filepath):
             with open(self.storage_filepath, "rb") as storage_file:
-                self.tip_storage = pickle.load(storage_file)
+                snapshot_seq, shard.tip_storage = snapshot_format.load(storage_file)
         else:
-            self.clean_storage()
-            self.save_storage()
+            with open(self.legacy_storage_filepath, "rb") as storage_file:
+                snapshot_seq, shard.tip_storage = snapshot_format.load_legacy(storage_file)
+        shard.labels = self.load_labels()
+
+        for seq, op, address, payload in TipJournal(self.journal_filepath).load(after_seq=snapshot_seq):
+            self.apply_change(op, self.get_location(address), payload)
+
+    def load_sqlite_shard(self, shard: StorageShard):
+        if not self.sqlite_store.is_migrated(shard.namespace):
+            if self.sqlite_store.is_migrated(self.name) and not os.path.exists(shard.storage_filepath) and \
+                    not self.seeding_done:
+                # rows stored before sharding are copied, like the unsharded snapshot is
+                self.sqlite_store.copy_holocron(self.name, shard.namespace)
+            else:
+                # migrate the shard's snapshot storage (or the unsharded one), including its journal tail, into rows
+                self.load_snapshot_shard(shard)
+                self.sqlite_store.import_storage(shard.namespace, shard.tip_storage)
+                # the journal tail is in the rows now, and sqlite never writes the snapshot that would empty it
+                if shard.journal.record_count:
+                    shard.journal.reset()
 
-    def load_labels(self):
-        with open(f'data/{self.name}/labels.json') as labels_file:
-            return json.load(labels_file)
+        # rows are read on demand, so a sqlite shard costs next to nothing while loaded
+        shard.tip_storage = self.sqlite_store.wrap_storage(shard.namespace, self.build_empty_storage())
+        shard.labels = self.load_labels()
 
-    def clean_storage(self):
-        self.tip_storage = {}
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.seed_guild_shards()
+
+    async def seed_guild_shards(self):
+        # copies the unsharded storage into every guild the bot is in, once. until then any shard loaded is seeded
+        if self.seeding_done:
+            return
+        guild_ids = [guild.id for guild in self.bot.guilds]
+        for guild_id in guild_ids:
+            self.shards.get(guild_id)
+            # written guild by guild, so seeded shards can be evicted rather than all held at once
+            if self.storage_writer.dirty.is_set():
+                await self.storage_writer.write_now()
+        if self.dirty_shards:
+            # a write failed, seed again on the next start rather than leave a guild without its tips
+            return
+
+        with open(self.seed_marker_filepath, "w") as marker_file:
+            json.dump({"guild_ids": guild_ids}, marker_file)
+        self.seeding_done = True
+
+    def can_evict_shard(self, shard: StorageShard):
+        # a shard is only dropped once everything it holds is on disk. the writer lock covers a write in progress
+        return shard not in self.dirty_shards and not self.storage_writer.write_lock.locked()
+
+    def load_labels(self):
+        labels_filepath = f'data/{self.name}/labels.json'
+        with open(labels_filepath) as labels_file:
+            labels = json.load(labels_file)
+
+        labels_mtime = os.path.getmtime(labels_filepath)
+        if labels_mtime != self.labels_mtime:
+            # locations parsed against the previous labels may be named or validated differently now
+            self.labels_mtime = labels_mtime
+            self.location_index = None
+            if self.location_cache is not None:
+                self.location_cache.clear()
+        return labels
+
+    def build_empty_storage(self):
         with open(f"data/{self.name}/base.json") as config_file:
             config = json.load(config_file)
+        return self.config_to_storage(config)
 
-        self.tip_storage = self.config_to_storage(config)
-        self.labels = self.load_labels()
+    def clean_storage(self):
+        shard = self.shard
+        if self.sqlite_store:
+            self.sqlite_store.clear(shard.namespace)
+            shard.tip_storage = self.sqlite_store.wrap_storage(shard.namespace, self.build_empty_storage())
+        else:
+            shard.tip_storage = self.build_empty_storage()
+        shard.labels = self.load_labels()
+        shard.memory_estimate = estimate_storage_bytes(shard.tip_storage)
+        self.address_table = self.build_address_table()
+        if self.location_cache is not None:
+            self.location_cache.clear()
         self.save_storage()
 
     def config_to_storage(self, config: dict):
@@ -106,38 +428,289 @@ class Holocron:
             if section_count:
                 # duplicate subsection in a dict of index -> subsection data for count times
                 for idx in range(0, section_count):
-                    section_storage[idx + 1] = deepcopy(sub_section_storage or [])
+                    section_storage[idx + 1] = deepcopy(sub_section_storage or TipList())
             else:
                 if section_config.get('tips'):
-                    section_storage['tips'] = []
+                    section_storage['tips'] = TipList()
                 section_storage.update(sub_section_storage)
 
             storage[section] = section_storage
         return storage
 
     def save_storage(self):
-        with open(self.storage_filepath, "wb") as storage_file:
-            pickle.dump(self.tip_storage, storage_file)
+        # bulk changes skip commit_change, so the counters and index are rebuilt on their next read
+        self.shard.reset_indexes()
+        if self.sqlite_store:
+            # rows are written as changes happen, only in place edits of loaded tips are left to persist
+            self.sqlite_store.flush()
+            return
+
+        # a full snapshot of the current guild's shard, written by the storage writer
+        self.request_snapshot(self.shard)
+
+    def request_snapshot(self, shard: StorageShard):
+        # folds in (and then discards) everything journaled for the shard so far
+        shard.snapshot_requested = True
+        self.mark_shard_dirty(shard)
+
+    def mark_shard_dirty(self, shard: StorageShard):
+        self.dirty_shards.add(shard)
+        self.storage_writer.mark_dirty()
+
+    def prepare_storage(self):
+        # runs on the event loop before each write. requested snapshots are taken here, where no change can land
+        # mid-copy, and only the copy is serialized on the writer's thread
+        for shard in self.dirty_shards:
+            if shard.snapshot_requested:
+                self.take_snapshot(shard)
+
+    def take_snapshot(self, shard: StorageShard):
+        shard.snapshot_requested = False
+        shard.pending_snapshot = (shard.journal.seq, snapshot_format.freeze(shard.tip_storage))
+
+    def write_storage(self):
+        # runs on the storage writer's thread, and only rewrites the shards changed since the last write
+        while self.dirty_shards:
+            shard = self.dirty_shards.pop()
+            try:
+                self.write_shard(shard)
+            except Exception:
+                self.dirty_shards.add(shard)
+                raise
+
+    def write_shard(self, shard: StorageShard):
+        # the snapshot holds exactly the records up to its journal seq, so the journal is only emptied once it is
+        # written. a failed write keeps it for the next one
+        if shard.pending_snapshot is not None:
+            snapshot_seq, storage = shard.pending_snapshot
+            snapshot = snapshot_format.dumps(storage, snapshot_seq)
+
+            temp_filepath = f"{shard.storage_filepath}.tmp"
+            with open(temp_filepath, "wb") as storage_file:
+                storage_file.write(snapshot)
+                storage_file.flush()
+                os.fsync(storage_file.fileno())
+            os.replace(temp_filepath, shard.storage_filepath)
+            shard.pending_snapshot = None
+            shard.journal.reset()
+
+        shard.journal.write_pending()
+
+    async def close_storage(self):
+        self.compact_storage.cancel()
+        await self.storage_writer.flush()
+        for shard in self.shards.loaded():
+            shard.journal.close()
+
+    def commit_change(self, op, location: HolocronLocation, payload):
+        # applies a single mutation and journals it, costing O(change) rather than a full snapshot
+        shard = self.shard
+        if op == TipJournal.ADD:
+            self.claim_free_key(location, payload)
+        changed_tip = self.apply_change(op, location, payload)
+        if self.sqlite_store:
+            # adds and deletes are written through by the storage views, in place edits are written here
+            if changed_tip and op in (TipJournal.EDIT, TipJournal.REASSIGN):
+                self.sqlite_store.update_tip(changed_tip)
+            return
 
-    async def request_clean_storage(self, guild, channel, author, response_method):
-        def check_message(message):
-            return message.channel.id == channel.id and message.author.id == author.id
+        if changed_tip and op == TipJournal.ADD:
+            shard.memory_estimate += estimate_tip_bytes(changed_tip)
+        elif changed_tip and op == TipJournal.DELETE:
+            shard.memory_estimate -= estimate_tip_bytes(changed_tip)
 
+        shard.journal.append(op, location.get_storage_address(), payload)
+        if shard.journal.record_count >= self.max_journal_records:
+            self.request_snapshot(shard)
+        else:
+            self.mark_shard_dirty(shard)
+
+    def apply_change(self, op, location: HolocronLocation, payload):
+        # shared by live mutations and journal replay. keyed by tip so replaying over a newer snapshot is harmless
+        tips = self.get_tips(location)
+        stats = self.shard.stats
+        user_tips = self.shard.user_tips
+        search_index = self.shard.search_index
+        address = location.get_storage_address()
+        self.shard.rendered_tips.pop(address, None)
+        if op == TipJournal.ADD:
+            if self.find_tip(tips, payload.get_key()) is not None:
+                # a replayed record the snapshot already has, possibly edited since. live adds claimed a free key
+                return None
+            tips.append(payload)
+            if stats is not None:
+                stats.add(self.get_stat_path(location), payload.author)
+            if user_tips is not None:
+                user_tips.add(address, payload)
+            if search_index is not None:
+                search_index.add((address, payload.get_key()), (address, payload), payload.get_search_text())
+            return payload
+
+        tip_key, *changes = payload
+        tip = self.find_tip(tips, tip_key)
+        if tip is None:
+            return None
+
+        if op == TipJournal.EDIT:
+            tip.content = changes[0]
+            tip.edited = True
+            if search_index is not None:
+                search_index.add((address, tip.get_key()), (address, tip), tip.get_search_text())
+        elif op == TipJournal.DELETE:
+            tips.remove(tip)
+            if stats is not None:
+                stats.remove(self.get_stat_path(location), tip.author)
+            if user_tips is not None:
+                user_tips.remove(address, tip)
+            if search_index is not None:
+                search_index.remove((address, tip.get_key()))
+        elif op == TipJournal.REASSIGN:
+            if stats is not None:
+                stats.reassign(tip.author, changes[0])
+            if user_tips is not None:
+                user_tips.remove(address, tip)
+            tip.author, tip.user_id = changes
+            if user_tips is not None:
+                user_tips.add(address, tip)
+        return tip
+
+    def claim_free_key(self, location: HolocronLocation, tip):
+        # a new tip whose key another tip at the location already holds moves to the next free key before it is
+        # journaled, so replay finds it there too
+        tips = self.get_tips(location)
+        key = tip.get_key()
+        if self.find_tip(tips, key) is None:
+            return
+        while self.find_tip(tips, tip.get_key()) is not None:
+            tip.creation_micros += 1
+        print(f"{self.name} tip key {key} at {location.get_storage_address()} was taken, the new tip was stored as "
+              f"{tip.get_key()}")
+
+    @staticmethod
+    def find_tip(tips, tip_key):
+        if isinstance(tip_key, datetime.datetime):
+            # journal records written before tip keys were integer timestamps
+            tip_key = datetime_to_epoch_micros(tip_key)
+        if isinstance(tips, TipList):
+            return tips.find(tip_key)
+        for tip in tips:
+            if tip.get_key() == tip_key:
+                return tip
+        return None
+
+    async def request_clean_storage(self, guild, channel, author, response_method, season=None):
         if not await check_higher_perms(author, guild):
             await response_method.send("You do not have access to this command.")
             return
 
+        # the season is checked before asking, so a confirmed clear is never turned down afterwards
+        season = season or datetime.datetime.utcnow().strftime("%Y-%m-%d")
+        try:
+            self.check_season(season)
+        except InvalidLocationError as error:
+            await response_method.send(f"{error} Storage was not cleared.")
+            return
+
         await response_method.send("Are you sure you want to clear all tips from storage? Type `confirm` to confirm, or"
                                    "`cancel` to cancel.")
-        confirm_message = await self.bot.wait_for("message", check=check_message)
-        if confirm_message.content != "confirm":
+        confirm_message = await conversations.ask(channel.id, author.id)
+        if confirm_message is None or confirm_message.content != "confirm":
             feedback = "Storage clearing canceled. All tips will remain."
         else:
-            self.clean_storage()
-            feedback = "Tip storage has been cleared."
+            try:
+                archived_count = self.archive_storage(season)
+                feedback = f"Tips for {archived_count} locations were archived as season `{season}`. " \
+                           f"Tip storage has been cleared."
+                self.clean_storage()
+            except NotImplementedError:
+                feedback = "Tip storage has been cleared."
+                self.clean_storage()
+            except InvalidLocationError as error:
+                # archived by another clear while this one waited for confirmation
+                feedback = f"{error} Storage was not cleared."
 
         await response_method.send(feedback)
 
+    def get_archive_filepath(self, season):
+        if not re.fullmatch(r"[a-z0-9_.-]{1,32}", season) or season.startswith("."):
+            raise InvalidLocationError(f"Invalid season name `{season}`. Use letters, numbers, `-`, `_` or `.`.")
+        return f"data/{self.name}/archive/{self.shard.guild_id}/{season}.archive"
+
+    def check_season(self, season):
+        # raises InvalidLocationError unless season is a valid name with no archive yet. returns the archive filepath
+        filepath = self.get_archive_filepath(season)
+        if os.path.exists(filepath):
+            raise InvalidLocationError(f"Season `{season}` is already archived. Clear with a new season name.")
+        return filepath
+
+    def archive_storage(self, season):
+        # copies the current guild's tips into an immutable season archive, before clearing them. returns the number
+        # of locations archived
+        filepath = self.check_season(season)
+
+        locations = []
+        for address, tips in self.iter_tip_addresses():
+            if not tips:
+                continue
+            try:
+                location = self.get_location(address)
+                name, detail = location.get_location_name(), location.get_detail()
+            except (InvalidLocationError, KeyError):
+                # tips left at an address the labels no longer describe
+                name, detail = address, ""
+            locations.append((address, name, detail, list(tips)))
+
+        write_archive(filepath, season, locations)
+        return len(locations)
+
+    def list_archived_seasons(self):
+        archive_dir = f"data/{self.name}/archive/{self.shard.guild_id}"
+        if not os.path.isdir(archive_dir):
+            return []
+        return sorted(filename[:-len(".archive")] for filename in os.listdir(archive_dir)
+                      if filename.endswith(".archive"))
+
+    def format_archive(self, command: HolocronCommand):
+        season = command.address
+        if not season:
+            seasons = self.list_archived_seasons()
+            if not seasons:
+                return f"There are no archived seasons for {self.name}."
+            return f"**Archived seasons for {self.name}**\n" + "\n".join(f"`{season}`" for season in seasons)
+
+        filepath = self.get_archive_filepath(season)
+        if not os.path.exists(filepath):
+            raise InvalidLocationError(f"No archived season `{season}`.")
+        archive = SeasonArchive(filepath)
+
+        query_args = list(command.command_args)
+        read_filters = [query_args.pop()] if len(query_args) > 1 and query_args[-1].isdigit() else []
+        if not query_args:
+            output = [f"**Archived locations for season `{season}`**"]
+            for entry in archive.entries.values():
+                output.append(f"`{entry.address}` - {entry.detail} (#tips: {entry.tip_count})")
+            return "\n".join(output)
+
+        query = " ".join(query_args)
+        entries = archive.find(query)
+        if not entries:
+            return f"Nothing archived in season `{season}` matches `{query}`."
+        if len(entries) > 1:
+            output = [f"Locations in season `{season}` matching `{query}`:"]
+            for entry in entries:
+                output.append(f"`{entry.address}` - {entry.detail} (#tips: {entry.tip_count})")
+            return "\n".join(output)
+
+        # only the matching location's block is read and decompressed
+        entry = entries[0]
+        tips = archive.read_tips(entry)
+        top_n = ordered_tips(tips, self.get_sort_method(), self._read_depth(read_filters))
+        output = [f"__**Season `{season}` tip{'' if len(top_n) == 1 else 's'} {len(top_n)}** "
+                  f"(of {len(tips)}) for **{entry.name}**__", entry.detail]
+        for index, tip in enumerate(top_n):
+            output.append(f"{index + 1} - " + tip.create_tip_message())
+        return "\n".join(output)
+
     async def request_dummy_populate(self, guild, author, response_method):
         if not await check_higher_perms(author, guild):
             await response_method.send("You do not have access to this command.")
@@ -152,6 +725,7 @@ class Holocron:
         await response_method.send("Data added.")
 
     async def holocron_command_manager(self, ctx: commands.Context, *command_args):
+        current_guild_id.set(guild_key(ctx.guild))
         response_method = get_response_type(ctx.guild, ctx.author, ctx.channel)
         if len(command_args) == 0:
             await response_method.send(f"Holocron commands require extra information. For a list of commands and "
@@ -171,7 +745,19 @@ class Holocron:
             return
 
         if command_type is CommandTypes.LIST:
-            await response_method.send(self.get_list())
+            await send_pages(response_method, Paginator(ctx.author.id, self.get_list()))
+            return
+
+        if command_type is CommandTypes.SEARCH:
+            await send_pages(response_method, Paginator(ctx.author.id, self.format_search(command_obj)))
+            return
+
+        if command_type in [CommandTypes.WITH, CommandTypes.VS]:
+            format_query = self.format_with if command_type is CommandTypes.WITH else self.format_versus
+            try:
+                await send_pages(response_method, Paginator(ctx.author.id, format_query(command_obj)))
+            except NotImplementedError:
+                await response_method.send(f"{command_type.name.title()} command not supported for {self.name}")
             return
 
         if command_type is CommandTypes.RISE_CLEANUP:
@@ -181,7 +767,11 @@ class Holocron:
             return
 
         if command_type is CommandTypes.CLEAR:
-            await self.request_clean_storage(ctx.guild, ctx.channel, ctx.author, response_method)
+            await self.request_clean_storage(ctx.guild, ctx.channel, ctx.author, response_method, command_obj.address)
+            return
+
+        if command_type is CommandTypes.ARCHIVE:
+            await response_method.send(self.format_archive(command_obj))
             return
 
         if command_type is CommandTypes.POPULATE:
@@ -199,7 +789,8 @@ class Holocron:
             return
 
         if command_type is CommandTypes.STATS:
-            await response_method.send(self.generate_stats_report())
+            report_lines = self.generate_stats_report().splitlines()
+            await send_pages(response_method, Paginator(ctx.author.id, report_lines))
             return
 
         if command_type is CommandTypes.HELP:
@@ -220,6 +811,10 @@ class Holocron:
         else:
             await self.holocron_tips(command_obj, location, response_method, ctx.author, ctx.channel, ctx.guild)
 
+    def get_user_tips(self, user_id):
+        # (storage address, tip) for every tip the user wrote in the current guild, newest first
+        return sorted(self.user_tips.iter_user_tips(user_id), key=lambda address_tip: -address_tip[1].creation_micros)
+
     def migrate_users(self, channel):
         all_tips = self.get_all_tips()
         member_map = {}
@@ -236,28 +831,43 @@ class Holocron:
 
         self.save_storage()
 
-    async def send_modifier_choices(self, user, sent_message, location):
-        self.awaiting_reactions[sent_message.id] = AwaitingReaction(user.id, self.modifier_emoji_list,
-                                                                    None, HolocronCommand(), location)
-
-        for emoji in self.modifier_emoji_list:
-            await sent_message.add_reaction(emoji)
+    async def send_with_modifiers(self, response_method, user, content, location):
+        # the message, with a menu to add to, edit or delete from the location's tips
+        return await send_menu(response_method, content, self.modifier_emoji_list, user.id, self.handle_reaction,
+                               AwaitingReaction(None, CommandTypes.READ, location.address))
 
     def _read_depth(self, read_filters):
-        try:
-            return clamp(int(read_filters[-1]), 3, 10)
-        except (IndexError, ValueError, TypeError):
-            return self.default_num_tips
-
-    def format_tips(self, location: HolocronLocation, read_filters=None) -> str:
+        # filters combine in any order, like `.ctr jmk 5 owned`, so the depth is the first numeric one
+        for read_filter in read_filters or []:
+            if str(read_filter).isdigit():
+                return clamp(int(read_filter), 3, 10)
+        return self.default_num_tips
+
+    def get_sort_method(self):
+        return get_sort_method(current_guild_id.get())
+
+    def get_render_key(self, location: HolocronLocation, read_filters):
+        # everything besides the tips at the address that changes what format_tips shows
+        return location.address, self._read_depth(read_filters), self.get_sort_method()
+
+    def format_tips(self, location: HolocronLocation, read_filters=None, user_id=None) -> str:
+        # rendered once per address and read options, until a change at the address or a bulk change drops it
+        rendered = self.shard.rendered_tips.setdefault(location.get_storage_address(), {})
+        render_key = self.get_render_key(location, read_filters)
+        message = rendered.get(render_key)
+        if message is None:
+            message = rendered[render_key] = self.render_tips(location, read_filters)
+        return message
+
+    def render_tips(self, location: HolocronLocation, read_filters=None) -> str:
         location_tips = self.get_tips(location)
         total = len(location_tips)
-        sort_tips(location_tips)
-        top_n = location_tips[:self._read_depth(read_filters)]
+        sort_method = self.get_sort_method()
+        top_n = ordered_tips(location_tips, sort_method, self._read_depth(read_filters))
         detail = location.get_detail()
 
         if len(top_n) > 0:
-            output = [f"__**Recent tip{'' if len(top_n) == 1 else 's'} {len(top_n)}** "
+            output = [f"__**{sort_titles[sort_method]} tip{'' if len(top_n) == 1 else 's'} {len(top_n)}** "
                       f"(of {total}) for **{location.get_location_name()}**__"]
 
             if detail:
@@ -291,9 +901,10 @@ class Holocron:
             await modifying[command_type](author, tip_location, response_method)
             return
 
-        response = self.format_tips(tip_location, command.read_filters)
-        sent_message = await response_method.send(response)
-        await self.send_modifier_choices(author, sent_message, tip_location)
+        *responses, last_response = split_message(self.format_tips(tip_location, command.read_filters, author.id))
+        for response in responses:
+            await response_method.send(response)
+        await self.send_with_modifiers(response_method, author, last_response, tip_location)
 
     async def holocron_group_list(self, command: HolocronCommand, location: HolocronLocation, response_method, author):
         # tip_location is a short address, missing a final id
@@ -311,13 +922,21 @@ class Holocron:
             pass
 
         group_data = self.get_group_data(location, override_feats=True)
+        group_entry = self.address_table.get(location.address) if self.address_table else None
         selection_idx = 1
         for section_id, tips in group_data.items():
-            try:
-                # added to support WIPs when some locations are disabled and it's not really an error yet
-                temp_location = self.get_location(location.address, location_string_suffix=str(section_id),
-                                                  is_group=True)
-            except LocationDisabledError:
+            if group_entry and section_id in group_entry.children:
+                temp_location = group_entry.children[section_id]
+            else:
+                try:
+                    temp_location = self.get_location(location.address, location_string_suffix=str(section_id),
+                                                      is_group=True)
+                except LocationDisabledError:
+                    # added to support WIPs when some locations are disabled and it's not really an error yet
+                    temp_location = None
+                if group_entry:
+                    group_entry.children[section_id] = temp_location
+            if temp_location is None:
                 continue
 
             tip_title = temp_location.get_tip_title()
@@ -336,26 +955,16 @@ class Holocron:
             emoji_list.append(emoji)
 
         emoji_list.append("🚫")
-        sent_message = await response_method.send('\n'.join(response))
-
-        self.awaiting_reactions[sent_message.id] = AwaitingReaction(author.id, emoji_list,
-                                                                    list(group_data.keys()), command, location)
-
-        for emoji in emoji_list:
-            await sent_message.add_reaction(emoji)
+        await send_menu(response_method, '\n'.join(response), emoji_list, author.id, self.handle_reaction,
+                        AwaitingReaction(list(group_data.keys()), command.command_type, location.address))
 
     async def add_tip(self, command: HolocronCommand, channel, author, location: HolocronLocation, response_method):
-        def check_message(message):
-            return message.channel.id == channel_id and message.author.id == user_id
-
         if not command.new_tip_text:
             await response_method.send(f"Your next message in this channel will be added as a tip "
                                        f"for {location.get_location_name()}.\n"
                                        f"If you wish to cancel, respond with `cancel`.")
-            channel_id = channel.id
-            user_id = author.id
-            tip_response = await self.bot.wait_for("message", check=check_message)
-            tip_message = tip_response.content
+            tip_response = await conversations.ask(channel.id, author.id)
+            tip_message = tip_response.content if tip_response is not None else "cancel"
         else:
             tip_message = command.new_tip_text
 
@@ -363,25 +972,25 @@ class Holocron:
             await response_method.send("Tip addition has been cancelled.")
             return
 
-        self.get_tips(location).append(Tip(content=tip_message, author=author.display_name, user_id=author.id))
-        self.save_storage()
+        new_tip = Tip(content=tip_message, author=author.display_name, user_id=author.id)
+        self.commit_change(TipJournal.ADD, location, new_tip)
 
-        sent_message = await response_method.send(f"Your tip has been added.\n{self.format_tips(location)}")
-        await self.send_modifier_choices(author, sent_message, location)
+        await self.send_with_modifiers(response_method, author,
+                                       f"Your tip has been added.\n{self.format_tips(location)}", location)
 
     async def add_squad(self, command: HolocronCommand, channel, author, location: HolocronLocation, response_method):
         raise NotImplementedError
 
-    async def edit_tip(self, command: HolocronCommand, guild, author, location: HolocronLocation, response_method):
-        tips_list = self.get_tips(location)
+    async def get_editable_tips(self, location: HolocronLocation, user, guild):
+        # the tips a user may modify, in display order. pages are slices of this list
+        if await check_higher_perms(user, guild):
+            return ordered_tips(self.get_tips(location), self.get_sort_method())
+        return ordered_tips(self.user_tips.get_tips(user.id, location.get_storage_address()), self.get_sort_method())
 
-        if await check_higher_perms(author, guild):
-            user_tips = tips_list
-        else:
-            user_tips = list(filter(lambda each_tip: each_tip.user_id == author.id, tips_list))
+    async def edit_tip(self, command: HolocronCommand, guild, author, location: HolocronLocation, response_method):
+        user_tips = await self.get_editable_tips(location, author, guild)
 
         if len(user_tips) > 0:
-            sort_tips(user_tips)
             page_count = ((len(user_tips) - 1) // 5) + 1
             user_tips = user_tips[:5]
 
@@ -399,48 +1008,40 @@ class Holocron:
                 emoji_list.append("➡️")
             emoji_list.append("🚫")
 
-            sent_tip_message = await response_method.send("\n".join(tip_messages))
-
-            self.awaiting_reactions[sent_tip_message.id] = \
-                AwaitingReaction(author.id, emoji_list, user_tips, command, location)
-
-            for emoji in emoji_list:
-                await sent_tip_message.add_reaction(emoji)
+            await send_menu(response_method, "\n".join(tip_messages), emoji_list, author.id, self.handle_reaction,
+                            AwaitingReaction([tip.get_key() for tip in user_tips], command.command_type,
+                                             location.address, command.new_author))
 
         else:
             await response_method.send(f"There are no tips that you can {command.command_type.description()} "
                                        f"for {location.get_location_name()}.")
 
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.Member):
-        if user.id == self.bot.user.id:
-            return
-        try:
-            awaiting_reaction = self.awaiting_reactions[reaction.message.id]
-            if awaiting_reaction.user_id == user.id and reaction.emoji in awaiting_reaction.allowed_emoji:
-                await self.handle_reaction(reaction, user)
-            return
-        except KeyError:
-            pass
-
-    async def handle_reaction(self, reaction, user):
+    async def handle_reaction(self, reaction: MenuChoice, user, awaiting_reaction: AwaitingReaction):
+        # called by the menu registry with a choice from one of this Holocron's menus
+        if reaction.emoji not in ("⬅️", "➡️"):
+            # anything but a page change answers with new messages, which may wait on the user
+            await reaction.acknowledge()
         response_method = get_response_type(reaction.message.guild, user, reaction.message.channel)
 
-        awaiting_reaction = self.awaiting_reactions[reaction.message.id]
-
-        tips = awaiting_reaction.tips
-        command = awaiting_reaction.command
-        location = awaiting_reaction.location
+        command_type = awaiting_reaction.command_type
+        try:
+            location = self.get_location(awaiting_reaction.address, command_type=command_type)
+        except InvalidLocationError:
+            # the labels changed since the menu was sent
+            menu_registry.remove(reaction.message.id)
+            await response_method.send("That menu is out of date. Please run the command again.")
+            return
 
         try:
             emoji_num = int(reaction.emoji[0])
         except ValueError:  # if emoji is one of the arrow emojis
             if reaction.emoji == "🚫":
-                del self.awaiting_reactions[reaction.message.id]
+                menu_registry.remove(reaction.message.id)
                 await response_method.send("Selection Cancelled.")
                 return
             elif reaction.emoji in self.modifier_emoji_list:
                 idx = self.modifier_emoji_list.index(reaction.emoji)
+                command = HolocronCommand()
                 command.command_type = self.modifier_command_types[idx]
                 command.address = location.address
                 await self.holocron_tips(command, location, response_method, user,
@@ -450,21 +1051,26 @@ class Holocron:
                 await self.change_edit_page(reaction, awaiting_reaction, user)
                 return
 
-        del self.awaiting_reactions[reaction.message.id]
+        menu_registry.remove(reaction.message.id)
 
-        chosen_tip = tips[emoji_num - 1]
+        chosen = awaiting_reaction.choices[emoji_num - 1]
         channel = reaction.message.channel
-        if command.command_type is CommandTypes.READ:
-            await self.handle_view_group(chosen_tip, location, response_method, user)
-        elif command.command_type is CommandTypes.EDIT:
+        if command_type is CommandTypes.READ:
+            await self.handle_view_group(chosen, location, response_method, user)
+            return
+
+        chosen_tip = self.find_tip(self.get_tips(location), chosen)
+        if chosen_tip is None:
+            await response_method.send("That tip no longer exists.")
+        elif command_type is CommandTypes.EDIT:
             await self.handle_tip_edit(chosen_tip, location, response_method, user, channel)
-        elif command.command_type is CommandTypes.CHANGE_AUTHOR:
-            await self.handle_change_author(chosen_tip, command.new_author, location, response_method,
+        elif command_type is CommandTypes.CHANGE_AUTHOR:
+            await self.handle_change_author(chosen_tip, awaiting_reaction.new_author, location, response_method,
                                             user, reaction.message.guild, channel)
-        elif command.command_type is CommandTypes.DELETE:
+        elif command_type is CommandTypes.DELETE:
             await self.handle_tip_delete(chosen_tip, location, response_method, user, channel)
         else:
-            await response_method.send(f"Unexpected error when modifying a tip: {command.command_type}")
+            await response_method.send(f"Unexpected error when modifying a tip: {command_type}")
 
     async def change_edit_page(self, reaction, awaiting_reaction, user):
         page_num = awaiting_reaction.page_num
@@ -475,22 +1081,15 @@ class Holocron:
             page_num -= 1
 
         awaiting_reaction.page_num = page_num
-        message = reaction.message
-        await message.clear_reactions()
 
-        all_tips = self.get_tips(awaiting_reaction.location)
+        location = self.get_location(awaiting_reaction.address, command_type=awaiting_reaction.command_type)
+        user_tips = await self.get_editable_tips(location, user, reaction.message.guild)
         index_low = (page_num - 1) * 5
         index_high = page_num * 5
 
-        if await check_higher_perms(user, reaction.message.guild):
-            user_tips = all_tips
-        else:
-            user_tips = list(filter(lambda each_tip: each_tip.user_id == reaction.message.author.id, all_tips))
-        sort_tips(user_tips)
-
         page_count = ((len(user_tips) - 1) // 5) + 1
-        tip_list = all_tips[index_low:index_high]
-        tip_messages = [f"Which tip would you like to {awaiting_reaction.mod_type}?"]
+        tip_list = user_tips[index_low:index_high]
+        tip_messages = [f"Which tip would you like to {awaiting_reaction.command_type.description()}?"]
         for index, tip in enumerate(tip_list):
             tip_messages.append(f"{index + 1}: {tip.create_selection_message()}")
 
@@ -504,12 +1103,9 @@ class Holocron:
         if page_num > 1:
             emoji_list.insert(0, "⬅️")
         tip_messages.append(f"Page {page_num}/{page_count}")
-        awaiting_reaction.allowed_emoji = emoji_list
-        awaiting_reaction.tips = tip_list
+        awaiting_reaction.choices = [tip.get_key() for tip in tip_list]
 
-        await reaction.message.edit(content="\n".join(tip_messages))
-        for emoji in emoji_list:
-            await reaction.message.add_reaction(emoji)
+        await update_menu(reaction, "\n".join(tip_messages), emoji_list)
 
     async def handle_view_group(self, chosen, location: HolocronLocation, response_method, user):
         # location has a group address
@@ -522,48 +1118,33 @@ class Holocron:
         return
 
     async def handle_tip_edit(self, tip, location, response_method, user, channel):
-        def check_message(message):
-            return message.channel.id == channel_id and message.author.id == user_id
-
-        channel_id = channel.id
-        user_id = user.id
         await user.send(tip.create_tip_message())
         await response_method.send("A message containing the tip has been sent to you. The content of that tip will "
                                    "update to the content of your next message in this channel. If you wish to cancel "
                                    "the edit, type `cancel`.")
-        tip_message = await self.bot.wait_for("message", check=check_message)
+        tip_message = await conversations.ask(channel.id, user.id)
 
-        if tip_message.content == "cancel":
+        if tip_message is None or tip_message.content == "cancel":
             feedback = "Edit cancelled. Tip will remain as it was."
             await response_method.send(feedback)
         else:
-            tip.content = tip_message.content
-            tip.edited = True
-            self.save_storage()
+            self.commit_change(TipJournal.EDIT, location, (tip.get_key(), tip_message.content))
 
             feedback = "Edit success.\n"
             feedback += f"{self.format_tips(location)}"
-            sent_message = await response_method.send(feedback)
-            await self.send_modifier_choices(user, sent_message, location)
+            await self.send_with_modifiers(response_method, user, feedback, location)
 
     async def handle_tip_delete(self, tip, location, response_method, user, channel):
-        def check_message(message):
-            return message.channel.id == channel_id and message.author.id == user_id
-
-        channel_id = channel.id
-        user_id = user.id
         await response_method.send(f"Are you sure you want to delete the tip:\n`{tip.create_delete_message()}`?\n\n"
                                    f"Please type `confirm` to confirm and permanently delete this tip, or `cancel` to "
                                    f"cancel.")
-        confirm_message = await self.bot.wait_for("message", check=check_message)
-        if confirm_message.content == "confirm":
-            self.get_tips(location).remove(tip)
+        confirm_message = await conversations.ask(channel.id, user.id)
+        if confirm_message is not None and confirm_message.content == "confirm":
+            self.commit_change(TipJournal.DELETE, location, (tip.get_key(),))
             feedback = "Tip deleted.\n"
             feedback += f"{self.format_tips(location)}"
-            self.save_storage()
 
-            sent_message = await response_method.send(feedback)
-            await self.send_modifier_choices(user, sent_message, location)
+            await self.send_with_modifiers(response_method, user, feedback, location)
         else:
             await response_method.send("Deletion canceled. Tip not deleted.")
 
@@ -572,24 +1153,31 @@ class Holocron:
             await response_method.send("Only Holocron Admins and Server admins can change author.")
             return
 
-        chosen_tip.author = new_author
-
         member_id = {member_obj.display_name: member_obj.id for member_obj in channel.members}.get(new_author)
         if not member_id:
             member_id = {member_obj.global_name: member_obj.id for member_obj in channel.members}.get(new_author)
-        chosen_tip.user_id = member_id
-        self.save_storage()
+        self.commit_change(TipJournal.REASSIGN, location, (chosen_tip.get_key(), new_author, member_id))
 
         feedback = "Author change successful.\n"
         feedback += f"{self.format_tips(location)}"
-        sent_message = await response_method.send(feedback)
-        await self.send_modifier_choices(user, sent_message, location)
-
-    @tasks.loop(time=datetime.time(hour=12))
-    async def clean_awaiting_reactions(self):
-        to_del = []
-        for message_id, awaiting in self.awaiting_reactions.items():
-            if (datetime.datetime.utcnow() - awaiting.creation_time).days >= 1:
-                to_del.append(message_id)
-        for message_id in to_del:
-            del self.awaiting_reactions[message_id]
+        await self.send_with_modifiers(response_method, user, feedback, location)
+
+    @tasks.loop(minutes=10)
+    async def compact_storage(self):
+        for shard in self.shards.loaded():
+            # sqlite shards write rows as changes happen and have no snapshot to fold a journal into
+            if shard.journal.record_count and not self.sqlite_store:
+                self.request_snapshot(shard)
+            if shard.stats is not None:
+                self.verify_stats(shard)
+            search_index = shard.search_index
+            if search_index is not None and search_index.needs_compaction():
+                # rebuilt on a thread, as it takes seconds for large indexes. tips changed meanwhile are replayed
+                frozen = search_index.begin_compaction()
+                try:
+                    compacted = await asyncio.get_running_loop().run_in_executor(None, SearchIndex.build_compacted,
+                                                                                 *frozen)
+                except BaseException:
+                    search_index.cancel_compaction()
+                    raise
+                search_index.finish_compaction(compacted)
@@ -0,0 +1,78 @@
+"""
+Description: the character dictionary of the counter holocron, canonical character ids with their names and
+nicknames, read from data/counter/characters.json.
+
+Squads are written freely, like `JMK/CAT/GK/Padme/Ahsoka Mirror` or `Jabba++`, so a squad is split on its separators
+and the words of each part are matched to names and nicknames, longest first. A part that is a single unknown word,
+like `Drogan`, is kept as its own id so it can still be looked up; unknown words in longer parts are dropped.
+"""
+import json
+import re
+
+characters_filepath = "data/counter/characters.json"
+
+separator_pattern = re.compile(r"[/,;|+&\n]")
+word_pattern = re.compile(r"[a-z0-9]+")
+# words written alongside characters in squads that are not characters themselves
+filler_words = frozenset(["any", "etc", "mirror", "other", "others", "lead", "squad", "team"])
+
+
+def normalize_words(text):
+    # hyphens and apostrophes join words, so C-3PO is c3po and Mand'alor is mandalor
+    return word_pattern.findall(text.lower().replace("-", "").replace("'", ""))
+
+
+class CharacterDictionary:
+    def __init__(self, characters: dict):
+        # character id -> display name, and normalized name or nickname -> character id
+        self.names = {}
+        self.lookup = {}
+        self.longest_name = 1
+        for character_id, entry in characters.items():
+            self.names[character_id] = entry["name"]
+            for name in [entry["name"], character_id, *entry.get("nicknames", [])]:
+                words = normalize_words(name)
+                self.lookup.setdefault(" ".join(words), character_id)
+                self.longest_name = max(self.longest_name, len(words))
+
+    @classmethod
+    def load(cls, filepath=characters_filepath):
+        try:
+            with open(filepath) as characters_file:
+                return cls(json.load(characters_file))
+        except FileNotFoundError:
+            return cls({})
+
+    def get_name(self, character_id):
+        return self.names.get(character_id, character_id)
+
+    def match_words(self, words, keep_unknown=True):
+        # character ids named by the words, matching the longest name at each position
+        found = []
+        position = 0
+        while position < len(words):
+            for span in range(min(self.longest_name, len(words) - position), 0, -1):
+                character_id = self.lookup.get(" ".join(words[position:position + span]))
+                if character_id:
+                    found.append(character_id)
+                    position += span
+                    break
+            else:
+                if keep_unknown and words[position] not in filler_words:
+                    found.append(words[position])
+                position += 1
+        return found
+
+    def parse_squad(self, squad: str) -> frozenset:
+        units = set()
+        for part in separator_pattern.split(squad):
+            words = normalize_words(part)
+            units.update(self.match_words(words, keep_unknown=len(words) == 1))
+        return frozenset(units)
+
+    def parse_query(self, query: str) -> list:
+        # every word of a query counts, known or not
+        units = []
+        for part in separator_pattern.split(query):
+            units.extend(unit for unit in self.match_words(normalize_words(part)) if unit not in units)
+        return units
@@ -11,6 +11,9 @@ class CommandTypes(Enum):
     MAP = 5
     STATS = 6
     LIST = 7
+    SEARCH = 8
+    WITH = 9
+    VS = 10
 
     # counter specific types
     SQUADS = 20
@@ -20,6 +23,8 @@ class CommandTypes(Enum):
     ADD_ALIAS = 31
     TAG = 35
 
+    ARCHIVE = 40
+
     # helper type
     ALL = 100
 
@@ -81,6 +86,10 @@ class CommandTypes(Enum):
             return True
         return False
 
+    def is_query_type(self):
+        # commands followed by free text rather than an address
+        return self in [self.SEARCH, self.WITH, self.VS]
+
     def is_allow_missing_type(self):
         if self in [self.ADD_SQUAD, self.EDIT_SQUAD]:
             return True
@@ -125,6 +134,12 @@ class HolocronCommand:
             return
 
         command_arg = user_inputs[0].lower()
+        if self.command_type and self.command_type.is_query_type():
+            # everything after search, with or vs is the query, including words that name commands
+            self.command_args.append(command_arg)
+            self.parse_command(*user_inputs[1:])
+            return
+
         found_command = CommandTypes.lookup(command_arg)
 
         if found_command and self.command_type is CommandTypes.HELP:
@@ -156,8 +171,9 @@ class HolocronCommand:
             return
 
         if self.command_type is CommandTypes.READ:
-            self.read_filters.append(self.command_args[0])
-            self._shift_args()
+            # filters combine, like an activity and owned units for counters
+            self.read_filters.extend(self.command_args)
+            self.command_args = []
 
         if self.command_type is CommandTypes.ADD:
             if len(self.command_args) > 1:
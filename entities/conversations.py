@@ -0,0 +1,54 @@
+"""
+Description: prompts waiting for a user's next message in a channel, like the text of a new tip or a confirmation.
+
+Prompts are kept by (channel id, user id), so each message the bot sees is one lookup rather than a check run by every
+waiting prompt. A prompt gives up after prompt_timeout seconds, and a new prompt to the same user in the same channel
+replaces the one before it.
+"""
+import asyncio
+import os
+
+import discord
+
+prompt_timeout = int(os.environ.get("HOLOCRON_PROMPT_TIMEOUT", "300"))
+
+
+class ConversationManager:
+    def __init__(self):
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    @property
+    def open_count(self):
+        return len(self.pending)
+
+    async def ask(self, channel_id, user_id, timeout=prompt_timeout) -> discord.Message | None:
+        # the user's next message in the channel, or None if they did not answer in time or were asked again
+        key = (channel_id, user_id)
+        self.cancel(channel_id, user_id)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            if self.pending.get(key) is future:
+                del self.pending[key]
+
+    def resolve(self, message: discord.Message):
+        future = self.pending.pop((message.channel.id, message.author.id), None)
+        if future is None or future.done():
+            return False
+        future.set_result(message)
+        return True
+
+    def cancel(self, channel_id, user_id):
+        future = self.pending.pop((channel_id, user_id), None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+
+conversations = ConversationManager()
@@ -1,21 +1,23 @@
-import datetime
-import uuid
+from entities.tip import Tip, Timestamped, intern_text
+from util.dateutils import utc_now_micros
+from util.storage.tip_list import TipList
 
-from entities.tip import Tip
 
+class Squad(Timestamped):
+    __slots__ = ("lead_id", "lead", "squad", "variants", "author", "user_id", "edited", "tips")
 
-class Squad:
+    interned_fields = ("lead_id", "author")
 
     def __init__(self, lead_id: str, lead: str, squad: str, variants=None, author="n/a", user_id=0):
-        self.lead_id = lead_id.lower()
+        self.lead_id = intern_text(lead_id.lower())
         self.lead = lead.title()
         self.squad = squad
         self.variants = variants or []
-        self.author = author
+        self.author = intern_text(author)
         self.user_id = user_id
         self.edited = False
-        self.creation_time = datetime.datetime.utcnow()
-        self.tips = []
+        self.creation_micros = utc_now_micros()
+        self.tips = TipList()
 
     def create_squad_header_message(self) -> str:
         return f"{self.lead} (`{self.lead_id}`)"
@@ -43,11 +45,14 @@ class Squad:
 
 
 class CounterTip(Tip):
+    __slots__ = ("squad", "activity")
+
+    interned_fields = ("author", "squad", "activity")
 
     def __init__(self, squad: str, content: str, activity=None, author="n/a", rating=0, user_id=0, edited=False):
         super().__init__(content=content, author=author, rating=rating, user_id=user_id)
-        self.squad = squad
-        self.activity: str = activity.upper() if activity else None
+        self.squad = intern_text(squad)
+        self.activity: str = intern_text(activity.upper()) if activity else None
         self.edited = edited
 
     def create_tip_message(self, rating=False):
@@ -57,6 +62,9 @@ class CounterTip(Tip):
             activity = f"\t[{self.activity}] "
         return f"**{self.squad}**\t{activity}\n\t {self.content} {edited}\t*(author: {self.author}*{rating})"
 
+    def get_search_text(self):
+        return f"{self.squad} {self.activity or ''} {self.content}"
+
     def to_json(self):
         out_json = super().to_json()
         out_json["squad"] = self.squad
@@ -64,14 +72,17 @@ class CounterTip(Tip):
         return out_json
 
 
-class Alias:
+class Alias(Timestamped):
+    __slots__ = ("alias", "squad_lead_id", "author", "user_id")
+
+    interned_fields = ("squad_lead_id", "author")
 
     def __init__(self, alias, squad_lead_id, author, user_id=None):
         self.alias = alias
-        self.squad_lead_id = squad_lead_id
-        self.author = author
+        self.squad_lead_id = intern_text(squad_lead_id)
+        self.author = intern_text(author)
         self.user_id = user_id
-        self.creation_time = datetime.datetime.utcnow()
+        self.creation_micros = utc_now_micros()
 
     def to_json(self):
         return {
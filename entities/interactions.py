@@ -1,18 +1,34 @@
-from datetime import datetime
-
-from entities.command_parser import HolocronCommand
-from entities.locations import HolocronLocation
+from entities.command_parser import CommandTypes
 
 
 class AwaitingReaction:
-    def __init__(self, user_id, allowed_emoji, tips, command: HolocronCommand, location: HolocronLocation, page_num=1):
-        self.user_id = user_id
-        self.allowed_emoji = allowed_emoji
-        self.tips = tips
-        self.command = command
-        self.location = location
+    """
+    State of a Holocron menu, kept with it in the menu registry. Holds what the menu offered by value, the keys of the
+    tips or the section ids to choose from, rather than the tips and locations themselves, so it stays small and can
+    be saved.
+    """
+    __slots__ = ("choices", "command_type", "address", "new_author", "page_num")
+
+    def __init__(self, choices, command_type: CommandTypes, address, new_author=None, page_num=1):
+        self.choices = choices
+        self.command_type = command_type
+        self.address = address
+        self.new_author = new_author
         self.page_num = page_num
-        self.creation_time = datetime.utcnow()
+
+    def to_json(self):
+        return {
+            "choices": self.choices,
+            "command_type": self.command_type.name,
+            "address": self.address,
+            "new_author": self.new_author,
+            "page_num": self.page_num,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["choices"], CommandTypes[data["command_type"]], data["address"], data["new_author"],
+                   data["page_num"])
 
     def __repr__(self):
-        return f"@{self.location}: {self.command.command_type.name}"
+        return f"@{self.address}: {self.command_type.name}"
@@ -0,0 +1,50 @@
+from collections import OrderedDict, namedtuple
+
+from entities.locations import InvalidLocationError
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "negative_hits", "misses", "size", "maxsize"])
+
+
+class LocationCache:
+    """
+    Least recently used parsed locations of one Holocron, keyed by (address, suffix, parse flags). Addresses that
+    failed to parse are kept too, with their error, so a repeated typo is answered without parsing again.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        # the cached location, or None on a miss. raises the cached error for invalid addresses
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        if isinstance(entry, InvalidLocationError):
+            self.negative_hits += 1
+            # a new error each time, so tracebacks do not pile up on the cached one
+            raise type(entry)(*entry.args)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.negative_hits, self.misses, len(self.entries), self.maxsize)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.negative_hits + self.misses
+        return (self.hits + self.negative_hits) / lookups if lookups else 0.0
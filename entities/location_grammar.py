@@ -0,0 +1,149 @@
+"""
+Description: address grammar of a Holocron, compiled from its base.json.
+
+Each section of base.json becomes a node selected by its tag (`tags` in base.json, or an alias given by the location
+class). A section with a `count` is followed by a number picking one of its entries, and a leaf without `count` or
+`tips` (like conquest nodes) by any number. A section with `tips` holds tips itself, and an untagged subsection (like
+the feats of a conquest boss) is selected by a number straight after its parent's tag.
+
+Addresses alternate letters and digits, e.g. `s1b2` is sector 1, boss, feat 2, and are matched in a single pass.
+Parsing never raises: the result records how far the address matched, and the location classes decide what that
+means and which error to show.
+"""
+import json
+import re
+from functools import cache
+
+address_fragments = re.compile("(\\d+)")
+
+
+def split_address(address):
+    # text runs at even indices (possibly empty) and digit runs at odd ones, in one pass of the compiled pattern
+    return address_fragments.split(address)
+
+
+class GrammarNode:
+    __slots__ = ("section", "tag", "count", "tips", "children", "untagged", "is_numbered")
+
+    def __init__(self, section, tag, count, tips):
+        self.section = section
+        self.tag = tag
+        self.count = count
+        self.tips = tips
+        # tag -> node
+        self.children = {}
+        # the subsection selected by a number directly after this node's tag
+        self.untagged = None
+        # counted sections, and leaves whose numbered entries are created on first use. set once compiled
+        self.is_numbered = False
+
+
+class GrammarStep:
+    __slots__ = ("node", "tag", "section", "number")
+
+    def __init__(self, node, number=None):
+        self.node = node
+        self.tag = node.tag
+        self.section = node.section
+        # digits as written, None when the address stops before the number
+        self.number = number
+
+
+class ParsedAddress:
+    __slots__ = ("fragments", "steps", "next_fragment", "invalid_number")
+
+    def __init__(self, fragments):
+        self.fragments = fragments
+        self.steps = []
+        # index of the first fragment that was not matched
+        self.next_fragment = 0
+        # the first step whose number is out of range for its section, if any
+        self.invalid_number = None
+
+    @property
+    def unmatched(self):
+        return "".join(self.fragments[self.next_fragment:])
+
+    @property
+    def is_complete(self):
+        # the address names a list of tips: a numbered entry of a leaf, or a section holding tips itself
+        if not self.steps or self.invalid_number:
+            return False
+        last = self.steps[-1]
+        if last.number is not None:
+            return not last.node.children and last.node.untagged is None
+        return last.node.tips
+
+    @property
+    def storage_path(self):
+        # keys from the holocron's storage root to the addressed tips or group
+        path = []
+        for step in self.steps:
+            path.append(step.section)
+            if step.number is not None:
+                path.append(int(step.number))
+        if self.steps and self.steps[-1].number is None and self.steps[-1].node.tips:
+            path.append("tips")
+        return path
+
+
+class LocationGrammar:
+    """
+    Table-driven parser for one Holocron's addresses.
+    """
+
+    def __init__(self, config: dict, aliases=None):
+        self.root = GrammarNode(None, None, 0, False)
+        self.compile(self.root, config, aliases or {})
+
+    @classmethod
+    @cache
+    def load(cls, holocron_name, aliases: tuple = ()):
+        # compiled once per Holocron. aliases are (section, tag) pairs for sections without tags in base.json
+        with open(f"data/{holocron_name}/base.json") as config_file:
+            return cls(json.load(config_file), dict(aliases))
+
+    def compile(self, parent: GrammarNode, config: dict, aliases: dict):
+        for section, section_config in config.items():
+            tag = section_config.get("tags", aliases.get(section))
+            node = GrammarNode(section, tag, section_config.get("count", 0), section_config.get("tips", False))
+            self.compile(node, section_config.get("subs", {}), aliases)
+            node.is_numbered = bool(node.count) or (not node.tips and not node.children and node.untagged is None)
+            if tag:
+                parent.children[tag] = node
+            else:
+                parent.untagged = node
+
+    def parse(self, address) -> ParsedAddress:
+        fragments = split_address(address)
+        parsed = ParsedAddress(fragments)
+        steps = parsed.steps
+        node = self.root
+        index = 0
+        while True:
+            # text fragments select a subsection by tag. an empty one ends the address, or starts it with a number.
+            # split addresses always end with a text fragment, so a number is never the last fragment
+            node = node.children.get(fragments[index])
+            if node is None:
+                break
+            step = GrammarStep(node)
+            steps.append(step)
+            index += 1
+            if index == len(fragments):
+                break
+
+            number = fragments[index]
+            if not node.is_numbered:
+                node = node.untagged
+                if node is None or not node.is_numbered:
+                    break
+                step = GrammarStep(node)
+                steps.append(step)
+            step.number = number
+            # canonical numbers only, so `s01` is not another name for `s1`
+            if node.count and parsed.invalid_number is None and (number[0] == "0" or int(number) > node.count):
+                parsed.invalid_number = step
+            index += 1
+
+        parsed.next_fragment = index
+        return parsed
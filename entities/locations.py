@@ -1,7 +1,12 @@
-import re
+from entities.location_grammar import LocationGrammar
 
 
 class HolocronLocation:
+    # data/<grammar_name>/base.json describes the address grammar. aliases are (section, tag) pairs for the sections
+    # base.json gives no tag
+    grammar_name = None
+    grammar_aliases = ()
+    suffix_lookup = {}
 
     def __init__(self, location_string, suffix, labels):
         self.address = location_string
@@ -9,6 +14,39 @@ class HolocronLocation:
         self.labels = labels
         self.is_group_location = False
         self.is_mid_level_location = False
+        # set by grammar based parsing
+        self.parsed = None
+
+    def freeze(self):
+        # cached and table locations are shared between commands and guilds, so they refuse changes once parsed
+        object.__setattr__(self, "frozen", True)
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get("frozen"):
+            raise AttributeError(f"Location `{self.address}` is shared and cannot be changed")
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.address == other.address and \
+            self.is_group_location == other.is_group_location
+
+    def __hash__(self):
+        return hash((type(self), self.address, self.is_group_location))
+
+    @property
+    def storage_path(self):
+        # storage keys from the root of tip storage, for grammar parsed locations
+        return self.parsed.storage_path if self.parsed else None
+
+    @classmethod
+    def get_grammar(cls) -> LocationGrammar:
+        return LocationGrammar.load(cls.grammar_name, cls.grammar_aliases)
+
+    def apply_suffix(self):
+        # suffixes come from group listings, as storage keys (`feats`) or tags (`f`)
+        if self.suffix:
+            self.suffix = self.suffix_lookup.get(self.suffix, self.suffix)
+            self.address += self.suffix
 
     def get_location_name(self) -> str:
         # a name for the address for clean user interactions
@@ -39,6 +77,10 @@ class HolocronLocation:
         # used when viewing groups if the group itself has tips
         raise NotImplementedError
 
+    def get_storage_address(self) -> str:
+        # canonical address used when persisting changes to this location
+        return self.address
+
     def __repr__(self):
         return self.address
 
@@ -100,6 +142,8 @@ class ConquestLocation(HolocronLocation):
 
     suffix_lookup = {name: type_id for type_id, name in tip_types.items()}
 
+    grammar_name = "conquest"
+
     def get_location_name(self) -> str:
         loc_name = self.conquest_labels[self.feat_location_id]
         if self.is_sector_location:
@@ -137,6 +181,14 @@ class ConquestLocation(HolocronLocation):
     def has_group_tips(self):
         return self.is_boss_location and self.is_group_location
 
+    def get_storage_address(self):
+        # parsed back together, so `s1n01` and `s1n1` are journaled and indexed as the same address
+        if not self.is_sector_location:
+            return f"g{self.feat_address}"
+        if self.feat_address is None:
+            return f"s{self.sector_address}{self.sector_node_type_id}"
+        return f"s{self.sector_address}{self.sector_node_type_id}{self.feat_address}"
+
     def get_address_type_name(self):
         if self.is_mid_level_location and self.sector_id:
             return f"location in Sector {self.sector_id}"
@@ -149,77 +201,60 @@ class ConquestLocation(HolocronLocation):
             # this makes me angry
             raise NotImplementedError
 
-        if self.suffix:
-            self.suffix = self.suffix_lookup.get(self.suffix, self.suffix)
-            self.address += self.suffix
-
-        location_fragments = re.split('(\\d+)', self.address)
+        self.apply_suffix()
+        parsed = self.parsed = self.get_grammar().parse(self.address)
 
-        try:
-            self.feat_location_id = location_fragments[0]
-            self.feat_location_address = self.feat_locations[self.feat_location_id]
-        except (IndexError, KeyError):
+        if not parsed.steps:
             msg_data = [f"* `{feat_location_id}` for `{self.conquest_labels[feat_location_id]}`"
                         for feat_location_id in self.feat_locations]
             msg = '\n'.join(msg_data)
             raise InvalidLocationError(f"Invalid or missing location. Tip addresses must start with:\n{msg}")
 
+        location_step, *sector_steps = parsed.steps
+        self.feat_location_id = location_step.tag
+        self.feat_location_address = location_step.section
+
         if self.feat_location_id == 'g':
-            try:
-                self.feat_id = location_fragments[1]
-                self.feat_address = int(self.feat_id)
-            except IndexError:  # called if location_fragments[1] dne
+            if location_step.number is None:
                 self.is_group_location = True
                 return
-            except ValueError:  # called if feat_id not an int
-                raise InvalidLocationError("The character following `g` must be a number.")
+            if parsed.invalid_number:
+                raise InvalidLocationError("The number following `g` must be a valid feat #")
+            self.feat_id = location_step.number
+            self.feat_address = int(self.feat_id)
+            return
 
+        self.is_sector_location = True
+        if location_step.number is None:
+            self.is_group_location = True
+            self.is_mid_level_location = True
             return
+        if parsed.invalid_number is location_step:
+            raise InvalidLocationError("The number following `s` must be a valid Sector #.")
+        self.sector_id = location_step.number
+        self.sector_address = int(self.sector_id)
 
-        if self.feat_location_id == 's':
-            self.is_sector_location = True
-            try:
-                self.sector_id = location_fragments[1]
-                self.sector_address = int(self.sector_id)
-            except IndexError:  # called if location_fragments[1] dne
-                self.is_group_location = True
-                self.is_mid_level_location = True
-                return
-                # raise InvalidLocationError("The character following `s` for sectors must be a number indicating which "
-                #                            "sector to query.")
-            except ValueError:  # called if sector_id not an int
-                raise InvalidLocationError("The character following `s` must be a number.")
-
-            if f"s{self.sector_id}f1" not in self.labels:
-                # not the best test but trying to avoid having to access tip_storage
-                raise InvalidLocationError("The number following `s` must be a valid Sector #.")
-
-            try:
-                self.sector_node_type_id = location_fragments[2]
-                self.sector_node_type_address = self.tip_types[self.sector_node_type_id]
-            except (IndexError, KeyError):
-                self.is_group_location = True
-                self.is_mid_level_location = True
-                return
-                # raise InvalidLocationError(f"The character following `{self.sector_id}` must be `b` for boss tips,"
-                #                            f"`m` for miniboss tips, `n` for node tips, or `f` for sector feats.")
-
-            self.is_boss_location = self.sector_node_type_id in self.boss_types
-            try:
-                self.feat_id = location_fragments[3]
-                self.feat_address = int(location_fragments[3])
-            except IndexError:  # location[3] dne, do standard tips
-                self.is_group_location = True
-                return
-            except ValueError:  # called if location[3] not an int
-                raise InvalidLocationError(f"The character following `{self.sector_node_type_id}` "
-                                           f"must be a number indicating which feat to query.")
+        if not sector_steps:
+            # anything but a known node type lists the sector
+            self.is_group_location = True
+            self.is_mid_level_location = True
+            return
 
-            if not self.is_group_location and self.sector_node_type_id != 'n' and self.address not in self.labels:
-                raise InvalidLocationError(f"The number following `{self.sector_node_type_id}` "
-                                           f"must be a valid feat #")
+        self.sector_node_type_id = sector_steps[0].tag
+        self.sector_node_type_address = sector_steps[0].section
+        self.is_boss_location = self.sector_node_type_id in self.boss_types
 
+        feat_step = sector_steps[-1]
+        if feat_step.number is None:
+            self.is_group_location = True
             return
+        self.feat_id = feat_step.number
+        self.feat_address = int(self.feat_id)
+
+        # nodes are numbered freely, anything else has to be a feat with a label
+        if self.sector_node_type_id != 'n' and (parsed.invalid_number or parsed.unmatched):
+            raise InvalidLocationError(f"The number following `{self.sector_node_type_id}` "
+                                       f"must be a valid feat #")
 
 
 class RiseLocation(HolocronLocation):
@@ -257,6 +292,16 @@ class RiseLocation(HolocronLocation):
 
     suffix_lookup = {name: type_id for type_id, name in missions.items()}
 
+    grammar_name = "rise"
+    grammar_aliases = tuple((name, track_id) for track_id, name in tracks.items()) + tuple(suffix_lookup.items())
+
+    def apply_suffix(self):
+        super().apply_suffix()
+        if self.suffix == 'sm':
+            # currently sm1s are special case and only 1 per planet
+            self.suffix = 'sm1'
+            self.address += '1'
+
     def get_address_type_name(self):
         if self.is_group_location:
             title = self.get_tip_title()
@@ -304,35 +349,25 @@ class RiseLocation(HolocronLocation):
 
     def parse_location(self, is_map=False, is_group=False, **kwargs):
         # parses the location address and raises errors if the address is invalid
-        if self.suffix:
-            self.suffix = self.suffix_lookup.get(self.suffix, self.suffix)
-            if self.suffix == 'sm':
-                # currently sm1s are special case and only 1 per planet
-                self.suffix = 'sm1'
-            self.address += self.suffix
+        self.apply_suffix()
+        parsed = self.parsed = self.get_grammar().parse(self.address)
 
-        location_fragments = re.split('(\\d+)', self.address)
-        self.track_id = location_fragments[0]
-
-        try:
-            self.track_address = self.tracks[self.track_id]
-        except (IndexError, KeyError):
+        if not parsed.steps:
             msg_data = [f"* `{track_id}` for `{self.labels[track_id]['name']}`"
                         for track_id in self.tracks]
             msg = '\n'.join(msg_data)
             raise InvalidLocationError(f"Invalid or missing location. Queries to tips must start with:\n{msg}")
 
-        try:
-            planet_num = location_fragments[1]
-            self.planet_id = self.track_id + planet_num
-            self.planet_address = int(planet_num)
-        except IndexError:
+        track_step, *planet_steps = parsed.steps
+        self.track_id = track_step.tag
+        self.track_address = track_step.section
+
+        if track_step.number is None:
             self.is_group_location = True
             self.is_mid_level_location = True
             return
-        except (ValueError, TypeError):
-            raise InvalidLocationError("The character following your side must be a number identifying "
-                                       "which planet to query.")
+        self.planet_id = self.track_id + track_step.number
+        self.planet_address = int(track_step.number)
 
         if self.planet_id not in self.labels[self.track_id]:
             raise LocationDisabledError("The number following track must be between 1 and 3 (inclusive). "
@@ -342,11 +377,8 @@ class RiseLocation(HolocronLocation):
         if is_map:
             return
 
-        try:
-            self.mission_type_id = location_fragments[2]
-            self.mission_type_address = self.missions[self.mission_type_id]
-        except (KeyError, TypeError):
-            if not location_fragments[2]:
+        if not planet_steps:
+            if not parsed.unmatched:
                 self.is_group_location = True
                 return
             msg_data = [f"* `{mission_id}` for `{mission_label}`, "
@@ -354,14 +386,18 @@ class RiseLocation(HolocronLocation):
             msg = '\n'.join(msg_data)
             raise InvalidLocationError(f"Characters following planet number must be:\n{msg}")
 
+        mission_step = planet_steps[0]
+        self.mission_type_id = mission_step.tag
+        self.mission_type_address = mission_step.section
+
         self.mission_id = ''
-        try:
-            if self.mission_type_id in ['cm']:
-                self.mission_id = location_fragments[3]
-                self.mission_address = int(self.mission_id)
-        except (IndexError, ValueError, TypeError):
-            raise InvalidLocationError("Combat missions require numbers indicating which mission to query. Combat "
-                                       "missions are numbered from left to right. Use `map` for a visual reference.")
+        if self.mission_type_id in ['cm']:
+            if mission_step.number is None:
+                raise InvalidLocationError("Combat missions require numbers indicating which mission to query. "
+                                           "Combat missions are numbered from left to right. Use `map` for a visual "
+                                           "reference.")
+            self.mission_id = mission_step.number
+            self.mission_address = int(self.mission_id)
 
         if not is_group and self.address not in self.labels[self.track_id][self.planet_id]:
             raise InvalidLocationError("The address for your mission is not valid. "
@@ -387,12 +423,13 @@ class CounterLocation(HolocronLocation):
     def get_tip_title(self):
         return self.actual_squad_lead_id
 
+    def get_storage_address(self):
+        return self.actual_squad_lead_id
+
     def check_activity(self, read_filters):
-        try:
-            if read_filters[0].upper() in self.valid_activities:
-                return read_filters[0].upper()
-        except (IndexError, ValueError, TypeError):
-            pass
+        for read_filter in read_filters or []:
+            if read_filter.upper() in self.valid_activities:
+                return read_filter.upper()
 
         return None
 
@@ -408,3 +445,50 @@ class CounterLocation(HolocronLocation):
                 raise InvalidLocationError(f"Squad Leader not found: '{self.squad_lead_id}'")
 
         return
+
+
+class GrammarLocation(HolocronLocation):
+    """
+    Location for a Holocron whose addresses need nothing beyond its base.json, with names from labels.json keyed by
+    address. A new mode uses GrammarLocation.for_holocron(name) instead of a Location subclass of its own.
+    """
+
+    @classmethod
+    def for_holocron(cls, holocron_name, aliases=()):
+        return type(f"{holocron_name.title()}Location", (cls,), {"grammar_name": holocron_name,
+                                                                 "grammar_aliases": tuple(aliases)})
+
+    def get_location_name(self) -> str:
+        return f"{self.labels.get(self.address, self.address)} (`{self.address}`)"
+
+    def get_address_type_name(self) -> str:
+        return self.parsed.steps[-1].section
+
+    def get_tip_title(self) -> str:
+        return self.labels.get(self.address, self.address)
+
+    def get_detail(self) -> str:
+        return self.labels.get(self.address, "")
+
+    def has_group_tips(self) -> bool:
+        return self.is_group_location and self.parsed.steps[-1].node.tips
+
+    def parse_location(self, **kwargs):
+        self.apply_suffix()
+        self.parsed = self.get_grammar().parse(self.address)
+
+        if not self.parsed.steps:
+            msg = '\n'.join(f"* `{tag}` for `{node.section}`"
+                             for tag, node in self.get_grammar().root.children.items())
+            raise InvalidLocationError(f"Invalid or missing location. Tip addresses must start with:\n{msg}")
+
+        step = self.parsed.invalid_number
+        if step:
+            raise InvalidLocationError(f"The number following `{step.tag or self.parsed.steps[-2].tag}` "
+                                       f"must be between 1 and {step.node.count}.")
+        if self.parsed.unmatched:
+            raise InvalidLocationError(f"`{self.parsed.unmatched}` is not part of a valid address.")
+
+        if not self.parsed.is_complete:
+            self.is_group_location = True
+            self.is_mid_level_location = bool(self.parsed.steps[-1].node.children)
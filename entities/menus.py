@@ -0,0 +1,240 @@
+"""
+Description: menus of emoji choices, shown either as reactions or as buttons depending on the guild's Menu Style.
+
+Reaction menus cost one api call for the message and one per emoji, and paging clears and re-adds them all. Button
+menus arrive with their message, and a page change is a single edit. Every waiting menu is kept in menu_registry by
+message id, and both the reaction router and button presses hand a choice only to the handler that sent the menu.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+
+import discord
+from discord.ext import commands
+
+from entities.interactions import AwaitingReaction
+from util.settings.menu_style_handler import get_menu_style
+from util.storage.guild_shards import current_guild_id, guild_key
+
+# buttons stay usable as long as reaction menus are kept waiting
+menu_timeout = 24 * 60 * 60
+# the most menus kept waiting at once, the oldest are dropped first past it
+max_menus = int(os.environ.get("HOLOCRON_MAX_MENUS", "10000"))
+# buttons are found by their custom id, which survives a restart where the view that sent them does not
+button_id_prefix = "holocron-menu:"
+# menu states that can be saved, by type name
+saved_state_types = {AwaitingReaction.__name__: AwaitingReaction}
+
+
+class MenuChoice:
+    """
+    An emoji picked from a menu, by reacting or with a button. Has the message and emoji a discord.Reaction has.
+    """
+
+    def __init__(self, message, emoji, interaction: discord.Interaction = None):
+        self.message = message
+        self.emoji = emoji
+        self.interaction = interaction
+
+    async def acknowledge(self):
+        # a button press has to be answered, even when it leads to nothing or to new messages instead of an edit
+        if self.interaction is not None and not self.interaction.response.is_done():
+            await self.interaction.response.defer()
+
+
+class MenuEntry:
+    __slots__ = ("user_id", "allowed_emoji", "handler", "state", "expiry")
+
+    def __init__(self, user_id, allowed_emoji, handler, state, expiry):
+        self.user_id = user_id
+        self.allowed_emoji = allowed_emoji
+        # coroutine function called as handler(choice, user, state), or the (cog name, method name) of a restored menu
+        self.handler = handler
+        self.state = state
+        self.expiry = expiry
+
+
+def handler_reference(handler):
+    # cog methods can be found again after a restart, anything else only lives as long as the process
+    owner = getattr(handler, "__self__", None)
+    if isinstance(owner, commands.Cog):
+        return owner.qualified_name, handler.__name__
+    return None
+
+
+class MenuRegistry:
+    """
+    Menus waiting for a choice, by message id. Only the user a menu was sent to can choose from it, and only the
+    emoji it currently offers.
+
+    Every menu waits the same time, so entries are kept in the order they were sent and expire from the front, a few
+    at a time as new menus arrive. Past max_entries the oldest are dropped early. Cog menus with savable state can be
+    written to a file and read back after a restart.
+    """
+
+    def __init__(self, max_entries=max_menus, ttl=menu_timeout):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # set by the reaction router, to find the cogs of restored menus
+        self.bot = None
+        self.changed = False
+
+    def register(self, message_id, user_id, allowed_emoji, handler, state=None):
+        self.drop_expired()
+        self.entries[message_id] = MenuEntry(user_id, allowed_emoji, handler, state, time.time() + self.ttl)
+        self.entries.move_to_end(message_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.changed = True
+
+    def remove(self, message_id):
+        if self.entries.pop(message_id, None) is not None:
+            self.changed = True
+
+    def match(self, message_id, user_id, emoji) -> MenuEntry | None:
+        entry = self.entries.get(message_id)
+        if entry is None or entry.user_id != user_id or emoji not in entry.allowed_emoji:
+            return None
+        if entry.expiry <= time.time():
+            self.remove(message_id)
+            return None
+        return entry
+
+    def set_allowed_emoji(self, message_id, allowed_emoji):
+        entry = self.entries.get(message_id)
+        if entry is not None:
+            entry.allowed_emoji = allowed_emoji
+            self.changed = True
+
+    def resolve_handler(self, entry: MenuEntry):
+        if not isinstance(entry.handler, tuple):
+            return entry.handler
+        cog_name, handler_name = entry.handler
+        cog = self.bot.get_cog(cog_name) if self.bot is not None else None
+        handler = getattr(cog, handler_name, None)
+        if handler is not None:
+            entry.handler = handler
+        return handler
+
+    async def dispatch(self, entry: MenuEntry, choice: MenuChoice, user):
+        handler = self.resolve_handler(entry)
+        if handler is None:
+            return
+        current_guild_id.set(guild_key(choice.message.guild))
+        await handler(choice, user, entry.state)
+        # handlers keep their place in the state, like the page shown
+        self.changed = True
+
+    def drop_expired(self):
+        now = time.time()
+        while self.entries:
+            message_id, entry = next(iter(self.entries.items()))
+            if entry.expiry > now:
+                break
+            self.entries.popitem(last=False)
+            self.changed = True
+
+    def save(self, filepath):
+        records = []
+        for message_id, entry in self.entries.items():
+            handler = handler_reference(entry.handler) if not isinstance(entry.handler, tuple) else entry.handler
+            if handler is None:
+                continue
+            if entry.state is None:
+                state = None
+            elif type(entry.state).__name__ in saved_state_types:
+                state = [type(entry.state).__name__, entry.state.to_json()]
+            else:
+                continue
+            records.append({
+                "message_id": message_id,
+                "user_id": entry.user_id,
+                "allowed_emoji": entry.allowed_emoji,
+                "handler": handler,
+                "state": state,
+                "expiry": entry.expiry,
+            })
+
+        temp_filepath = f"{filepath}.tmp"
+        with open(temp_filepath, "w", encoding="utf-8") as menu_file:
+            json.dump(records, menu_file)
+        os.replace(temp_filepath, filepath)
+        self.changed = False
+
+    def load(self, filepath):
+        if not os.path.exists(filepath):
+            return
+        with open(filepath, encoding="utf-8") as menu_file:
+            records = json.load(menu_file)
+
+        now = time.time()
+        for record in records:
+            if record["expiry"] <= now or record["message_id"] in self.entries:
+                continue
+            state = record["state"]
+            if state is not None:
+                state_type, state_data = state
+                state = saved_state_types[state_type].from_json(state_data)
+            self.entries[record["message_id"]] = MenuEntry(record["user_id"], record["allowed_emoji"],
+                                                           tuple(record["handler"]), state, record["expiry"])
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+menu_registry = MenuRegistry()
+
+
+class ChoiceView(discord.ui.View):
+    # only shows the buttons, presses are handled by press_button. each view is stopped once sent, so discord.py's
+    # view store does not hold it and its timeout for the life of the menu
+    def __init__(self, emoji_list):
+        super().__init__(timeout=menu_timeout)
+        for emoji in emoji_list:
+            self.add_item(discord.ui.Button(emoji=emoji, style=discord.ButtonStyle.secondary,
+                                            custom_id=f"{button_id_prefix}{emoji}"))
+
+
+async def press_button(interaction: discord.Interaction):
+    custom_id = (interaction.data or {}).get("custom_id", "")
+    if not custom_id.startswith(button_id_prefix):
+        return
+
+    emoji = custom_id[len(button_id_prefix):]
+    choice = MenuChoice(interaction.message, emoji, interaction)
+    entry = menu_registry.match(interaction.message.id, interaction.user.id, emoji)
+    if entry is not None:
+        await menu_registry.dispatch(entry, choice, interaction.user)
+    await choice.acknowledge()
+
+
+async def send_menu(response_method, content, emoji_list, user_id, handler, state=None):
+    # the menu is registered before any reaction can be added to it
+    if get_menu_style(current_guild_id.get()) == "buttons":
+        view = ChoiceView(emoji_list)
+        sent_message = await response_method.send(content, view=view)
+        view.stop()
+        menu_registry.register(sent_message.id, user_id, emoji_list, handler, state)
+        return sent_message
+
+    sent_message = await response_method.send(content)
+    menu_registry.register(sent_message.id, user_id, emoji_list, handler, state)
+    for emoji in emoji_list:
+        await sent_message.add_reaction(emoji)
+    return sent_message
+
+
+async def update_menu(choice: MenuChoice, content, emoji_list):
+    # replaces the menu a choice was made on, answering its button press with the edit
+    menu_registry.set_allowed_emoji(choice.message.id, emoji_list)
+    if choice.interaction is not None:
+        view = ChoiceView(emoji_list)
+        await choice.interaction.response.edit_message(content=content, view=view)
+        view.stop()
+        return
+
+    await choice.message.clear_reactions()
+    await choice.message.edit(content=content)
+    for emoji in emoji_list:
+        await choice.message.add_reaction(emoji)
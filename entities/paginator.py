@@ -0,0 +1,111 @@
+from entities.menus import MenuChoice, send_menu, update_menu
+
+# longest message discord accepts
+message_limit = 2000
+# room kept on every page for its "Page n/m" footer
+footer_size = 24
+
+
+class Paginator:
+    """
+    Pages of a long response, built from an iterable of lines as they are first shown. Pages end on line boundaries
+    within the message limit (lines longer than a page are split), and after page_size lines when given. Pages past
+    the first are served on demand when the user picks ⬅️ or ➡️ from the page's menu.
+    """
+
+    def __init__(self, user_id, lines, title="", page_size=None, limit=message_limit):
+        self.user_id = user_id
+        self.title = title
+        self.page_size = page_size
+        self.line_budget = limit - footer_size - (len(title) + 1 if title else 0)
+        self.lines = self.split_lines(lines)
+        # a line read past the end of the last built page, None once the lines run out
+        self.pending = None
+        self.exhausted = False
+        self.pages = []
+        self.page_num = 1
+
+    def split_lines(self, lines):
+        for line in lines:
+            while len(line) > self.line_budget:
+                yield line[:self.line_budget]
+                line = line[self.line_budget:]
+            yield line
+
+    def next_line(self):
+        if self.pending is not None:
+            line, self.pending = self.pending, None
+            return line
+        return next(self.lines, None)
+
+    def build_page(self):
+        page_lines = []
+        size = 0
+        while self.page_size is None or len(page_lines) < self.page_size:
+            line = self.next_line()
+            if line is None:
+                break
+            if page_lines and size + len(line) + 1 > self.line_budget:
+                self.pending = line
+                break
+            page_lines.append(line)
+            size += len(line) + 1
+        self.pages.append(page_lines)
+
+        # look ahead one line, so the last page is known as soon as it is built
+        if self.pending is None:
+            self.pending = next(self.lines, None)
+        self.exhausted = self.pending is None
+
+    def get_page_lines(self, page_num):
+        while len(self.pages) < page_num and not self.exhausted:
+            self.build_page()
+        return self.pages[page_num - 1] if page_num <= len(self.pages) else []
+
+    def has_next_page(self):
+        self.get_page_lines(self.page_num)
+        return self.page_num < len(self.pages) or not self.exhausted
+
+    @property
+    def is_single_page(self):
+        return self.page_num == 1 and not self.has_next_page()
+
+    def format_page(self):
+        output = [self.title] if self.title else []
+        output.extend(self.get_page_lines(self.page_num))
+        if not self.is_single_page:
+            page_count = f"/{len(self.pages)}" if self.exhausted else ""
+            output.append(f"Page {self.page_num}{page_count}")
+        return "\n".join(output)
+
+    def get_emoji(self):
+        emoji_list = []
+        if self.page_num > 1:
+            emoji_list.append("⬅️")
+        if self.has_next_page():
+            emoji_list.append("➡️")
+        return emoji_list
+
+
+def split_message(text, limit=message_limit):
+    # whole messages on line boundaries, for responses sent at once rather than paged
+    paginator = Paginator(None, text.split("\n"), limit=limit + footer_size)
+    messages = []
+    while not messages or paginator.has_next_page():
+        if messages:
+            paginator.page_num += 1
+        messages.append("\n".join(paginator.get_page_lines(paginator.page_num)))
+    return messages
+
+
+async def send_pages(response_method, paginator: Paginator):
+    # sends the first page, with a menu for the others if there are more to show
+    if paginator.is_single_page:
+        return await response_method.send(paginator.format_page())
+    return await send_menu(response_method, paginator.format_page(), paginator.get_emoji(), paginator.user_id,
+                           turn_page, paginator)
+
+
+async def turn_page(choice: MenuChoice, user, paginator: Paginator):
+    paginator.page_num += 1 if choice.emoji == "➡️" else -1
+    await update_menu(choice, paginator.format_page(), paginator.get_emoji())
@@ -1,17 +1,85 @@
+import sys
 from datetime import datetime
 
 import discord
 
+from util.dateutils import datetime_to_epoch_micros, epoch_micros_to_datetime, utc_now_micros, discord_timestamp
+
+
+def intern_text(value):
+    # authors, squads and activities repeat across many tips, so they share one string object each
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Timestamped:
+    """
+    Base for the slotted storage entities. The creation time is stored as integer microseconds since the epoch and
+    exposed as a naive utc datetime. Pickles of the old dict based entities still load through __setstate__.
+    """
+    __slots__ = ("creation_micros",)
+
+    # fields interned when restored, and slots never pickled (sqlite row ids belong to the database they came from)
+    interned_fields = ()
+    transient_slots = ("row_id", "__weakref__")
+
+    @property
+    def creation_time(self) -> datetime:
+        return epoch_micros_to_datetime(self.creation_micros)
+
+    @creation_time.setter
+    def creation_time(self, moment: datetime):
+        self.creation_micros = datetime_to_epoch_micros(moment)
+
+    @classmethod
+    def state_slots(cls):
+        slots = []
+        for klass in reversed(cls.__mro__):
+            slots.extend(slot for slot in klass.__dict__.get("__slots__", ()) if slot not in cls.transient_slots)
+        return slots
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.state_slots() if hasattr(self, slot)}
+
+    def __setstate__(self, state):
+        if isinstance(state, tuple):
+            # default slot pickling, (dict state, slot state)
+            state = {**(state[0] or {}), **(state[1] or {})}
+        else:
+            state = dict(state)
+
+        creation_time = state.pop("creation_time", None)
+        if creation_time is not None:
+            # pickled before timestamps were stored as integers
+            state["creation_micros"] = datetime_to_epoch_micros(creation_time)
+        for field in self.interned_fields:
+            if field in state:
+                state[field] = intern_text(state[field])
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class Tip(Timestamped):
+    __slots__ = ("content", "author", "rating", "user_id", "edited", "row_id", "__weakref__")
+
+    interned_fields = ("author",)
+    # creation time of the newest tip made by this process. the creation time is the tip's key, so tips made within
+    # the same microsecond are pushed apart
+    last_creation_micros = 0
 
-class Tip:
     def __init__(self, content="", author="n/a", rating=0, user_id=0):
         self.content = content
-        self.author = author
+        self.author = intern_text(author)
         self.rating = rating
         self.user_id = user_id
-        self.creation_time = datetime.utcnow()
+        self.creation_micros = Tip.next_creation_micros()
         self.edited = False
 
+    @staticmethod
+    def next_creation_micros():
+        micros = Tip.last_creation_micros = max(utc_now_micros(), Tip.last_creation_micros + 1)
+        return micros
+
     def _create_tip_message_info(self, rating=False):
         edited = "" if not self.edited else " *(edited)*"
         rating = "" if not rating else " *({0:+})*".format(self.rating)
@@ -31,52 +99,16 @@ class Tip:
         return f"{self.author}: {self.content[:50]}"
 
     def get_elapsed_time(self):
-        def plural(number):
-            return '' if number == 1 else 's'
-
-        present = datetime.utcnow()
-        elapsed_timedelta = present - self.creation_time
-
-        if elapsed_timedelta.days >= 365:
-            return "more than 1 year ago"
-
-        months = elapsed_timedelta.days // 30.5
-        days = elapsed_timedelta.days
-        seconds = elapsed_timedelta.seconds
-        minutes = seconds // 60
-        hours = minutes // 60
-
-        if months > 0:
-            will_round = (days // 15.25) % 2
-            if will_round:
-                return f"{months + 1} month{plural(months)} ago"
-            else:
-                return f"{months} month{plural(months)} ago"
-
-        elif days > 0:
-            will_round = (hours // 12) % 2
-            if will_round:
-                return f"{days + 1} day{plural(days)} ago"
-            else:
-                return f"{days} day{plural(days)} ago"
-
-        elif hours > 0:
-            will_round = (minutes // 30) % 2
-            if will_round:
-                return f"{hours + 1} hour{plural(hours)} ago"
-            else:
-                return f"{hours} hour{plural(hours)} ago"
-
-        elif minutes > 0:
-            will_round = (seconds // 30) % 2
-            if will_round:
-                return f"{minutes + 1} minute{plural(minutes)} ago"
-            else:
-                return f"{minutes} minute{plural(minutes)} ago"
-        elif seconds > 10:
-            return f"{seconds} seconds ago"
-
-        return "just now"
+        # rendered by discord as e.g. "3 days ago", so messages holding it can be cached
+        return discord_timestamp(self.creation_micros)
+
+    def get_key(self):
+        # identifies the tip within its location across journal records and snapshots. unique within a location, see
+        # next_creation_micros and Holocron.apply_change
+        return self.creation_micros
+
+    def get_search_text(self):
+        return self.content
 
     def __repr__(self):
         return f"({self.rating}) {self.author}"
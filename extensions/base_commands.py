@@ -11,6 +11,10 @@ from util.settings.response_handler import get_response_type
 class BaseCommands(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # prefix -> rendered command listing, for the cogs it was rendered from
+        self.command_listings = {}
+        self.listed_cogs = ()
+        self.max_command_listings = 64
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -60,28 +64,47 @@ class BaseCommands(commands.Cog):
         response = helpmgr.generate_bot_help(bot_command, ctx, holocron_command.help_section)
 
         if len(response) == 0:
-            response = [f"**List of Holocrons and Commands**.\nFor detailed help, "
-                        f"use `{ctx.prefix}help [holocron|command]`\n"]
-            sorted_commands = sorted(self.bot.commands,
-                                     key=lambda comm: comm.name if comm.extras.get('is_holocron', False) is True
-                                     else 'zz' + comm.name)
-            response.append('**Holocrons**')
-
-            found_command = False
-            for com in sorted_commands:
-                if not found_command and not com.extras.get('is_holocron'):
-                    found_command = True
-                    response.append('**Commands**')
-
-                aliases = "none" if len(com.aliases) == 0 else ", ".join(com.aliases)
-                response.append(f"\t**{ctx.prefix}{com.name}** (aliases: {aliases})\n"
-                                f"\t{com.description}\n")
-
-            response.append("To submit feature requests, bug reports, or general comments:"
-                            " [Holocron Tracker](https://github.com/InevitableLeftTurns/holocron_tracker/issues)")
+            response = [self.get_command_listing(ctx.prefix)]
 
         await response_method.send("\n".join(response), suppress_embeds=True)
 
 
+    def get_command_listing(self, prefix):
+        # loading or reloading an extension replaces its cog, which drops every cached listing
+        cogs = tuple(self.bot.cogs.values())
+        if cogs != self.listed_cogs:
+            self.listed_cogs = cogs
+            self.command_listings.clear()
+
+        listing = self.command_listings.get(prefix)
+        if listing is None:
+            if len(self.command_listings) >= self.max_command_listings:
+                del self.command_listings[next(iter(self.command_listings))]
+            listing = self.command_listings[prefix] = self.render_command_listing(prefix)
+        return listing
+
+    def render_command_listing(self, prefix):
+        response = [f"**List of Holocrons and Commands**.\nFor detailed help, "
+                    f"use `{prefix}help [holocron|command]`\n"]
+        sorted_commands = sorted(self.bot.commands,
+                                 key=lambda comm: comm.name if comm.extras.get('is_holocron', False) is True
+                                 else 'zz' + comm.name)
+        response.append('**Holocrons**')
+
+        found_command = False
+        for com in sorted_commands:
+            if not found_command and not com.extras.get('is_holocron'):
+                found_command = True
+                response.append('**Commands**')
+
+            aliases = "none" if len(com.aliases) == 0 else ", ".join(com.aliases)
+            response.append(f"\t**{prefix}{com.name}** (aliases: {aliases})\n"
+                            f"\t{com.description}\n")
+
+        response.append("To submit feature requests, bug reports, or general comments:"
+                        " [Holocron Tracker](https://github.com/InevitableLeftTurns/holocron_tracker/issues)")
+        return "\n".join(response)
+
+
 async def setup(bot):
     await bot.add_cog(BaseCommands(bot))
@@ -3,53 +3,58 @@ from discord.ext import commands
 from entities.base_holocron import Holocron
 from entities.locations import ConquestLocation
 from entities.tip import Tip
+from util.storage.tip_list import TipList
 
 
 class ConquestHolocron(commands.Cog, Holocron):
     def __init__(self, bot: commands.Bot):
-        super().__init__(bot, "conquest")
-        self.location_cls = ConquestLocation
+        super().__init__(bot, "conquest", ConquestLocation)
 
     def dummy_populate(self):
         self.tip_storage["globals"][1].append(Tip(author="trich", content="this is a tip for g1"))
         self.tip_storage["globals"][1].append(Tip(author="trich", content="this is another tip for g1"))
 
-        self.tip_storage["sectors"][1]["feats"][1] = [
+        self.tip_storage["sectors"][1]["feats"][1] = TipList([
             Tip(author="uaq", content="tip for s1f1a", rating=0),
             Tip(author="uaq", content="tip for s1f1b", rating=7),
             Tip(author="uaq", content="tip for s1f1c", rating=2),
             Tip(author="uaq", content="tip for s1f1d", rating=4)
-        ]
+        ])
 
-        self.tip_storage["sectors"][1]["nodes"][1] = [Tip(author="uaq", content="tip for s1n1")]
-        self.tip_storage["sectors"][1]["nodes"][13] = [
+        self.tip_storage["sectors"][1]["nodes"][1] = TipList([Tip(author="uaq", content="tip for s1n1")])
+        self.tip_storage["sectors"][1]["nodes"][13] = TipList([
             Tip(author="uaq", content="tip for s1n13a", rating=0),
             Tip(author="uaq", content="tip for s1n13b", rating=7),
             Tip(author="uaq", content="tip for s1n13c", rating=-3)
-        ]
+        ])
 
-        self.tip_storage["sectors"][1]["boss"]["feats"][1] = [
+        self.tip_storage["sectors"][1]["boss"]["feats"][1] = TipList([
             Tip(author="uaq", content="tip for s1b1a", rating=0),
             Tip(author="uaq", content="tip for s1b1b", rating=7),
             Tip(author="uaq", content="tip for s1b1c", rating=2),
             Tip(author="uaq", content="tip for s1b1d", rating=4),
-        ]
-        self.tip_storage["sectors"][1]["boss"]["tips"] = [Tip(author="uaq", content="tip for s1b")]
+        ])
+        self.tip_storage["sectors"][1]["boss"]["tips"] = TipList([Tip(author="uaq", content="tip for s1b")])
 
-        self.tip_storage["sectors"][1]["mini"]["feats"][1] = [Tip(author="uaq", content="tip for s1m1")]
-        self.tip_storage["sectors"][1]["mini"]["tips"] = [Tip(author="uaq", content="tip for s1m")]
+        self.tip_storage["sectors"][1]["mini"]["feats"][1] = TipList([Tip(author="uaq", content="tip for s1m1")])
+        self.tip_storage["sectors"][1]["mini"]["tips"] = TipList([Tip(author="uaq", content="tip for s1m")])
 
-        self.tip_storage["globals"][1] = [
+        self.tip_storage["globals"][1] = TipList([
             Tip(author="uaq", content="tip 1 to del in g1", user_id=490970360272125952),
             Tip(author="uaq", content="tip 2 to del in g1", user_id=490970360272125952),
             Tip(author="uaq", content="tip 3 to del in g1", user_id=490970360272125952),
             Tip(author="uaq", content="tip 4 to del in g1", user_id=490970360272125952),
             Tip(author="uaq", content="tip 5 to del in g1", user_id=490970360272125952)
-        ]
+        ])
 
         self.save_storage()
 
     def get_tips(self, location: ConquestLocation):
+        if not location.is_group_location or location.has_group_tips():
+            tips = self.address_tips.get(location.get_storage_address())
+            if tips is not None:
+                return tips
+
         tip_group = self.get_group_data(location)
 
         if location.is_group_location:
@@ -57,7 +62,8 @@ class ConquestHolocron(commands.Cog, Holocron):
 
         if location.sector_node_type_id == 'n' and location.feat_address not in tip_group:
             # nodes are not pre-assembled and may be missing
-            tip_group[location.feat_address] = []
+            tip_group[location.feat_address] = TipList()
+            self.address_tips[location.get_storage_address()] = tip_group[location.feat_address]
         return tip_group[location.feat_address]
 
     def get_all_tips(self):
@@ -80,35 +86,49 @@ class ConquestHolocron(commands.Cog, Holocron):
 
         return all_tips
 
-    def generate_stats_report(self):
-        total_tips_count = 0
-        global_tips_count = 0
-        sector_tips = {sector_num: 0 for sector_num in self.tip_storage['sectors']}
+    def iter_tip_addresses(self, storage=None):
+        storage = self.tip_storage if storage is None else storage
+        for feat_id, tips in storage['globals'].items():
+            yield f"g{feat_id}", tips
 
-        for global_feat_tips in self.tip_storage['globals'].values():
-            tips_count = len(global_feat_tips)
-            total_tips_count += tips_count
-            global_tips_count += tips_count
+        for sector_num, nodes in storage['sectors'].items():
+            for node_type, subtypes in nodes.items():
+                type_id = ConquestLocation.suffix_lookup[node_type]
+                if node_type in ['feats', 'nodes']:
+                    for feat_id, tips in subtypes.items():
+                        yield f"s{sector_num}{type_id}{feat_id}", tips
+                if node_type in ['boss', 'mini']:
+                    yield f"s{sector_num}{type_id}", subtypes['tips']
+                    for feat_id, tips in subtypes['feats'].items():
+                        yield f"s{sector_num}{type_id}{feat_id}", tips
+
+    def get_stat_path(self, location: ConquestLocation):
+        if location.is_sector_location:
+            return "sectors", location.sector_address, location.sector_node_type_address
+        return "globals", location.feat_address
+
+    def iter_stat_groups(self):
+        for feat_id, tips in self.tip_storage['globals'].items():
+            yield ("globals", feat_id), tips
 
         for sector_num, nodes in self.tip_storage['sectors'].items():
-            sector_tip_count = 0
             for node_type, subtypes in nodes.items():
+                path = ("sectors", sector_num, node_type)
                 if node_type in ['feats', 'nodes']:
                     for feat_id, tips in subtypes.items():
-                        sector_tip_count += len(tips)
+                        yield path, tips
                 if node_type in ['boss', 'mini']:
-                    boss_feats = subtypes['feats']
-                    for feat_id, tips in boss_feats.items():
-                        sector_tip_count += len(tips)
-                    boss_tips = subtypes['tips']
-                    sector_tip_count += len(boss_tips)
-            sector_tips[sector_num] = sector_tip_count
-            total_tips_count += sector_tip_count
+                    yield path, subtypes['tips']
+                    for feat_id, tips in subtypes['feats'].items():
+                        yield path, tips
 
-        msg = f"**Total Tips for Conquest**: {total_tips_count}\n"
-        msg += f"Total Global Feat Tips: {global_tips_count}\n"
-        for sector_num, sector_tip_count in sector_tips.items():
-            msg += f"Total Tips in Sector {sector_num}: {sector_tip_count}\n"
+    def generate_stats_report(self):
+        stats = self.stats
+        msg = f"**Total Tips for Conquest**: {stats.total}\n"
+        msg += f"Total Global Feat Tips: {stats.count('globals')}\n"
+        for sector_num in self.tip_storage['sectors']:
+            msg += f"Total Tips in Sector {sector_num}: {stats.count('sectors', sector_num)}\n"
+        msg += self.format_top_authors()
 
         return msg
 
@@ -126,6 +146,9 @@ class ConquestHolocron(commands.Cog, Holocron):
             group_data = group_data[location.sector_address]
         return group_data
 
+    async def cog_unload(self):
+        await self.close_storage()
+
     @commands.command(name="conquest", aliases=["c", "con", "conq"], extras={'is_holocron': True},
                       description="Access the Conquest Holocron for reading and managing Conquest Tips")
     async def conquest_manager(self, ctx: commands.Context, *args):
@@ -1,25 +1,44 @@
+from bisect import bisect_left, insort
+
+import json
+
 from discord.ext import commands
 
 from entities.base_holocron import Holocron
+from entities.characters import CharacterDictionary
 from entities.command_parser import HolocronCommand, CommandTypes
+from entities.conversations import conversations
 from entities.counters import Squad, CounterTip, Alias
 from entities.locations import CounterLocation, InvalidLocationError
-from util.settings.tip_sorting_handler import sort_tips
+from entities.paginator import Paginator, send_pages
+from util.command_checks import check_higher_perms
+from util.settings.response_handler import get_response_type
+from util.settings.tip_sorting_handler import ordered_tips, sort_titles
+from util.storage.character_index import CharacterIndex
+from util.storage.guild_shards import current_guild_id, guild_key
+from util.storage.journal import TipJournal
+from util.storage.rosters import rosters
+from util.storage.tip_list import TipList
+
+# squads shown by `.ctr vs`, and counter tips shown for each
+versus_squad_count = 3
+versus_tip_count = 3
+# read filter showing only the counters whose units the reader has registered in their roster
+owned_filter = "owned"
 
 
 class CounterHolocron(commands.Cog, Holocron):
     def __init__(self, bot=commands.Bot):
-        super().__init__(bot, "counter")
-        self.location_cls = CounterLocation
+        super().__init__(bot, "counter", CounterLocation)
+        self.characters = CharacterDictionary.load()
+        rosters.load()
 
     def dummy_populate(self):
         jmk = Squad(lead_id="jmk", lead="Jedi Master Kenobi", squad="JMK/CAT/GK/Padme/Ahsoka",
                     variants=["JMK/CAT/GK/GAS/Ahsoka", ], author="trich")
         see = Squad(lead_id="see", lead="Sith Eternal Emperor", squad="SEE/Wat/Malak", author="trich")
-        self.tip_storage["squads"][jmk.lead_id] = jmk
-        self.tip_storage["squads"][see.lead_id] = see
 
-        jmk.tips = [
+        jmk.tips = TipList([
             CounterTip(squad="JMK/CAT/GK/Padme/Ahsoka Mirror",
                        content="I'm running 2 leaders resolve and a green ZA; Han shoots Echo, Dash nuke; works down to 30% - probably more if I was a touch faster.",
                        author="uaq", edited=True,
@@ -31,14 +50,17 @@ class CounterHolocron(commands.Cog, Holocron):
                        activity="GAC3", author="trich", rating=0),
             CounterTip(squad="Yet another Counter", content="tip 5 for jmk for TW", activity="TW",
                        author="trich", rating=0),
-        ]
+        ])
 
-        see.tips = [
+        see.tips = TipList([
             CounterTip(squad="SEE/Bane", content="tip 1 for countering see", author="uaq", rating=0),
             CounterTip(squad="JMK/CAT/any", content="tip 2 for countering see", author="uaq", rating=0),
             CounterTip(squad="Jabba++", content="tip 3 for countering see", author="trich", rating=0),
-        ]
+        ])
 
+        # squads are stored once their tips are in place
+        self.tip_storage["squads"][jmk.lead_id] = jmk
+        self.tip_storage["squads"][see.lead_id] = see
         self.tip_storage["aliases"]["glk"] = Alias("glk", jmk.lead_id, author="uaq")
 
         self.save_storage()
@@ -60,18 +82,12 @@ class CounterHolocron(commands.Cog, Holocron):
         return tip_message, None
 
     async def add_tip(self, command: HolocronCommand, channel, author, location: CounterLocation, response_method):
-
-        def check_message(message):
-            return message.channel.id == channel_id and message.author.id == user_id
-
         if not command.new_tip_text:
             await response_method.send(
                 f"Enter the Squad for this tip to counter {location.get_location_name()}. (.e.g `JMK/CAT/GK/Ahsoka/Padme`)\n"
                 f"If you wish to cancel, respond with `cancel`.")
-            channel_id = channel.id
-            user_id = author.id
-            tip_response = await self.bot.wait_for("message", check=check_message)
-            squad = tip_response.content
+            tip_response = await conversations.ask(channel.id, author.id)
+            squad = tip_response.content if tip_response is not None else "cancel"
         else:
             squad = "TEST"
 
@@ -81,35 +97,30 @@ class CounterHolocron(commands.Cog, Holocron):
 
         await response_method.send(f"Enter the Tip for counter squad {squad}.\n"
                                    f"If you wish to cancel, respond with `cancel`.")
-        channel_id = channel.id
-        user_id = author.id
-        tip_response = await self.bot.wait_for("message", check=check_message)
+        tip_response = await conversations.ask(channel.id, author.id)
+        if tip_response is None or tip_response.content.lower() == "cancel":
+            await response_method.send("Tip addition has been cancelled.")
+            return
         tip_message = tip_response.content
 
-        existing_squad = self.tip_storage["squads"][location.actual_squad_lead_id]
         tip_message, activity = self._find_activity(location, tip_message)
 
-        existing_squad.tips.append(CounterTip(squad=squad, content=tip_message, activity=activity,
-                                              author=author.display_name, user_id=author.id))
-        self.save_storage()
-        sent_message = await response_method.send(f"Your tip has been added.\n{self.format_tips(location)}")
-        await self.send_modifier_choices(author, sent_message, location)
+        new_tip = CounterTip(squad=squad, content=tip_message, activity=activity,
+                             author=author.display_name, user_id=author.id)
+        self.commit_change(TipJournal.ADD, location, new_tip)
+        await self.send_with_modifiers(response_method, author,
+                                       f"Your tip has been added.\n{self.format_tips(location)}", location)
         return
 
     async def add_squad(self, command: HolocronCommand, channel, author, location: CounterLocation, response_method):
-        def check_message(message):
-            return message.channel.id == channel_id and message.author.id == user_id
-
         if command.command_type is CommandTypes.ADD_SQUAD and self.parent_exists(location):
             raise InvalidLocationError(f"Squad already exists: `{location}`")
 
         if not command.new_tip_text:
             await response_method.send(f"Please enter the Squad Name for {location}. (e.g. `Jedi Master Kenobi)`\n"
                                        f"If you wish to cancel, respond with `cancel`.")
-            channel_id = channel.id
-            user_id = author.id
-            response = await self.bot.wait_for("message", check=check_message)
-            leader = response.content
+            response = await conversations.ask(channel.id, author.id)
+            leader = response.content if response is not None else "cancel"
         else:
             leader = command.new_tip_text
 
@@ -120,13 +131,16 @@ class CounterHolocron(commands.Cog, Holocron):
         await response_method.send(f"Please enter a full Squad for {leader}. (e.g. `JMK/CAT/Ahsoka/Padme/GK`)\n"
                                    f"If you wish to cancel, respond with `cancel`.")
 
-        response = await self.bot.wait_for("message", check=check_message)
+        response = await conversations.ask(channel.id, author.id)
+        if response is None or response.content.lower() == "cancel":
+            await response_method.send("Squad addition has been cancelled.")
+            return
         squad = response.content
 
         self.add_squad_to_storage(command, location, leader, squad, author)
 
-        sent_message = await response_method.send(f"Your squad has been added.\n{self.format_tips(location)}")
-        await self.send_modifier_choices(author, sent_message, location)
+        await self.send_with_modifiers(response_method, author,
+                                       f"Your squad has been added.\n{self.format_tips(location)}", location)
 
     def add_squad_to_storage(self, command: HolocronCommand, location: CounterLocation, lead, squad, author):
         new_squad = Squad(lead_id=location.actual_squad_lead_id, lead=lead, squad=squad,
@@ -138,8 +152,54 @@ class CounterHolocron(commands.Cog, Holocron):
         elif existing:
             raise InvalidLocationError(f"Squad already exists: `{location.actual_squad_lead_id}`")
 
-        self.tip_storage['squads'][new_squad.lead_id] = new_squad
-        self.save_storage()
+        self.commit_change(TipJournal.SQUAD, location, new_squad)
+
+    def apply_change(self, op, location: CounterLocation, payload):
+        if op == TipJournal.SQUAD:
+            squads = self.tip_storage['squads']
+            existing = squads.get(payload.lead_id)
+            # an edited squad carries its tips over, a replayed one may carry an older copy of them
+            stats, user_tips, search_index = self.shard.stats, self.shard.user_tips, self.shard.search_index
+            character_index = self.shard.character_index
+            self.shard.rendered_tips.pop(payload.lead_id, None)
+            squad_order = self.shard.squad_order
+            if squad_order is not None:
+                if existing:
+                    del squad_order[bisect_left(squad_order, (existing.lead, existing.lead_id))]
+                insort(squad_order, (payload.lead, payload.lead_id))
+            path = ("squads", payload.lead_id)
+            for tip in existing.tips if existing else []:
+                if stats is not None:
+                    stats.remove(path, tip.author)
+                if user_tips is not None:
+                    user_tips.remove(payload.lead_id, tip)
+                if search_index is not None:
+                    search_index.remove((payload.lead_id, tip.get_key()))
+                if character_index is not None:
+                    character_index.remove_tip(payload.lead_id, tip)
+            for tip in payload.tips:
+                if stats is not None:
+                    stats.add(path, tip.author)
+                if user_tips is not None:
+                    user_tips.add(payload.lead_id, tip)
+                if search_index is not None:
+                    search_index.add((payload.lead_id, tip.get_key()), (payload.lead_id, tip), tip.get_search_text())
+                if character_index is not None:
+                    character_index.add_tip(payload.lead_id, tip)
+            if character_index is not None:
+                character_index.add_squad(payload)
+            squads[payload.lead_id] = payload
+            return None
+
+        tip = super().apply_change(op, location, payload)
+        character_index = self.shard.character_index
+        if tip is not None and character_index is not None:
+            # edits only change the content, so the characters of a tip change on add and delete
+            if op == TipJournal.ADD:
+                character_index.add_tip(location.actual_squad_lead_id, tip)
+            elif op == TipJournal.DELETE:
+                character_index.remove_tip(location.actual_squad_lead_id, tip)
+        return tip
 
     def parent_exists(self, location: CounterLocation):
         return self.get_squad(location) is not None
@@ -147,21 +207,35 @@ class CounterHolocron(commands.Cog, Holocron):
     def add_alias_to_storage(self, location: CounterLocation, author):
         pass
 
-    def format_tips(self, location: CounterLocation, read_filters=None):
+    def get_render_key(self, location: CounterLocation, read_filters):
+        return *super().get_render_key(location, read_filters), location.check_activity(read_filters)
+
+    def format_tips(self, location: CounterLocation, read_filters=None, user_id=None):
+        if owned_filter not in (read_filters or []):
+            return super().format_tips(location, read_filters)
+        roster = rosters.get(user_id)
+        if roster is None:
+            return "You have not registered a roster yet. Add the units you own with the `roster` command."
+        # depends on the reader's roster, so it is not kept with the shared renders
+        return self.render_tips(location, read_filters, roster)
+
+    def render_tips(self, location: CounterLocation, read_filters=None, roster=None):
         squad = self.get_squad(location)
-        counter_tips = self.get_tips(location)
+        sort_method = self.get_sort_method()
+        counter_tips = ordered_tips(self.get_tips(location), sort_method)
 
         activity = location.check_activity(read_filters)
         if activity:
             counter_tips = [tip for tip in counter_tips if tip.activity == activity]
+        if roster is not None:
+            counter_tips = rosters.filter_owned(counter_tips, roster, self.characters)
 
         total = len(counter_tips)
-        sort_tips(counter_tips)
         top_n = counter_tips[:self._read_depth(read_filters)]
 
         if len(top_n) > 0:
             output = []
-            output.append(f"__**Recent tip{'' if len(top_n) == 1 else 's'} "
+            output.append(f"__**{sort_titles[sort_method]} tip{'' if len(top_n) == 1 else 's'} "
                           f"for {location.get_location_name()}**__\n")
 
             output.append(squad.create_squad_detail_message())
@@ -171,6 +245,8 @@ class CounterHolocron(commands.Cog, Holocron):
                 output.append(f"{counter} - " + tip.create_tip_message())
 
             return '\n'.join(output)
+        elif roster is not None:
+            return f"There are no tips for **{location.get_location_name()}** using only units you own.\n"
         else:
             return f"There are no tips for **{location.get_location_name()}**.\n"
 
@@ -184,13 +260,81 @@ class CounterHolocron(commands.Cog, Holocron):
 
         return squad.tips
 
+    @property
+    def squad_order(self):
+        shard = self.shard
+        if shard.squad_order is None:
+            shard.squad_order = sorted((squad.lead, lead_id) for lead_id, squad in self.tip_storage["squads"].items())
+        return shard.squad_order
+
+    @property
+    def character_index(self) -> CharacterIndex:
+        shard = self.shard
+        if shard.character_index is None:
+            shard.character_index = CharacterIndex.from_squads(self.characters, self.tip_storage["squads"].values())
+        return shard.character_index
+
+    def format_with(self, command: HolocronCommand):
+        query = " ".join(([command.address] if command.address else []) + command.command_args)
+        units = self.characters.parse_query(query)
+        if not units:
+            return [f"Follow `with` with the characters to look for, e.g. `jabba` or `gk/cat`."]
+
+        unit_names = ", ".join(self.characters.get_name(unit) for unit in units)
+        squads = self.tip_storage["squads"]
+        lead_ids = sorted(self.character_index.find_squads(units), key=lambda lead_id: squads[lead_id].lead)
+        tip_entries = sorted(self.character_index.find_tips(units))
+        if not lead_ids and not tip_entries:
+            return [f"No squads or counters use {unit_names}."]
+
+        output = []
+        if lead_ids:
+            output.append(f"__**Squads with {unit_names}**__")
+            for lead_id in lead_ids:
+                squad = squads[lead_id]
+                output.append(f"`{lead_id}`\t{squad.lead}\t{squad.squad}")
+        if tip_entries:
+            output.append(f"__**Counters using {unit_names}**__")
+            for lead_id, tip_key in tip_entries:
+                squad = squads.get(lead_id)
+                tip = self.find_tip(squad.tips, tip_key) if squad else None
+                if tip is not None:
+                    output.append(f"`{lead_id}` {tip.squad} - {tip.create_selection_message()}")
+        return output
+
+    def format_versus(self, command: HolocronCommand):
+        query = " ".join(([command.address] if command.address else []) + command.command_args)
+        units = self.characters.parse_query(query)
+        if not units:
+            return [f"Follow `vs` with the opponent team, leader first, e.g. `jmk/cat/gk/padme/ahsoka`."]
+
+        team = "/".join(self.characters.get_name(unit) for unit in units)
+        ranked = self.character_index.rank_squads(units, limit=versus_squad_count)
+        if not ranked:
+            return [f"No squads are like {team}."]
+
+        sort_method = self.get_sort_method()
+        output = [f"__**Counters for {team}**__"]
+        for match, lead_id in ranked:
+            squad = self.tip_storage["squads"][lead_id]
+            output.append(f"**{squad.create_squad_header_message()}** - {match:.0%} match")
+            output.append(squad.create_squad_detail_message())
+            counter_tips = ordered_tips(squad.tips, sort_method, versus_tip_count)
+            for index, tip in enumerate(counter_tips):
+                output.append(f"{index + 1} - " + tip.create_tip_message())
+            if not counter_tips:
+                output.append("*no tips yet*")
+        return output
+
     def get_list(self):
         # this is really get squads
-        output = "**Listing all squads for counters**\n"
-        for squad in sorted(self.tip_storage["squads"].values(), key=lambda squad: squad.lead):
-            output += f"`{squad.lead_id}`\t{squad.lead}"  #\t \t[{squad.squad}]"
-            output += f"\t*tips: {len(squad.tips)}*\n"
-        return output
+        squads = self.tip_storage["squads"]
+        yield "**Listing all squads for counters**"
+        # a copy, as squads may be added while the list is paged
+        for lead, lead_id in tuple(self.squad_order):
+            squad = squads.get(lead_id)
+            if squad:
+                yield f"`{lead_id}`\t{lead}\t*tips: {len(squad.tips)}*"
 
     def get_all_tips(self):
         all_tips = []
@@ -198,13 +342,33 @@ class CounterHolocron(commands.Cog, Holocron):
             all_tips.extend(squad.tips)
         return all_tips
 
+    def iter_tip_addresses(self, storage=None):
+        storage = self.tip_storage if storage is None else storage
+        for squad_id, squad in storage["squads"].items():
+            yield squad_id, squad.tips
+
+    def build_address_table(self):
+        # squads are added and renamed at runtime, so counter addresses are always looked up in storage
+        return None
+
+    def build_location_cache(self):
+        return None
+
+    def get_stat_path(self, location: CounterLocation):
+        return "squads", location.actual_squad_lead_id
+
+    def iter_stat_groups(self):
+        for squad_id, squad in self.tip_storage["squads"].items():
+            yield ("squads", squad_id), squad.tips
+
     def generate_stats_report(self):
         total_squad_count = len(self.tip_storage["squads"])
         total_alias_count = len(self.tip_storage["aliases"])
-        total_tip_count = len(self.get_all_tips())
+        total_tip_count = self.stats.total
         return f"Counter Holocron Total Squads: {total_squad_count}\n" \
                f"Counter Holocron Total Tips: {total_tip_count}\n" \
-               f"Counter Holocron Aliases: {total_alias_count}\n"
+               f"Counter Holocron Aliases: {total_alias_count}\n" \
+               f"{self.format_top_authors()}"
 
     def get_group_data(self, location: CounterLocation, feats=False):
         raise NotImplementedError
@@ -218,12 +382,73 @@ class CounterHolocron(commands.Cog, Holocron):
     def config_to_storage(self, config: dict):
         return config
 
+    async def read_roster_text(self, ctx: commands.Context, args):
+        # units inline or in an attached file, one per line or separated by / or ,
+        text = " ".join(args)
+        for attachment in ctx.message.attachments:
+            text += "\n" + (await attachment.read()).decode("utf-8", errors="replace")
+        return text
+
+    def format_roster(self, user_id):
+        roster = rosters.get(user_id)
+        if roster is None:
+            return ["You have not registered a roster yet."]
+        names = sorted(self.characters.get_name(unit) for unit in rosters.to_units(roster))
+        return [f"**Your roster ({len(names)} units)**", ", ".join(names)]
+
+    async def roster_manager(self, ctx: commands.Context, *args):
+        current_guild_id.set(guild_key(ctx.guild))
+        response_method = get_response_type(ctx.guild, ctx.author, ctx.channel)
+        action = args[0].lower() if args else "show"
+        user_id = ctx.author.id
+
+        if action in ["set", "import", "add", "remove"]:
+            units = self.characters.parse_query(await self.read_roster_text(ctx, args[1:]))
+            if not units:
+                await response_method.send(f"Follow `{action}` with your units, e.g. `jmk/cat/gk`, or attach a file "
+                                           f"listing them.")
+                return
+            {"set": rosters.set_roster, "import": rosters.set_roster,
+             "add": rosters.add_units, "remove": rosters.remove_units}[action](user_id, units)
+            rosters.save()
+            await send_pages(response_method, Paginator(user_id, self.format_roster(user_id)))
+        elif action == "clear":
+            removed = rosters.remove_roster(user_id)
+            rosters.save()
+            await response_method.send("Your roster has been cleared." if removed else "You have no roster to clear.")
+        elif action == "bulk":
+            if not await check_higher_perms(ctx.author, ctx.guild):
+                await response_method.send("Only Holocron Admins can import rosters for other members.")
+                return
+            try:
+                imported = json.loads(await self.read_roster_text(ctx, args[1:]))
+                member_units = {int(member_id): self.characters.parse_query(
+                    units if isinstance(units, str) else "/".join(units)) for member_id, units in imported.items()}
+            except (ValueError, AttributeError, TypeError):
+                await response_method.send("Attach a JSON file of member ids to their units, e.g. "
+                                           "`{\"123\": [\"jmk\", \"cat\"]}`.")
+                return
+            count = rosters.bulk_import(member_units)
+            rosters.save()
+            await response_method.send(f"Imported rosters for {count} member{'' if count == 1 else 's'}.")
+        else:
+            await send_pages(response_method, Paginator(user_id, self.format_roster(user_id)))
+
+    async def cog_unload(self):
+        await self.close_storage()
+
     @commands.command(name="counter", aliases=["ctr"], extras={'is_holocron': True},
                       description="Access the Counter Holocron for reading and managing Territory War "
                                   "and Grand Arena Championship Counter Tips")
     async def counter_manager(self, ctx: commands.Context, *args):
         await self.holocron_command_manager(ctx, *args)
 
+    @commands.command(name="roster", description="Registers the units you own, so `counter <leader> owned` shows "
+                                                 "only the counters you can run. Use `set`, `add`, `remove` or "
+                                                 "`clear` followed by your units or an attached file.")
+    async def roster_command(self, ctx: commands.Context, *args):
+        await self.roster_manager(ctx, *args)
+
 
 async def setup(bot):
     await bot.add_cog(CounterHolocron(bot))
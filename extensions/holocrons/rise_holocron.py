@@ -6,11 +6,14 @@ from entities.locations import RiseLocation
 
 class RiseHolocron(commands.Cog, Holocron):
     def __init__(self, bot=commands.Bot):
-        super().__init__(bot, "rise")
-        self.location_cls = RiseLocation
+        super().__init__(bot, "rise", RiseLocation)
         # self.location_regex = compile(r"([a-z]+)?([0-9]+)?([a-z]+)?([0-9]+)?")
 
     def get_tips(self, location: RiseLocation):
+        tips = self.address_tips.get(location.get_storage_address())
+        if tips is not None:
+            return tips
+
         track_data = self.tip_storage[location.track_address]
         planet_data = track_data[location.planet_address]
         mission_data = planet_data[location.mission_type_address]
@@ -34,7 +37,37 @@ class RiseHolocron(commands.Cog, Holocron):
                         all_tips.extend(mission_data["tips"])
         return all_tips
 
+    def iter_tip_addresses(self, storage=None):
+        storage = self.tip_storage if storage is None else storage
+        address_lookup = {track_name: track_id for track_id, track_name in RiseLocation.tracks.items()}
+        for track_name, track_data in storage.items():
+            for planet_id, planet_data in track_data.items():
+                planet_address = f"{address_lookup[track_name]}{planet_id}"
+                for mission_type, mission_data in planet_data.items():
+                    if mission_type == 'cm':
+                        for mission_id, mission_tips in mission_data.items():
+                            yield f"{planet_address}cm{mission_id}", mission_tips
+                    else:
+                        # sm addresses are always sm1, see RiseLocation.parse_location
+                        type_id = 'sm1' if mission_type == 'sm' else RiseLocation.suffix_lookup[mission_type]
+                        yield f"{planet_address}{type_id}", mission_data["tips"]
+
+    def get_stat_path(self, location: RiseLocation):
+        return location.track_address, location.planet_address
+
+    def iter_stat_groups(self):
+        for track_id, track_data in self.tip_storage.items():
+            for planet_id, planet_data in track_data.items():
+                path = (track_id, planet_id)
+                for mission_type_id, mission_data in planet_data.items():
+                    if mission_type_id == 'cm':
+                        for mission_id, mission_tips in mission_data.items():
+                            yield path, mission_tips
+                    else:
+                        yield path, mission_data["tips"]
+
     def generate_stats_report(self):
+        stats = self.stats
         total_tips_count = 0
         msg = ""
         address_lookup = {track_name: track_id for track_id, track_name in RiseLocation.tracks.items()}
@@ -44,18 +77,11 @@ class RiseHolocron(commands.Cog, Holocron):
             track_msg = ""
             track_id = address_lookup[track_name]
             track_label = self.labels[track_id]['name']
-            for planet_id, planet_data in track_data.items():
+            for planet_id in track_data:
                 if planet_id > 3 or (track_id == 'lsb' and planet_id > 1):
                     # temporary until further progress on Rise is made
                     continue
-                planet_tip_count = 0
-                for mission_type_id, mission_data in planet_data.items():
-                    if mission_type_id == 'cm':
-                        # only cm's have #s for now. ignore sm #s
-                        for mission_id, mission_tips in mission_data.items():
-                            planet_tip_count += len(mission_tips)
-                    else:
-                        planet_tip_count += len(mission_data["tips"])
+                planet_tip_count = stats.count(track_name, planet_id)
                 planet_address = str(track_id) + str(planet_id)
                 track_msg += f"- Tips for {self.labels[track_id][planet_address]['name']}: {planet_tip_count}\n"
                 track_tip_count += planet_tip_count
@@ -64,6 +90,7 @@ class RiseHolocron(commands.Cog, Holocron):
             total_tips_count += track_tip_count
 
         msg = f"**Rise of the Empire Total Tips**: {total_tips_count}\n" + msg
+        msg += self.format_top_authors()
 
         return msg
 
@@ -136,6 +163,9 @@ class RiseHolocron(commands.Cog, Holocron):
 
         return response or ["No further cleanup needed."]
 
+    async def cog_unload(self):
+        await self.close_storage()
+
     @commands.command(name="rise", aliases=["r"], extras={'is_holocron': True},
                       description="Access the Rise Holocron for reading and managing Rise Tips")
     async def rise_manager(self, ctx: commands.Context, *args):
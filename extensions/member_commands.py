@@ -0,0 +1,42 @@
+from discord.ext import commands
+
+from entities.base_holocron import Holocron
+from entities.paginator import Paginator, send_pages
+from util.settings.response_handler import get_response_type
+from util.storage.guild_shards import current_guild_id, guild_key
+
+
+class MemberCommands(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.page_size = 10
+
+    def get_holocrons(self):
+        return [cog for cog in self.bot.cogs.values() if isinstance(cog, Holocron)]
+
+    def collect_tips(self, user_id):
+        # (holocron name, storage address, tip) across the Holocrons, served from each one's user index
+        user_tips = []
+        for holocron in self.get_holocrons():
+            user_tips.extend((holocron.name, address, tip) for address, tip in holocron.get_user_tips(user_id))
+        user_tips.sort(key=lambda holocron_tip: -holocron_tip[2].creation_micros)
+        return user_tips
+
+    @commands.command(name="mine", aliases=["my"], description="Lists all of your tips across the Holocrons.")
+    async def mine(self, ctx: commands.Context):
+        current_guild_id.set(guild_key(ctx.guild))
+        response_method = get_response_type(ctx.guild, ctx.author, ctx.channel)
+
+        user_tips = self.collect_tips(ctx.author.id)
+        if not user_tips:
+            await response_method.send("You have not written any tips yet.")
+            return
+
+        lines = (f"`{ctx.prefix}{holocron_name} {address}` - {tip.create_selection_message()}"
+                 for holocron_name, address, tip in user_tips)
+        pages = Paginator(ctx.author.id, lines, f"**Your tips ({len(user_tips)})**", self.page_size)
+        await send_pages(response_method, pages)
+
+
+async def setup(bot):
+    await bot.add_cog(MemberCommands(bot))
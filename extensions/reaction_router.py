@@ -0,0 +1,63 @@
+import os
+
+import discord
+from discord.ext import commands, tasks
+
+from entities.conversations import conversations
+from entities.menus import MenuChoice, menu_registry, press_button
+
+# where waiting menus are saved, so they keep working after a restart. empty keeps them in memory only
+menu_state_filepath = os.environ.get("HOLOCRON_MENU_STATE", "")
+
+
+class ReactionRouter(commands.Cog):
+    """
+    The one reaction, button and prompt listener. Choices on a waiting menu, from the user it was sent to, are handed
+    to the cog that sent it, and messages answer the prompt waiting on their author in their channel. Raw events
+    arrive whether or not the message is cached, and everything else is dropped after a lookup.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        menu_registry.bot = bot
+        if menu_state_filepath:
+            menu_registry.load(menu_state_filepath)
+        self.clean_menus.start()
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if payload.user_id == self.bot.user.id:
+            return
+        entry = menu_registry.match(payload.message_id, payload.user_id, str(payload.emoji))
+        if entry is None:
+            return
+
+        channel = self.bot.get_channel(payload.channel_id) or await self.bot.fetch_channel(payload.channel_id)
+        # edits and reactions only need the ids, so the message itself is not fetched
+        message = channel.get_partial_message(payload.message_id)
+        user = payload.member or self.bot.get_user(payload.user_id) or await self.bot.fetch_user(payload.user_id)
+        await menu_registry.dispatch(entry, MenuChoice(message, str(payload.emoji)), user)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        conversations.resolve(message)
+
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type is discord.InteractionType.component:
+            await press_button(interaction)
+
+    @tasks.loop(minutes=1)
+    async def clean_menus(self):
+        menu_registry.drop_expired()
+        if menu_state_filepath and menu_registry.changed:
+            menu_registry.save(menu_state_filepath)
+
+    async def cog_unload(self):
+        self.clean_menus.cancel()
+        if menu_state_filepath:
+            menu_registry.save(menu_state_filepath)
+
+
+async def setup(bot):
+    await bot.add_cog(ReactionRouter(bot))
@@ -1,19 +1,20 @@
 import discord
 import json
 from discord.ext import commands
+from entities.conversations import conversations
+from entities.menus import MenuChoice, send_menu, menu_registry
 from util.command_checks import check_higher_perms
-from collections import namedtuple
 from util.settings.prefix_handler import bot_prefixes, check_prefix_valid, set_prefix
 from util.settings.response_handler import response_settings, check_set_response, set_response_method, get_response_type
-
-AwaitingReaction = namedtuple("AwaitingReaction", ["user_id", "allowed_emoji"])
+from util.settings.tip_sorting_handler import sorting_settings, check_set_sorting, set_sort_method
+from util.settings.menu_style_handler import menu_settings, check_set_menu_style, set_menu_style
+from util.storage.guild_shards import current_guild_id, guild_key
 
 
 class SettingsCommands(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.settings = None
-        self.waiting_for_reactions = {}
         self.settings_path = "data/settings/settings.json"
         self.load_settings()
 
@@ -26,6 +27,8 @@ class SettingsCommands(commands.Cog):
         for guild_id, settings in settings.items():
             bot_prefixes[guild_id] = settings.get("Bot Prefix", defaults["Bot Prefix"])
             response_settings[guild_id] = settings.get("Response Method", defaults["Response Method"])
+            sorting_settings[guild_id] = settings.get("Tip Sorting", defaults["Tip Sorting"])
+            menu_settings[guild_id] = settings.get("Menu Style", defaults["Menu Style"])
 
     def update_settings(self):
         with open(self.settings_path, "w") as settings_file:
@@ -51,68 +54,67 @@ class SettingsCommands(commands.Cog):
             self.update_settings()
         return self.settings[str(guild.id)]
 
-    @commands.Cog.listener()
-    async def on_reaction_add(self, reaction: discord.Reaction, user: discord.Member):
-        if user.id == self.bot.user.id:
-            return
-        try:
-            message_user_id = self.waiting_for_reactions[reaction.message.id].user_id
-        except KeyError:
-            return
-        if message_user_id == user.id:
-            await self.handle_setting_change(reaction, user)
-
-    async def handle_setting_change(self, reaction: discord.Reaction, user: discord.Member):
-        def check_message(message: discord.Message):
-            return message.channel.id == channel.id and message.author.id == user.id
-
+    async def handle_setting_change(self, reaction: MenuChoice, user: discord.Member, state=None):
         channel = reaction.message.channel
-
-        allowed_emojis = self.waiting_for_reactions[reaction.message.id].allowed_emoji
-        if reaction.emoji not in allowed_emojis:
-            return
-
-        del self.waiting_for_reactions[reaction.message.id]
+        await reaction.acknowledge()
+        menu_registry.remove(reaction.message.id)
 
         setting_index = int(reaction.emoji[0]) - 1
         current_settings = self.get_server_settings(reaction.message.guild)
         key_list = [key for key in current_settings.keys()]
+        setting_key = key_list[setting_index]
         setting_accepted = False
         new_setting = None
-        setting_hints = [
-            None,
-            "channel, dm"
-        ]
-        hints = "" if setting_hints[setting_index] is None else f"({setting_hints[setting_index]})"
-        setting_checks = [
-            check_prefix_valid,
-            check_set_response
-        ]
-        error_messages = [
-            "That prefix has been rejected. Try a shorter prefix, or one without a space.",
-            "To change response method, choose `channel` to change response method to the messaged channel, "
-            "or `dm` to change response method to DM's"
-        ]
-        setting_specific_functions = [
-            set_prefix,
-            set_response_method
-        ]
-
-        await channel.send(f"What should `{key_list[setting_index]}` be changed to? {hints}")
+        setting_hints = {
+            "Response Method": "channel, dm",
+            "Tip Sorting": "recent, oldest, rating",
+            "Menu Style": "reactions, buttons",
+        }
+        hints = "" if setting_key not in setting_hints else f"({setting_hints[setting_key]})"
+        setting_checks = {
+            "Bot Prefix": check_prefix_valid,
+            "Response Method": check_set_response,
+            "Tip Sorting": check_set_sorting,
+            "Menu Style": check_set_menu_style,
+        }
+        error_messages = {
+            "Bot Prefix": "That prefix has been rejected. Try a shorter prefix, or one without a space.",
+            "Response Method": "To change response method, choose `channel` to change response method to the "
+                               "messaged channel, or `dm` to change response method to DM's",
+            "Tip Sorting": "To change tip sorting, choose `recent` for newest tips first, `oldest` for oldest tips "
+                           "first, or `rating` for highest rated tips first",
+            "Menu Style": "To change menu style, choose `reactions` for emoji reaction menus, or `buttons` for "
+                          "menus with buttons under the message",
+        }
+        setting_specific_functions = {
+            "Bot Prefix": set_prefix,
+            "Response Method": set_response_method,
+            "Tip Sorting": set_sort_method,
+            "Menu Style": set_menu_style,
+        }
+
+        if setting_key not in setting_checks:
+            await channel.send(f"`{setting_key}` cannot be changed yet.")
+            return
+
+        await channel.send(f"What should `{setting_key}` be changed to? {hints}")
 
         while not setting_accepted:
-            new_setting = await self.bot.wait_for("message", check=check_message)
-            setting_accepted = setting_checks[setting_index](new_setting)
+            new_setting = await conversations.ask(channel.id, user.id)
+            if new_setting is None:
+                await channel.send(f"No new value was given. `{setting_key}` was not changed.")
+                return
+            setting_accepted = setting_checks[setting_key](new_setting)
             if not setting_accepted:
-                await channel.send(error_messages[setting_index])
+                await channel.send(error_messages[setting_key])
 
         guild_id_key = str(new_setting.guild.id)
         content = new_setting.content
 
-        setting_specific_functions[setting_index](guild_id_key, content)
+        setting_specific_functions[setting_key](guild_id_key, content)
 
         response_method = get_response_type(new_setting.guild, new_setting.author, channel)
-        await self.set_new_setting(guild_id_key, key_list[setting_index], content, response_method)
+        await self.set_new_setting(guild_id_key, setting_key, content, response_method)
 
     async def set_new_setting(self, id_key, setting_key, new_value, response_method):
         self.settings[id_key][setting_key] = new_value
@@ -137,12 +139,8 @@ class SettingsCommands(commands.Cog):
                 emoji_list.append(str(index + 1) + "\u20E3")
 
             # ignores response setting, always in-channel (due to how settings are stored/changed. might be 'fixable')
-            settings_message = await ctx.send("\n".join(response))
-
-            self.waiting_for_reactions[settings_message.id] = AwaitingReaction(ctx.message.author.id, emoji_list)
-
-            for emoji in emoji_list:
-                await settings_message.add_reaction(emoji)
+            current_guild_id.set(guild_key(ctx.guild))
+            await send_menu(ctx, "\n".join(response), emoji_list, ctx.message.author.id, self.handle_setting_change)
 
         else:
             response = ["**Current Settings**"]
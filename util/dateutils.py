@@ -3,6 +3,9 @@ Description: function(s) for parsing string dates into datetime
 """
 import datetime
 
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
 
 def string_to_date(instr):
     return string_to_datetime(instr).date()
@@ -37,3 +40,24 @@ def max_date():
     return datetime.datetime(3000, 12, 31)
 
 
+def datetime_to_epoch_micros(indate):
+    """
+    whole microseconds between the unix epoch and a naive utc datetime, the compact form entities store timestamps in
+    """
+    return (indate - EPOCH) // MICROSECOND
+
+
+def epoch_micros_to_datetime(micros):
+    return EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def utc_now_micros():
+    return datetime_to_epoch_micros(datetime.datetime.utcnow())
+
+
+def discord_timestamp(micros, style="R"):
+    """
+    Discord timestamp markup for epoch microseconds. Clients render it in the reader's timezone, and the relative
+    style (`R`) keeps counting up, so the text itself never goes stale
+    """
+    return f"<t:{micros // 1_000_000}:{style}>"
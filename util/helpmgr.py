@@ -1,23 +1,33 @@
+from functools import lru_cache
+
 from entities.command_parser import CommandTypes
 
+# stands in for the command prefix while the help text is compiled, and is replaced by the guild's prefix when shown
+PREFIX_PLACEHOLDER = "\x00prefix\x00"
+# rendered help sections kept, by Holocron, prefix and section
+help_cache_size = 256
+
 
 class HelpContent:
 
     def __init__(self):
-        self.content = None
-        self.prefix = None
-        self.modify_header = None
+        self.prefix = PREFIX_PLACEHOLDER
+        # the help text with placeholders for the prefix, compiled on first use
+        self.templates = None
 
     def get_content(self, prefix, help_section: CommandTypes):
-        if self.content is None or self.prefix != prefix:
-            self.prefix = prefix
-            self.content = self.generate_content()
+        # a copy, as callers add to the response
+        return list(self.render_section(prefix, help_section.name.lower()))
+
+    @lru_cache(maxsize=help_cache_size)
+    def render_section(self, prefix, help_key):
+        if self.templates is None:
+            self.templates = self.generate_content()
 
-        help_key = help_section.name.lower()
         try:
-            content = self.content[help_key]
+            content = self.templates[help_key]
         except KeyError:
-            return [f'{help_key} has no specific help']
+            return (f'{help_key} has no specific help',)
 
         response = self.get_header(help_key)
         if not isinstance(content, list):
@@ -25,13 +35,13 @@ class HelpContent:
             response.append(content)
         else:
             for content_key in content:
-                response.append(self.content[content_key])
+                response.append(self.templates[content_key])
 
-        return response
+        return tuple(line.replace(PREFIX_PLACEHOLDER, prefix) for line in response)
 
     def get_header(self, help_section):
         if help_section in ["add", "edit", "delete"]:
-            return [self.content['modify_header']]
+            return [self.templates['modify_header']]
         return []
 
     def generate_content(self):
@@ -43,7 +53,7 @@ class ConquestHelp(HelpContent):
     def generate_content(self):
         return {
 
-            "all": ["intro", "read", "list", "modify_header", "add", "edit", "delete", "clear"],
+            "all": ["intro", "read", "list", "search", "modify_header", "add", "edit", "delete", "clear", "archive"],
 
             "intro": f"Manages tips for the currently active conquest.\nStart with "
                      f"`{self.prefix}conquest`, then follow with options from below.\n",
@@ -58,6 +68,10 @@ class ConquestHelp(HelpContent):
             "list": f"You can `list` all feats for a Sector, Boss, or Miniboss by using a shortened address.\n"
                     f"\tex: `{self.prefix}con s3b` or `{self.prefix}con s3f` or `{self.prefix}con g`\n",
 
+            "search": f"*Searching*\n"
+                      f"`{self.prefix}conquest search <words>` finds the feats and tips that best match the words.\n"
+                      f"\tex: `{self.prefix}con search mandalorians` or `{self.prefix}con search jawa healer`\n",
+
             "modify_header": f"*Tip Modification*\n"
                              f"To modify a tip, use the location and the modification type as below.\n "
                              f"ex: `{self.prefix}conquest <location> <command>` or "
@@ -73,8 +87,16 @@ class ConquestHelp(HelpContent):
                       f"ex: `{self.prefix}conquest s1f2 delete` or `{self.prefix}conquest delete s1f2`\n",
 
             'clear': f"*Clear All Tips*\n"
-                     f"`{self.prefix}conquest clear`\n"
-                     f"Permission role required. Intended for when conquests end.",
+                     f"`{self.prefix}conquest clear <season>`\n"
+                     f"Permission role required. Intended for when conquests end. Tips are archived under the "
+                     f"season name (today's date if none is given) before they are cleared.\n",
+
+            'archive': f"*Archived Seasons*\n"
+                       f"`{self.prefix}conquest archive` lists archived seasons, and "
+                       f"`{self.prefix}conquest archive <season>` lists the locations archived for that season.\n"
+                       f"\tTo read archived tips, follow with a `location` or part of the feat text. "
+                       f"ex: `{self.prefix}con archive 2024-05-01 s1f2` or `{self.prefix}con archive 2024-05-01 "
+                       f"jawa`\n",
 
             'location': "Conquest location syntax will depend on what kind of location it is:\n"
                         "* Global Feats- global feats consist of `g` and a number representing which feat. "
@@ -96,7 +118,7 @@ class RiseHelp(HelpContent):
     def generate_content(self):
         return {
 
-            "all": ["intro", "read", "map", "modify_header", "add", "edit", "delete", "clear"],
+            "all": ["intro", "read", "map", "search", "modify_header", "add", "edit", "delete", "clear"],
 
             "intro": f"Manages tips for **Rise of the Empire** Territory Battle.\nStart with "
                      f"`{self.prefix}rise` or `{self.prefix}r`, then follow with options from below.\n",
@@ -111,6 +133,11 @@ class RiseHelp(HelpContent):
                    f"Dark Side => ds, Mixed => mx, Light Side => ls and each tier is labeled 1 through 6.\n"
                    f"\tex: `{self.prefix}rise map ds3` for Dathomir or `{self.prefix}r map mx1` for Corellia\n",
 
+            "search": f"*Searching*\n"
+                      f"`{self.prefix}rise search <words>` finds the missions and tips that best match the words, "
+                      f"including mission requirements and enemies.\n"
+                      f"\tex: `{self.prefix}r search bounty hunters`\n",
+
             "modify_header": f"*Tip Modification*\n"
                              f"To modify a tip, use the location and the modification type as below.\n "
                              f"ex: `{self.prefix}rise <location> <command>` or "
@@ -162,8 +189,8 @@ class CounterHelp(HelpContent):
     def generate_content(self):
         return {
 
-            "all": ["intro", "list", "read", "squad_header", "add_squad", "edit_squad", "modify_header", "add", "edit",
-                    "delete", "clear"],
+            "all": ["intro", "list", "read", "search", "with", "vs", "squad_header", "add_squad", "edit_squad", "modify_header",
+                    "add", "edit", "delete", "clear"],
 
             "intro": f"Manages tips for counters in **Territory War** or **Grand Arena Championships**.\nStart with "
                      f"`{self.prefix}counter` or `{self.prefix}ctr`, "
@@ -180,7 +207,25 @@ class CounterHelp(HelpContent):
                     f"*aliases can also be used such as glrey for rey*\n"
                     f"  \n"
                     f"To filter to only TW or GAC counters follow the leader id with `TW`, `GAC`, or `GAC3`\n"
-                    f"ex: `{self.prefix}ctr jmk gac` for 5v5 GAC specific counters.\n",
+                    f"ex: `{self.prefix}ctr jmk gac` for 5v5 GAC specific counters.\n"
+                    f"  \n"
+                    f"Add `owned` to show only counters using units in your roster (see `{self.prefix}help roster`)\n"
+                    f"ex: `{self.prefix}ctr jmk owned` or `{self.prefix}ctr jmk gac owned`\n",
+
+            "search": f"**Searching Counters**\n"
+                      f"`{self.prefix}ctr search <words>` finds the counter tips whose squad or description best "
+                      f"match the words.\n"
+                      f"ex: `{self.prefix}ctr search bo katan` or `{self.prefix}ctr search gac3 wampa`\n",
+
+            "with": f"**Counters by Character**\n"
+                    f"`{self.prefix}ctr with <characters>` lists the squads and the counters that use all of the "
+                    f"characters, by name or nickname.\n"
+                    f"ex: `{self.prefix}ctr with jabba` or `{self.prefix}ctr with gk/cat`\n",
+
+            "vs": f"**Counters for an Opponent Team**\n"
+                  f"`{self.prefix}ctr vs <team>` finds the squads closest to the opponent team, leader first, and "
+                  f"shows their best counters.\n"
+                  f"ex: `{self.prefix}ctr vs jmk/cat/gk/padme/ahsoka`\n",
 
             "squad_header": f"**Adding and Editing Squads**\n"
                             f"To add or edit a squad use `add-squad` or `edit-squad` with the leader id.",
@@ -242,6 +287,14 @@ def generate_bot_help(command, ctx, help_section):
         elif com_name == "settings":
             response.append(f"A list of settings applied to the server and their current values. To edit server "
                             f"settings, you must have the permission role, then use `{ctx.prefix}settings edit`.")
+        elif com_name == "roster":
+            response.append(f"Registers the units you own for the Counter Holocron. Use `{ctx.prefix}roster set` "
+                            f"followed by your units, e.g. `{ctx.prefix}roster set jmk/cat/gk/padme/ahsoka`, or attach "
+                            f"a file listing them to import your whole roster. `add` and `remove` change single units, "
+                            f"`clear` drops the roster and `{ctx.prefix}roster` shows it.\n"
+                            f"Holocron Admins can import many members at once with `{ctx.prefix}roster bulk` and a "
+                            f"JSON file of member ids to their units.\n"
+                            f"Then `{ctx.prefix}ctr <leader> owned` shows only the counters you can run.")
         else:
             try:
                 response.extend(help_content[com_name].get_content(ctx.prefix, help_section))
@@ -0,0 +1,18 @@
+import discord
+
+menu_settings = {}
+
+# reactions add one emoji per api call, buttons arrive with the message
+menu_styles = ["reactions", "buttons"]
+
+
+def get_menu_style(guild_id) -> str:
+    return menu_settings.get(str(guild_id), menu_settings.get("0", "reactions"))
+
+
+def check_set_menu_style(message: discord.Message):
+    return message.content in menu_styles
+
+
+def set_menu_style(guild_id_key, style):
+    menu_settings[guild_id_key] = style
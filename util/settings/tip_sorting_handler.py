@@ -1,23 +1,60 @@
+import discord
+
 from entities.tip import Tip
 
+sorting_settings = {}
+
+sort_methods = ["recent", "oldest", "rating"]
+
+sort_titles = {
+    "recent": "Recent",
+    "oldest": "Oldest",
+    "rating": "Top rated",
+}
+
 
 def sort_tips(tips: list[Tip], sort_method="recent"):
-    if sort_method == "rating":
-        reverse = True
-        key = rating
-    elif sort_method == "oldest":
-        reverse = False
-        key = creation_time
-    else:  # sort_method == "recent"
-        reverse = True
-        key = creation_time
+    # sorts in place, for temporary lists. stored tips are read through ordered_tips instead
+    tips.sort(key=sort_keys.get(sort_method, recent))
+
+
+def ordered_tips(tips, sort_method="recent", limit=None) -> list[Tip]:
+    # the first limit tips, or all of them, in the requested order without reordering the stored list. TipLists keep
+    # the order maintained, so taking the top n is a slice rather than a sort, and database lists query just those
+    view = getattr(tips, "view", None)
+    if view is not None:
+        return view(sort_method, limit)
+    ordered = sorted(tips, key=sort_keys.get(sort_method, recent))
+    return ordered if limit is None else ordered[:limit]
+
+
+def get_sort_method(guild_id) -> str:
+    return sorting_settings.get(str(guild_id), sorting_settings.get("0", "recent"))
 
-    tips.sort(reverse=reverse, key=key)
 
+def check_set_sorting(message: discord.Message):
+    return message.content in sort_methods
 
-def creation_time(tip):
-    return tip.creation_time
+
+def set_sort_method(guild_id_key, method):
+    sorting_settings[guild_id_key] = method
+
+
+# keys ascend in display order. ties fall back to the newest tip first
+def recent(tip):
+    return -tip.creation_micros
+
+
+def oldest(tip):
+    return tip.creation_micros
 
 
 def rating(tip):
-    return tip.rating
+    return -tip.rating, -tip.creation_micros
+
+
+sort_keys = {
+    "recent": recent,
+    "oldest": oldest,
+    "rating": rating,
+}
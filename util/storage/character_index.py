@@ -0,0 +1,171 @@
+import heapq
+import math
+
+from entities.characters import normalize_words
+
+
+class CharacterIndex:
+    """
+    Counter squads and counter tips of one shard by the character ids in them, so the squads or counters with a set of
+    characters are an intersection of small sets rather than a scan of every squad string. Squads are kept by lead id
+    and counter tips by (lead id, tip key).
+
+    Each squad and each of its variants is also kept as a bitset, an int with one bit per character, so an opponent
+    team is ranked against every squad with a few integer operations per squad.
+    """
+
+    def __init__(self, characters):
+        self.characters = characters
+        self.squads = {}
+        self.tips = {}
+        # lead id -> the characters its squad was indexed under, to remove it when the squad is replaced
+        self.squad_units = {}
+        # character id -> bit and back. bits are handed out on first sight and kept until the index is rebuilt
+        self.unit_bits = {}
+        self.bit_units = {}
+        # lead id -> (bit of the lead character, bitsets of the squad and its variants)
+        self.squad_bitsets = {}
+        # bit -> weight of its character, and (bitset, its weight, lead bit, lead id) of every squad and variant.
+        # None until the next ranking after the squads change
+        self.bit_weights = None
+        self.lineups = None
+
+    @classmethod
+    def from_squads(cls, characters, squads):
+        # full scan, from the squads of a counter storage
+        index = cls(characters)
+        for squad in squads:
+            index.add_squad(squad)
+            for tip in squad.tips:
+                index.add_tip(squad.lead_id, tip)
+        return index
+
+    def get_bit(self, unit):
+        bit = self.unit_bits.get(unit)
+        if bit is None:
+            bit = self.unit_bits[unit] = 1 << len(self.unit_bits)
+            self.bit_units[bit] = unit
+        return bit
+
+    def to_bitset(self, units):
+        bitset = 0
+        for unit in units:
+            bitset |= self.get_bit(unit)
+        return bitset
+
+    def add_squad(self, squad):
+        self.remove_squad(squad.lead_id)
+        # a lead missing from the dictionary is named by its lead id, like reva
+        lead_units = self.characters.match_words(normalize_words(squad.lead), keep_unknown=False) or \
+            self.characters.match_words(normalize_words(squad.lead_id))
+        lineups = [self.characters.parse_squad(lineup) for lineup in [squad.squad, *squad.variants]]
+        # the lead, the squad and its variants all name characters of the squad
+        units = self.squad_units[squad.lead_id] = frozenset(lead_units).union(*lineups)
+        for unit in units:
+            self.squads.setdefault(unit, set()).add(squad.lead_id)
+
+        lead_bit = self.get_bit(lead_units[0]) if lead_units else 0
+        self.squad_bitsets[squad.lead_id] = (lead_bit, [self.to_bitset(lineup) | lead_bit for lineup in lineups])
+        self.bit_weights = self.lineups = None
+
+    def remove_squad(self, lead_id):
+        for unit in self.squad_units.pop(lead_id, ()):
+            lead_ids = self.squads[unit]
+            lead_ids.discard(lead_id)
+            if not lead_ids:
+                del self.squads[unit]
+        if self.squad_bitsets.pop(lead_id, None) is not None:
+            self.bit_weights = self.lineups = None
+
+    def add_tip(self, lead_id, tip):
+        entry = (lead_id, tip.get_key())
+        for unit in self.characters.parse_squad(tip.squad):
+            self.tips.setdefault(unit, set()).add(entry)
+
+    def remove_tip(self, lead_id, tip):
+        # a tip's squad is never edited, so it parses to the characters it was added under
+        entry = (lead_id, tip.get_key())
+        for unit in self.characters.parse_squad(tip.squad):
+            entries = self.tips.get(unit)
+            if entries is not None:
+                entries.discard(entry)
+                if not entries:
+                    del self.tips[unit]
+
+    @staticmethod
+    def intersect(sets, units):
+        # smallest set first, so the intersection never grows past it
+        found = sorted((sets.get(unit, set()) for unit in units), key=len)
+        if not found:
+            return set()
+        return found[0].intersection(*found[1:])
+
+    def find_squads(self, units):
+        return self.intersect(self.squads, units)
+
+    def find_tips(self, units):
+        return self.intersect(self.tips, units)
+
+    def unit_weight(self, unit):
+        # characters in few squads tell squads apart better than ones in many
+        return math.log(1 + len(self.squad_bitsets) / max(len(self.squads.get(unit, ())), 1))
+
+    def weigh(self, bitset):
+        weight = 0.0
+        bit_weights = self.bit_weights
+        while bitset:
+            bit = bitset & -bitset
+            weight += bit_weights[bit]
+            bitset ^= bit
+        return weight
+
+    def prepare_weights(self):
+        # weights depend on how many squads have each character, so they are worked out again after squads change
+        self.bit_weights = {bit: self.unit_weight(unit) for unit, bit in self.unit_bits.items()}
+        self.lineups = [(bitset, self.weigh(bitset), lead_bit, lead_id)
+                        for lead_id, (lead_bit, bitsets) in self.squad_bitsets.items() for bitset in bitsets]
+
+    def rank_squads(self, units, limit=5):
+        """
+        (match, lead id) of the squads most like a team, best first. match is the weighted Jaccard similarity of the
+        team and the squad or its closest variant, between 0 and 1, with the lead of each counted twice: the first
+        unit of the team and the lead of the squad.
+        """
+        if not units:
+            return []
+        if self.lineups is None:
+            self.prepare_weights()
+        bit_weights = self.bit_weights
+
+        team = 0
+        unknown_weight = 0.0
+        for unit in units:
+            bit = self.unit_bits.get(unit)
+            if bit is None:
+                # no squad has it, but it still makes the team less like every squad
+                unknown_weight += self.unit_weight(unit)
+            else:
+                team |= bit
+        team_lead = self.unit_bits.get(units[0], 0)
+        team_weight = self.weigh(team) + unknown_weight + self.unit_weight(units[0])
+
+        # squads share few distinct subsets of a team, so each is weighed once
+        shared_weights = {}
+        best = {}
+        for bitset, bitset_weight, lead_bit, lead_id in self.lineups:
+            shared = bitset & team
+            if not shared:
+                continue
+            shared_weight = shared_weights.get(shared)
+            if shared_weight is None:
+                shared_weight = shared_weights[shared] = self.weigh(shared)
+            union_weight = team_weight + bitset_weight - shared_weight
+            if lead_bit and lead_bit == team_lead:
+                shared_weight += bit_weights[lead_bit]
+            elif lead_bit:
+                union_weight += bit_weights[lead_bit]
+            match = shared_weight / union_weight
+            # a squad ranks by its closest lineup, the squad or one of its variants
+            if match > best.get(lead_id, 0.0):
+                best[lead_id] = match
+        return heapq.nlargest(limit, ((match, lead_id) for lead_id, match in best.items()))
@@ -0,0 +1,127 @@
+import contextvars
+from collections import OrderedDict
+
+from util.storage.journal import TipJournal
+
+# guild whose storage the running command or reaction works on. each discord event runs in its own task, so setting
+# it at the start of a handler scopes it to that handler. 0 is used outside of guilds, like the default prefix
+current_guild_id = contextvars.ContextVar("current_guild_id", default=0)
+
+# rough in-memory cost of a tip beyond its content: the object, its dict, datetime and list slot
+TIP_OVERHEAD_BYTES = 400
+
+
+def guild_key(guild):
+    return guild.id if guild else 0
+
+
+def estimate_tip_bytes(tip):
+    return TIP_OVERHEAD_BYTES + len(tip.content)
+
+
+def estimate_storage_bytes(storage):
+    total = 0
+    for value in storage.values():
+        if isinstance(value, dict):
+            total += estimate_storage_bytes(value)
+        elif isinstance(value, list):
+            total += sum(estimate_tip_bytes(tip) for tip in value)
+        elif isinstance(getattr(value, "tips", None), list):
+            # counter squads carry their own tips
+            total += TIP_OVERHEAD_BYTES + sum(estimate_tip_bytes(tip) for tip in value.tips)
+        else:
+            total += TIP_OVERHEAD_BYTES
+    return total
+
+
+class StorageShard:
+    """
+    One guild's tips for one Holocron, with its own snapshot file, journal and snapshot request.
+    """
+
+    def __init__(self, holocron_name, guild_id):
+        self.guild_id = guild_id
+        self.storage_filepath = f"data/{holocron_name}/guilds/{guild_id}_storage.snapshot"
+        self.journal = TipJournal(f"data/{holocron_name}/guilds/{guild_id}_journal.pckl")
+        # key for the shard's rows when using the sqlite backend
+        self.namespace = f"{holocron_name}:{guild_id}"
+        self.tip_storage = None
+        self.labels = None
+        self.snapshot_requested = False
+        # (journal seq, frozen storage) taken for the storage writer, until it is written
+        self.pending_snapshot = None
+        self.memory_estimate = 0
+        # storage address -> tips, TipStats and UserTipIndex, kept current by each change. None until their next
+        # read rebuilds them from a full scan
+        self.address_tips = None
+        self.stats = None
+        self.user_tips = None
+        # (name, lead id) of each counter squad in listing order
+        self.squad_order = None
+        # SearchIndex over the tips, by (storage address, tip key)
+        self.search_index = None
+        # CharacterIndex of counter squads and counter tips
+        self.character_index = None
+        # storage address -> {render key: message} of formatted tip reads. an address is dropped when it changes,
+        # and everything with a bulk change
+        self.rendered_tips = {}
+
+    def reset_indexes(self):
+        self.address_tips = None
+        self.stats = None
+        self.user_tips = None
+        self.squad_order = None
+        self.search_index = None
+        self.character_index = None
+        self.rendered_tips = {}
+
+
+class ShardCache:
+    """
+    Least recently used set of loaded shards. Shards are loaded on first use and the oldest ones are dropped from
+    memory once the estimated total passes memory_budget bytes. can_evict guards shards with unwritten changes.
+    """
+
+    def __init__(self, holocron_name, load_shard, can_evict, memory_budget):
+        self.holocron_name = holocron_name
+        self.load_shard = load_shard
+        self.can_evict = can_evict
+        self.memory_budget = memory_budget
+        self.shards = OrderedDict()
+        self.load_count = 0
+        self.evict_count = 0
+
+    def get(self, guild_id) -> StorageShard:
+        shard = self.shards.get(guild_id)
+        if shard is not None:
+            self.shards.move_to_end(guild_id)
+            return shard
+
+        # registered before loading so journal replay, which reads storage through the cache, finds it
+        shard = self.shards[guild_id] = StorageShard(self.holocron_name, guild_id)
+        try:
+            self.load_shard(shard)
+        except Exception:
+            del self.shards[guild_id]
+            raise
+        self.load_count += 1
+        self.evict(keep=guild_id)
+        return shard
+
+    def memory_usage(self):
+        return sum(shard.memory_estimate for shard in self.shards.values())
+
+    def evict(self, keep=None):
+        usage = self.memory_usage()
+        for guild_id, shard in list(self.shards.items()):
+            if usage <= self.memory_budget:
+                break
+            if guild_id == keep or not self.can_evict(shard):
+                continue
+            del self.shards[guild_id]
+            shard.journal.close()
+            usage -= shard.memory_estimate
+            self.evict_count += 1
+
+    def loaded(self):
+        return list(self.shards.values())
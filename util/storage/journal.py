@@ -0,0 +1,81 @@
+import os
+import pickle
+from collections import deque
+
+
+class TipJournal:
+    """
+    Append-only record of storage mutations. Each change is serialized as one small (seq, op, address, payload)
+    record and queued, then written and fsynced in groups by the Holocron's storage writer. The journal is folded
+    into a fresh snapshot when the Holocron compacts its storage.
+    """
+
+    ADD = "add"
+    EDIT = "edit"
+    DELETE = "delete"
+    REASSIGN = "reassign"
+    SQUAD = "squad"
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.seq = 0
+        self.record_count = 0
+        # serialized records waiting for the writer. deque appends and pops are safe across the writer thread
+        self.pending = deque()
+        self.journal_file = None
+
+    def append(self, op, address, payload):
+        self.seq += 1
+        self.pending.append(pickle.dumps((self.seq, op, address, payload)))
+        self.record_count += 1
+
+    def write_pending(self):
+        if not self.pending:
+            return
+        if self.journal_file is None:
+            self.journal_file = open(self.filepath, "ab")
+
+        while self.pending:
+            self.journal_file.write(self.pending.popleft())
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+    def load(self, after_seq=0):
+        # returns the records newer than after_seq. a torn record left by a crash mid-write is cut off so later
+        # appends are not stranded behind it
+        self.seq = after_seq
+        records = []
+        if not os.path.exists(self.filepath):
+            return records
+
+        with open(self.filepath, "rb+") as journal_file:
+            valid_end = 0
+            while True:
+                try:
+                    record = pickle.load(journal_file)
+                except (EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError, IndexError):
+                    # clean end of the journal or a torn tail, either way nothing valid follows
+                    journal_file.truncate(valid_end)
+                    break
+
+                valid_end = journal_file.tell()
+                seq = record[0]
+                if seq > after_seq:
+                    records.append(record)
+                    self.seq = seq
+
+        self.record_count = len(records)
+        return records
+
+    def reset(self):
+        # called once a snapshot containing every written record exists. records still pending are kept
+        self.close()
+        with open(self.filepath, "wb"):
+            pass
+        self.record_count = len(self.pending)
+
+    def close(self):
+        if self.journal_file is None:
+            return
+        self.journal_file.close()
+        self.journal_file = None
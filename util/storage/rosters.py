@@ -0,0 +1,113 @@
+"""
+Description: the units each member owns, registered with `roster` and used to show only the counters they can run.
+
+A roster is a bitset, an int with one bit per unit. Bits are numbered by a unit table that only grows, saved with the
+rosters, so a saved roster keeps its meaning when characters are added to the dictionary. Rosters are saved as base64
+of the bitset bytes, a few dozen characters per member.
+"""
+import base64
+import json
+import os
+
+rosters_filepath = os.environ.get("HOLOCRON_ROSTERS", "data/counter/rosters.json")
+
+
+def encode_bitset(bitset):
+    return base64.b64encode(bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")).decode("ascii")
+
+
+def decode_bitset(text):
+    return int.from_bytes(base64.b64decode(text), "little")
+
+
+class RosterStore:
+    def __init__(self):
+        self.units = []
+        self.unit_bits = {}
+        # user id -> bitset of owned units
+        self.rosters = {}
+        # squad text -> bitset of its units, or None if it has a unit nobody has registered
+        self.squad_bitsets = {}
+
+    def __len__(self):
+        return len(self.rosters)
+
+    def get_bit(self, unit):
+        bit = self.unit_bits.get(unit)
+        if bit is None:
+            bit = self.unit_bits[unit] = 1 << len(self.units)
+            self.units.append(unit)
+            # squads that had an unregistered unit may now be ownable
+            self.squad_bitsets.clear()
+        return bit
+
+    def to_bitset(self, units):
+        bitset = 0
+        for unit in units:
+            bitset |= self.get_bit(unit)
+        return bitset
+
+    def to_units(self, bitset):
+        return [unit for unit, bit in self.unit_bits.items() if bitset & bit]
+
+    def get(self, user_id):
+        return self.rosters.get(user_id)
+
+    def set_roster(self, user_id, units):
+        # replaces the whole roster, as on a fresh import
+        self.rosters[user_id] = self.to_bitset(units)
+
+    def add_units(self, user_id, units):
+        self.rosters[user_id] = self.rosters.get(user_id, 0) | self.to_bitset(units)
+
+    def remove_units(self, user_id, units):
+        if user_id in self.rosters:
+            self.rosters[user_id] &= ~self.to_bitset(units)
+
+    def remove_roster(self, user_id):
+        return self.rosters.pop(user_id, None) is not None
+
+    def bulk_import(self, rosters):
+        # user id -> units for many members at once, each replacing that member's roster
+        for user_id, units in rosters.items():
+            self.set_roster(user_id, units)
+        return len(rosters)
+
+    def squad_bitset(self, squad, characters):
+        if squad in self.squad_bitsets:
+            return self.squad_bitsets[squad]
+        bits = [self.unit_bits.get(unit) for unit in characters.parse_squad(squad)]
+        bitset = self.squad_bitsets[squad] = None if None in bits else sum(bits)
+        return bitset
+
+    def filter_owned(self, tips, roster, characters):
+        # the tips whose squads the roster owns every unit of. squads with no recognised units are kept
+        owned = []
+        for tip in tips:
+            bitset = self.squad_bitset(tip.squad, characters)
+            if bitset is not None and not bitset & ~roster:
+                owned.append(tip)
+        return owned
+
+    def save(self, filepath=rosters_filepath):
+        temp_filepath = f"{filepath}.tmp"
+        with open(temp_filepath, "w", encoding="utf-8") as rosters_file:
+            json.dump({
+                "units": self.units,
+                "rosters": {str(user_id): encode_bitset(bitset) for user_id, bitset in self.rosters.items()},
+            }, rosters_file)
+        os.replace(temp_filepath, filepath)
+
+    def load(self, filepath=rosters_filepath):
+        if not os.path.exists(filepath):
+            return
+        with open(filepath, encoding="utf-8") as rosters_file:
+            saved = json.load(rosters_file)
+        self.units = []
+        self.unit_bits = {}
+        for unit in saved["units"]:
+            self.get_bit(unit)
+        self.rosters = {int(user_id): decode_bitset(text) for user_id, text in saved["rosters"].items()}
+
+
+rosters = RosterStore()
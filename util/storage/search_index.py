@@ -0,0 +1,258 @@
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from operator import itemgetter
+
+token_pattern = re.compile(r"[a-z0-9]+")
+# words too common in tips to tell them apart
+stop_words = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "if", "in", "is", "it", "its",
+    "of", "on", "or", "so", "that", "the", "them", "then", "they", "this", "to", "was", "will", "with", "you", "your",
+])
+
+
+def tokenize(text):
+    return [token for token in token_pattern.findall(text.lower()) if token not in stop_words]
+
+
+class Tier:
+    """
+    The champions of a long posting, the documents where the term weighs most, and for each term count among the
+    rest the shortest document with it. Covers the posting up to position, later documents are scored in full.
+    """
+    __slots__ = ("champions", "bounds", "position")
+
+    def __init__(self, champions, bounds, position):
+        self.champions = champions
+        self.bounds = bounds
+        self.position = position
+
+
+class SearchIndex:
+    """
+    Inverted index ranked with BM25. Documents are added and removed one at a time under a key, and hold any item,
+    like a tip and its address. Each term keeps arrays of document ids, in increasing order, and term counts. Removed
+    documents are left in those arrays, skipped by their zero length, until compact() drops them.
+
+    Terms in many documents get a Tier, so a query scores their champions and the documents sharing several query
+    terms rather than every document with the term. The result is exact: when the documents left out could still
+    make the results, the query scores them all.
+    """
+    k1 = 1.2
+    b = 0.75
+    # postings longer than this are tiered, keeping this many champions
+    tier_threshold = 4096
+    champion_count = 512
+
+    def __init__(self):
+        # term -> (document ids, term counts)
+        self.postings = {}
+        self.tiers = {}
+        # document id -> item, None once removed, and the number of terms in it, 0 once removed
+        self.items = []
+        self.lengths = array("I")
+        self.doc_ids = {}
+        self.total_length = 0
+        self.removed_count = 0
+        # changes made while a compaction runs elsewhere, None when none is running
+        self.pending_changes = None
+
+    @classmethod
+    def from_documents(cls, documents):
+        # full build, from (key, item, text) triples
+        index = cls()
+        for key, item, text in documents:
+            index.add(key, item, text)
+        return index
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add(self, key, item, text):
+        if key in self.doc_ids:
+            self.remove(key)
+        if self.pending_changes is not None:
+            self.pending_changes.append(("add", key, item, text))
+        tokens = tokenize(text)
+        doc_id = len(self.items)
+        self.doc_ids[key] = doc_id
+        self.items.append(item)
+        self.lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("I"), array("H"))
+            posting[0].append(doc_id)
+            posting[1].append(min(count, 0xFFFF))
+
+    def remove(self, key):
+        if self.pending_changes is not None:
+            self.pending_changes.append(("remove", key))
+        doc_id = self.doc_ids.pop(key, None)
+        if doc_id is None:
+            return
+        self.total_length -= self.lengths[doc_id]
+        self.lengths[doc_id] = 0
+        self.items[doc_id] = None
+        self.removed_count += 1
+
+    def needs_compaction(self):
+        return self.pending_changes is None and self.removed_count > 1024 and self.removed_count > len(self.doc_ids) // 4
+
+    def compact(self):
+        # renumbers the live documents and drops the removed ones from every posting
+        self.install(self.build_compacted(*self.freeze()))
+
+    def begin_compaction(self):
+        # for compacting on another thread: what the rebuild reads, frozen, while changes from here on are logged
+        # to replay over its result
+        self.pending_changes = []
+        return self.freeze()
+
+    def finish_compaction(self, compacted):
+        changes, self.pending_changes = self.pending_changes, None
+        self.install(compacted)
+        for change in changes:
+            if change[0] == "add":
+                self.add(*change[1:])
+            else:
+                self.remove(change[1])
+
+    def cancel_compaction(self):
+        # the changes are already in the index, only the log is dropped
+        self.pending_changes = None
+
+    def freeze(self):
+        # postings only ever grow at the end, so each is read up to its current length
+        live = sorted(self.doc_ids.items(), key=itemgetter(1))
+        postings = {token: (ids, counts, len(ids)) for token, (ids, counts) in self.postings.items()}
+        return live, postings, list(self.items), array("I", self.lengths)
+
+    @staticmethod
+    def build_compacted(live, postings, items, lengths):
+        new_ids = {old_id: new_id for new_id, (key, old_id) in enumerate(live)}
+        compacted = {}
+        for token, (ids, counts, end) in postings.items():
+            kept = [(new_ids[doc_id], count) for doc_id, count in zip(ids[:end], counts[:end]) if doc_id in new_ids]
+            if kept:
+                compacted[token] = (array("I", [doc_id for doc_id, count in kept]),
+                                    array("H", [count for doc_id, count in kept]))
+        return (compacted, [items[old_id] for key, old_id in live],
+                array("I", [lengths[old_id] for key, old_id in live]),
+                {key: new_id for new_id, (key, old_id) in enumerate(live)})
+
+    def install(self, compacted):
+        self.postings, self.items, self.lengths, self.doc_ids = compacted
+        self.total_length = sum(self.lengths)
+        self.tiers.clear()
+        self.removed_count = 0
+
+    def weight(self, count, length, average_length):
+        # the BM25 weight of a term count in a document, before idf
+        return count * (self.k1 + 1) / (count + self.k1 * (1 - self.b + self.b * length / average_length))
+
+    def get_tier(self, token, average_length):
+        ids, counts = self.postings[token]
+        tier = self.tiers.get(token)
+        if tier is not None and len(ids) - tier.position <= self.champion_count:
+            return tier
+
+        lengths = self.lengths
+        ranked = heapq.nlargest(self.champion_count, range(len(ids)),
+                                key=lambda index: self.weight(counts[index], lengths[ids[index]] or 1 << 30,
+                                                              average_length))
+        champions = set(ranked)
+        shortest = {}
+        for index, (doc_id, count) in enumerate(zip(ids, counts)):
+            length = lengths[doc_id]
+            if length and index not in champions and length < shortest.get(count, 1 << 30):
+                shortest[count] = length
+        tier = self.tiers[token] = Tier([ids[index] for index in ranked], list(shortest.items()), len(ids))
+        return tier
+
+    def search(self, query, limit=10):
+        # (item, score) for the best matches, best first
+        document_count = len(self.doc_ids)
+        if not document_count:
+            return []
+        average_length = self.total_length / document_count or 1
+
+        idfs = {}
+        for token in set(tokenize(query)):
+            posting = self.postings.get(token)
+            if posting is not None:
+                # removed documents still count towards the frequency until the next compaction
+                frequency = min(len(posting[0]), document_count)
+                idfs[token] = math.log(1 + (document_count - frequency + 0.5) / (frequency + 0.5))
+
+        if any(len(self.postings[token][0]) > self.tier_threshold for token in idfs):
+            best = self.search_tiers(idfs, limit, average_length)
+        else:
+            best = None
+        if best is None:
+            best = self.search_all(idfs, limit, average_length)
+        return [(self.items[doc_id], score) for doc_id, score in best]
+
+    def search_tiers(self, idfs, limit, average_length):
+        # scores only the champions, the documents with more than one query term and those with an untiered term.
+        # returns None if a document with just one tiered term outside its champions could still make the results
+        candidates = set()
+        tiered = []
+        bound = 0.0
+        for token, idf in idfs.items():
+            ids = self.postings[token][0]
+            if len(ids) <= self.tier_threshold:
+                candidates.update(ids)
+                continue
+            tier = self.get_tier(token, average_length)
+            candidates.update(tier.champions)
+            candidates.update(ids[tier.position:])
+            tiered.append(ids)
+            bound = max(bound, idf * max((self.weight(count, length, average_length) for count, length in tier.bounds),
+                                         default=0.0))
+        tiered.sort(key=len)
+        for position, ids in enumerate(tiered):
+            for other_ids in tiered[position + 1:]:
+                candidates.update(set(ids).intersection(other_ids))
+
+        lengths = self.lengths
+        k1, b = self.k1, self.b
+        postings = [(idf, *self.postings[token]) for token, idf in idfs.items()]
+        scores = {}
+        for doc_id in candidates:
+            length = lengths[doc_id]
+            if not length:
+                continue
+            length_norm = k1 * (1 - b + b * length / average_length)
+            score = 0.0
+            for idf, ids, counts in postings:
+                index = bisect_left(ids, doc_id)
+                if index < len(ids) and ids[index] == doc_id:
+                    count = counts[index]
+                    score += idf * count * (k1 + 1) / (count + length_norm)
+            scores[doc_id] = score
+        best = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        if bound and (len(best) < limit or best[-1][1] < bound):
+            return None
+        return best
+
+    def search_all(self, idfs, limit, average_length):
+        lengths = self.lengths
+        k1, b = self.k1, self.b
+        scores = {}
+        for token, idf in idfs.items():
+            ids, counts = self.postings[token]
+            length_weight = k1 * b / average_length
+            for doc_id, count in zip(ids, counts):
+                length = lengths[doc_id]
+                if length:
+                    scores[doc_id] = scores.get(doc_id, 0.0) + \
+                        idf * count * (k1 + 1) / (count + k1 * (1 - b) + length_weight * length)
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
@@ -0,0 +1,98 @@
+"""
+Description: immutable, compressed archives of a Holocron's tips, written when a season's storage is cleared
+
+Layout (little endian):
+    header      magic "HLCA", u16 version, u32 index length
+    index       utf-8 json list with one entry per address: address, location name, feat text at archive time,
+                tip count, and the offset and length of its block
+    blocks      one lzma compressed snapshot per address, holding that address' tips
+
+Reading an address only decompresses its own block, so an archived season costs nothing until it is read.
+"""
+import io
+import json
+import lzma
+import os
+import struct
+
+from util.storage import snapshot as snapshot_format
+
+MAGIC = b"HLCA"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+
+class ArchiveFormatError(Exception):
+    pass
+
+
+class ArchiveEntry:
+    def __init__(self, address, name, detail, tip_count, offset, length):
+        self.address = address
+        self.name = name
+        self.detail = detail
+        self.tip_count = tip_count
+        self.offset = offset
+        self.length = length
+
+    def matches(self, text: str):
+        return text in self.detail.lower() or text in self.name.lower()
+
+
+def write_archive(filepath, season, locations):
+    # locations are (address, location name, feat text, tips). the file is written once and never modified
+    index = []
+    blocks = []
+    offset = 0
+    for address, name, detail, tips in locations:
+        block = lzma.compress(snapshot_format.dumps({"tips": list(tips)}))
+        index.append({"address": address, "name": name, "detail": detail, "tip_count": len(tips),
+                      "offset": offset, "length": len(block)})
+        blocks.append(block)
+        offset += len(block)
+
+    index_bytes = json.dumps({"season": season, "locations": index}).encode()
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    temp_filepath = f"{filepath}.tmp"
+    with open(temp_filepath, "wb") as archive_file:
+        archive_file.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+        archive_file.write(index_bytes)
+        for block in blocks:
+            archive_file.write(block)
+        archive_file.flush()
+        os.fsync(archive_file.fileno())
+    os.replace(temp_filepath, filepath)
+
+
+class SeasonArchive:
+    """
+    Read access to one archived season. Only the index is read when opened, tips are read block by block.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with open(filepath, "rb") as archive_file:
+            magic, version, index_length = HEADER.unpack(archive_file.read(HEADER.size))
+            if magic != MAGIC:
+                raise ArchiveFormatError("Not a Holocron season archive")
+            if version > VERSION:
+                raise ArchiveFormatError(f"Archive version {version} is newer than supported version {VERSION}")
+            index = json.loads(archive_file.read(index_length))
+
+        self.blocks_start = HEADER.size + index_length
+        self.season = index["season"]
+        self.entries = {entry["address"]: ArchiveEntry(**entry) for entry in index["locations"]}
+
+    def find(self, query: str):
+        # an address, or else every location whose feat text or name contains the query
+        entry = self.entries.get(query)
+        if entry:
+            return [entry]
+        return [entry for entry in self.entries.values() if entry.matches(query)]
+
+    def read_tips(self, entry: ArchiveEntry):
+        with open(self.filepath, "rb") as archive_file:
+            archive_file.seek(self.blocks_start + entry.offset)
+            block = archive_file.read(entry.length)
+        seq, storage = snapshot_format.load(io.BytesIO(lzma.decompress(block)))
+        return storage["tips"]
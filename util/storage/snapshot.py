@@ -0,0 +1,319 @@
+"""
+Description: versioned binary snapshot format for Holocron tip storage
+
+Layout (little endian):
+    header      magic "HLCS", u16 version, u64 journal seq, u32 string count
+    strings     u32 byte length + utf-8 bytes, for every author, squad, activity and storage key
+    body        one tagged entry per storage item, nested sections closed by an END tag
+
+Each list of tips is a block of fixed-width records (creation time, user id, rating, flags, author, squad and
+activity indices, content length) followed by one blob holding the contents. Loading builds tips field by field and
+never resolves classes by module path the way unpickling does.
+"""
+import copy
+import gc
+import pickle
+import struct
+import sys
+
+from entities import tip as tip_module
+from entities.counters import Squad, CounterTip, Alias
+from entities.tip import Tip
+from util.storage.tip_list import TipList, to_tip_lists
+
+MAGIC = b"HLCS"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHQI")
+LENGTH = struct.Struct("<I")
+TAG = struct.Struct("<B")
+KEY = struct.Struct("<BI")
+COUNT = struct.Struct("<I")
+# creation time (us since epoch), user id, rating, flags, author, squad, activity, content length
+TIP = struct.Struct("<qQiBIIII")
+# creation time, user id, flags, lead id, lead, squad, author, variant count
+SQUAD = struct.Struct("<qQBIIIIH")
+# creation time, user id, alias, squad lead id, author
+ALIAS = struct.Struct("<qQIII")
+
+TAG_END = 0
+TAG_SECTION = 1
+TAG_TIPS = 2
+TAG_SQUAD = 3
+TAG_ALIAS = 4
+
+KEY_INT = 0
+KEY_STR = 1
+
+FLAG_EDITED = 1
+FLAG_COUNTER = 2
+
+NO_STRING = 0xFFFFFFFF
+
+
+class SnapshotFormatError(Exception):
+    pass
+
+
+def is_snapshot(header_bytes: bytes):
+    return header_bytes.startswith(MAGIC)
+
+
+class FrozenTips(list):
+    """
+    The fields of a list of tips, (creation time, user id, rating, flags, author, squad, activity, content) per tip,
+    taken at one moment so the tips can be written while the live ones keep changing.
+    """
+    __slots__ = ()
+
+
+def freeze_tips(tips) -> FrozenTips:
+    records = FrozenTips()
+    for tip in tips:
+        if isinstance(tip, CounterTip):
+            flags, squad, activity = FLAG_COUNTER, tip.squad, tip.activity
+        else:
+            flags, squad, activity = 0, None, None
+        if tip.edited:
+            flags |= FLAG_EDITED
+        records.append((tip.creation_micros, tip.user_id or 0, tip.rating, flags, tip.author, squad, activity,
+                        tip.content))
+    return records
+
+
+def freeze(storage: dict) -> dict:
+    # a copy of the storage tree that later changes to it do not reach, for dumps on another thread. sections are
+    # copied, tips are frozen and squads and aliases are copied field by field
+    frozen = {}
+    for key, value in storage.items():
+        if isinstance(value, dict):
+            frozen[key] = freeze(value)
+        elif isinstance(value, (Squad, Alias)):
+            frozen[key] = copy.copy(value)
+            if isinstance(value, Squad):
+                frozen[key].variants = list(value.variants)
+                frozen[key].tips = freeze_tips(value.tips)
+        else:
+            frozen[key] = freeze_tips(value)
+    return frozen
+
+
+class SnapshotWriter:
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+
+    def string_index(self, value):
+        if value is None:
+            return NO_STRING
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def write_key(self, key):
+        if isinstance(key, int):
+            self.body += KEY.pack(KEY_INT, key)
+        else:
+            self.body += KEY.pack(KEY_STR, self.string_index(key))
+
+    def write_section(self, section: dict):
+        for key, value in section.items():
+            if isinstance(value, dict):
+                self.body += TAG.pack(TAG_SECTION)
+                self.write_key(key)
+                self.write_section(value)
+            elif isinstance(value, Squad):
+                self.body += TAG.pack(TAG_SQUAD)
+                self.write_key(key)
+                self.write_squad(value)
+            elif isinstance(value, Alias):
+                self.body += TAG.pack(TAG_ALIAS)
+                self.write_key(key)
+                self.write_alias(value)
+            else:
+                self.body += TAG.pack(TAG_TIPS)
+                self.write_key(key)
+                self.write_tips(value)
+        self.body += TAG.pack(TAG_END)
+
+    def write_tips(self, tips):
+        records = tips if isinstance(tips, FrozenTips) else freeze_tips(tips)
+        self.body += COUNT.pack(len(records))
+        contents = []
+        for creation_micros, user_id, rating, flags, author, squad, activity, content in records:
+            content = content.encode()
+            contents.append(content)
+            self.body += TIP.pack(creation_micros, user_id, rating, flags, self.string_index(author),
+                                  self.string_index(squad), self.string_index(activity), len(content))
+
+        blob = b"".join(contents)
+        self.body += LENGTH.pack(len(blob))
+        self.body += blob
+
+    def write_squad(self, squad: Squad):
+        self.body += SQUAD.pack(squad.creation_micros, squad.user_id or 0,
+                                FLAG_EDITED if squad.edited else 0, self.string_index(squad.lead_id),
+                                self.string_index(squad.lead), self.string_index(squad.squad),
+                                self.string_index(squad.author), len(squad.variants))
+        for variant in squad.variants:
+            self.body += LENGTH.pack(self.string_index(variant))
+        self.write_tips(squad.tips)
+
+    def write_alias(self, alias: Alias):
+        self.body += ALIAS.pack(alias.creation_micros, alias.user_id or 0, self.string_index(alias.alias),
+                                self.string_index(alias.squad_lead_id), self.string_index(alias.author))
+
+    def dumps(self, storage: dict, seq=0) -> bytes:
+        self.write_section(storage)
+        output = bytearray(HEADER.pack(MAGIC, VERSION, seq, len(self.strings)))
+        for value in self.strings:
+            encoded = value.encode()
+            output += LENGTH.pack(len(encoded))
+            output += encoded
+        output += self.body
+        return bytes(output)
+
+
+class SnapshotReader:
+    def __init__(self, snapshot_file, chunk_size=1 << 20):
+        self.snapshot_file = snapshot_file
+        self.chunk_size = chunk_size
+        self.buffer = b""
+        self.offset = 0
+        self.strings = []
+
+    def read(self, size):
+        # refills from the file in chunks so the whole snapshot never has to be in memory at once
+        if self.offset + size > len(self.buffer):
+            chunk = self.snapshot_file.read(max(size, self.chunk_size))
+            self.buffer = self.buffer[self.offset:] + chunk
+            self.offset = 0
+            if size > len(self.buffer):
+                raise SnapshotFormatError("Snapshot ended unexpectedly")
+        start = self.offset
+        self.offset += size
+        return self.buffer[start:start + size]
+
+    def unpack(self, record: struct.Struct):
+        return record.unpack(self.read(record.size))
+
+    def string(self, index):
+        return None if index == NO_STRING else self.strings[index]
+
+    def read_key(self):
+        key_type, value = self.unpack(KEY)
+        return value if key_type == KEY_INT else self.strings[value]
+
+    def load(self):
+        magic, version, seq, string_count = self.unpack(HEADER)
+        if magic != MAGIC:
+            raise SnapshotFormatError("Not a Holocron snapshot")
+        if version > VERSION:
+            raise SnapshotFormatError(f"Snapshot version {version} is newer than supported version {VERSION}")
+
+        for _ in range(string_count):
+            length, = self.unpack(LENGTH)
+            # interned so loaded tips share author and squad strings with newly added ones
+            self.strings.append(sys.intern(self.read(length).decode()))
+
+        return seq, self.read_section()
+
+    def read_section(self):
+        section = {}
+        while True:
+            tag, = self.unpack(TAG)
+            if tag == TAG_END:
+                return section
+
+            key = self.read_key()
+            if tag == TAG_SECTION:
+                section[key] = self.read_section()
+            elif tag == TAG_TIPS:
+                section[key] = self.read_tips()
+            elif tag == TAG_SQUAD:
+                section[key] = self.read_squad()
+            elif tag == TAG_ALIAS:
+                section[key] = self.read_alias()
+            else:
+                raise SnapshotFormatError(f"Unknown snapshot entry tag {tag}")
+
+    def read_tips(self):
+        count, = self.unpack(COUNT)
+        records = self.read(TIP.size * count)
+        blob_length, = self.unpack(LENGTH)
+        blob = self.read(blob_length)
+
+        tips = TipList()
+        string = self.string
+        new_tip = object.__new__
+        offset = 0
+        for creation_micros, user_id, rating, flags, author, squad, activity, length in TIP.iter_unpack(records):
+            if flags & FLAG_COUNTER:
+                tip = new_tip(CounterTip)
+                tip.squad = string(squad)
+                tip.activity = string(activity)
+            else:
+                tip = new_tip(Tip)
+            tip.content = blob[offset:offset + length].decode()
+            tip.author = string(author)
+            tip.rating = rating
+            tip.user_id = user_id
+            tip.creation_micros = creation_micros
+            tip.edited = bool(flags & FLAG_EDITED)
+            list.append(tips, tip)
+            offset += length
+        return tips
+
+    def read_squad(self):
+        creation_micros, user_id, flags, lead_id, lead, squad_text, author, variant_count = self.unpack(SQUAD)
+        variants = [self.string(self.unpack(LENGTH)[0]) for _ in range(variant_count)]
+        squad = Squad.__new__(Squad)
+        squad.lead_id = self.string(lead_id)
+        squad.lead = self.string(lead)
+        squad.squad = self.string(squad_text)
+        squad.variants = variants
+        squad.author = self.string(author)
+        squad.user_id = user_id
+        squad.edited = bool(flags & FLAG_EDITED)
+        squad.creation_micros = creation_micros
+        squad.tips = self.read_tips()
+        return squad
+
+    def read_alias(self):
+        creation_micros, user_id, alias_key, squad_lead_id, author = self.unpack(ALIAS)
+        alias = Alias.__new__(Alias)
+        alias.alias = self.string(alias_key)
+        alias.squad_lead_id = self.string(squad_lead_id)
+        alias.author = self.string(author)
+        alias.user_id = user_id
+        alias.creation_micros = creation_micros
+        return alias
+
+
+def dumps(storage: dict, seq=0) -> bytes:
+    return SnapshotWriter().dumps(storage, seq)
+
+
+def load(snapshot_file):
+    # returns (journal seq, storage). every object built here stays alive, so the cyclic collector is paused instead
+    # of repeatedly scanning the growing tree
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return SnapshotReader(snapshot_file).load()
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def load_legacy(storage_file):
+    # pickled storage from before the snapshot format. the oldest files pickled tips as data.Tip
+    sys.modules.setdefault('data.Tip', tip_module)
+    seq = 0
+    storage = pickle.load(storage_file)
+    if isinstance(storage, int):
+        # pickles written alongside the journal lead with the last journal seq they contain
+        seq = storage
+        storage = pickle.load(storage_file)
+    return seq, to_tip_lists(storage)
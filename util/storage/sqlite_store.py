@@ -0,0 +1,529 @@
+import datetime
+import json
+import sqlite3
+import weakref
+
+from entities.counters import Squad, CounterTip, Alias
+from entities.tip import Tip
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tips (
+    id INTEGER PRIMARY KEY,
+    holocron TEXT NOT NULL,
+    address TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content TEXT NOT NULL,
+    author TEXT,
+    user_id INTEGER,
+    rating INTEGER NOT NULL DEFAULT 0,
+    edited INTEGER NOT NULL DEFAULT 0,
+    creation_time TEXT NOT NULL,
+    squad TEXT,
+    activity TEXT
+);
+CREATE INDEX IF NOT EXISTS tips_address ON tips (holocron, address);
+CREATE INDEX IF NOT EXISTS tips_user_id ON tips (user_id);
+CREATE INDEX IF NOT EXISTS tips_creation_time ON tips (creation_time);
+CREATE INDEX IF NOT EXISTS tips_address_time ON tips (holocron, address, creation_time);
+
+CREATE TABLE IF NOT EXISTS squads (
+    holocron TEXT NOT NULL,
+    lead_id TEXT NOT NULL,
+    lead TEXT NOT NULL,
+    squad TEXT NOT NULL,
+    variants TEXT NOT NULL,
+    author TEXT,
+    user_id INTEGER,
+    edited INTEGER NOT NULL DEFAULT 0,
+    creation_time TEXT NOT NULL,
+    PRIMARY KEY (holocron, lead_id)
+);
+CREATE INDEX IF NOT EXISTS squads_user_id ON squads (user_id);
+
+CREATE TABLE IF NOT EXISTS aliases (
+    holocron TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    squad_lead_id TEXT NOT NULL,
+    author TEXT,
+    user_id INTEGER,
+    creation_time TEXT NOT NULL,
+    PRIMARY KEY (holocron, alias)
+);
+
+CREATE TABLE IF NOT EXISTS migrations (
+    holocron TEXT PRIMARY KEY,
+    migration_time TEXT NOT NULL
+);
+"""
+
+TIP_COLUMNS = "id, kind, content, author, user_id, rating, edited, creation_time, squad, activity"
+# ORDER BY for each sort method, matching sort_keys. ties keep insertion order, as a stable sort of the rows would
+TIP_ORDERS = {
+    "recent": "creation_time DESC, id",
+    "oldest": "creation_time, id",
+    "rating": "rating DESC, creation_time DESC, id",
+}
+
+
+def join_address(path, key):
+    return f"{path}/{key}" if path else str(key)
+
+
+def split_key(segment: str):
+    # storage keys are either section names or 1-based indices
+    return int(segment) if segment.isdigit() else segment
+
+
+class SqliteTipStore:
+    """
+    Row based storage for Holocron tips, squads and aliases. Holocrons keep using their nested tip_storage layout,
+    but every list of tips in it is a view onto the rows stored at that address.
+    """
+
+    def __init__(self, filepath):
+        self.connection = sqlite3.connect(filepath)
+        self.connection.executescript(SCHEMA)
+        # materialized tips by row id, so the same row is always the same object while anything still holds it
+        self.live_tips = weakref.WeakValueDictionary()
+
+    # Storage layout
+    def wrap_storage(self, holocron, storage: dict):
+        wrapped = {}
+        for key, value in storage.items():
+            if key == "squads":
+                wrapped[key] = SqliteSquadMap(self, holocron)
+            elif key == "aliases":
+                wrapped[key] = SqliteAliasMap(self, holocron)
+            else:
+                wrapped[key] = SqliteStorageNode(self, holocron, str(key), value)
+        return wrapped
+
+    def is_migrated(self, holocron):
+        cursor = self.connection.execute("SELECT 1 FROM migrations WHERE holocron = ?", (holocron,))
+        return cursor.fetchone() is not None
+
+    def import_storage(self, holocron, storage: dict):
+        # one time migration of a fully loaded pickle tree
+        with self.connection:
+            for key, value in storage.items():
+                if key == "squads":
+                    for squad in value.values():
+                        self._write_squad(holocron, squad)
+                        self._insert_tips(holocron, join_address("squads", squad.lead_id), squad.tips)
+                elif key == "aliases":
+                    for alias in value.values():
+                        self._write_alias(holocron, alias)
+                else:
+                    self._import_tree(holocron, str(key), value)
+            self.connection.execute("INSERT OR REPLACE INTO migrations VALUES (?, ?)",
+                                    (holocron, datetime.datetime.utcnow().isoformat()))
+
+    def _import_tree(self, holocron, address, value):
+        if isinstance(value, dict):
+            for key, sub_value in value.items():
+                self._import_tree(holocron, join_address(address, key), sub_value)
+        else:
+            self._insert_tips(holocron, address, value)
+
+    def copy_holocron(self, source, target):
+        # seeds one holocron's rows from another's, e.g. a guild's shard from the storage every guild used to share
+        with self.connection:
+            self.connection.execute("INSERT INTO tips (holocron, address, kind, content, author, user_id, rating, "
+                                    "edited, creation_time, squad, activity) SELECT ?, address, kind, content, "
+                                    "author, user_id, rating, edited, creation_time, squad, activity FROM tips "
+                                    "WHERE holocron = ? ORDER BY id", (target, source))
+            self.connection.execute("INSERT OR REPLACE INTO squads SELECT ?, lead_id, lead, squad, variants, author, "
+                                    "user_id, edited, creation_time FROM squads WHERE holocron = ?", (target, source))
+            self.connection.execute("INSERT OR REPLACE INTO aliases SELECT ?, alias, squad_lead_id, author, user_id, "
+                                    "creation_time FROM aliases WHERE holocron = ?", (target, source))
+            self.connection.execute("INSERT OR REPLACE INTO migrations VALUES (?, ?)",
+                                    (target, datetime.datetime.utcnow().isoformat()))
+
+    def clear(self, holocron):
+        with self.connection:
+            self.connection.execute("DELETE FROM tips WHERE holocron = ?", (holocron,))
+            self.connection.execute("DELETE FROM squads WHERE holocron = ?", (holocron,))
+            self.connection.execute("DELETE FROM aliases WHERE holocron = ?", (holocron,))
+
+    def flush(self):
+        # persists in place changes to every tip currently materialized, e.g. after migrating users
+        with self.connection:
+            for tip in list(self.live_tips.values()):
+                self._update_tip(tip)
+
+    # Tips
+    def fetch_tips(self, holocron, address, order="id", limit=None, offset=0):
+        # a limit of -1 is no limit to sqlite
+        cursor = self.connection.execute(f"SELECT {TIP_COLUMNS} FROM tips WHERE holocron = ? AND address = ? "
+                                         f"ORDER BY {order} LIMIT ? OFFSET ?",
+                                         (holocron, address, -1 if limit is None else limit, offset))
+        return [self._materialize_tip(row) for row in cursor]
+
+    def count_tips(self, holocron, address):
+        cursor = self.connection.execute("SELECT COUNT(*) FROM tips WHERE holocron = ? AND address = ?",
+                                         (holocron, address))
+        return cursor.fetchone()[0]
+
+    def count_authors(self, holocron, address):
+        cursor = self.connection.execute("SELECT author, COUNT(*) FROM tips WHERE holocron = ? AND address = ? "
+                                         "GROUP BY author", (holocron, address))
+        return dict(cursor.fetchall())
+
+    def fetch_user_tips(self, holocron, user_id, address=None):
+        # (address, tip) of the user's tips, found through the user_id index
+        if address is None:
+            cursor = self.connection.execute(f"SELECT address, {TIP_COLUMNS} FROM tips WHERE user_id = ? AND "
+                                             f"holocron = ? ORDER BY id", (user_id, holocron))
+        else:
+            cursor = self.connection.execute(f"SELECT address, {TIP_COLUMNS} FROM tips WHERE user_id = ? AND "
+                                             f"holocron = ? AND address = ? ORDER BY id", (user_id, holocron, address))
+        return [(row[0], self._materialize_tip(row[1:])) for row in cursor.fetchall()]
+
+    def count_user_tips(self, holocron, user_id):
+        cursor = self.connection.execute("SELECT COUNT(*) FROM tips WHERE user_id = ? AND holocron = ?",
+                                         (user_id, holocron))
+        return cursor.fetchone()[0]
+
+    def child_keys(self, holocron, address):
+        prefix = f"{address}/"
+        cursor = self.connection.execute("SELECT DISTINCT address FROM tips WHERE holocron = ? "
+                                         "AND address >= ? AND address < ?", (holocron, prefix, f"{address}0"))
+        keys = {split_key(row[0][len(prefix):].split("/")[0]) for row in cursor}
+        return sorted(keys, key=lambda key: (isinstance(key, str), key))
+
+    def add_tip(self, holocron, address, tip):
+        with self.connection:
+            self._insert_tips(holocron, address, [tip])
+
+    def update_tip(self, tip):
+        with self.connection:
+            self._update_tip(tip)
+
+    def delete_tip(self, tip):
+        with self.connection:
+            self.connection.execute("DELETE FROM tips WHERE id = ?", (tip.row_id,))
+        self.live_tips.pop(tip.row_id, None)
+
+    def replace_tips(self, holocron, address, tips):
+        with self.connection:
+            self.connection.execute("DELETE FROM tips WHERE holocron = ? AND address = ?", (holocron, address))
+            self._insert_tips(holocron, address, tips)
+
+    def delete_address_tree(self, holocron, address):
+        with self.connection:
+            self.connection.execute("DELETE FROM tips WHERE holocron = ? AND (address = ? OR "
+                                    "(address >= ? AND address < ?))",
+                                    (holocron, address, f"{address}/", f"{address}0"))
+
+    def _insert_tips(self, holocron, address, tips):
+        for tip in tips:
+            is_counter = isinstance(tip, CounterTip)
+            cursor = self.connection.execute(
+                "INSERT INTO tips (holocron, address, kind, content, author, user_id, rating, edited, creation_time, "
+                "squad, activity) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (holocron, address, "counter" if is_counter else "tip", tip.content, tip.author, tip.user_id,
+                 tip.rating, int(tip.edited), tip.creation_time.isoformat(),
+                 tip.squad if is_counter else None, tip.activity if is_counter else None))
+            tip.row_id = cursor.lastrowid
+            self.live_tips[tip.row_id] = tip
+
+    def _update_tip(self, tip):
+        self.connection.execute("UPDATE tips SET content = ?, author = ?, user_id = ?, rating = ?, edited = ? "
+                                "WHERE id = ?",
+                                (tip.content, tip.author, tip.user_id, tip.rating, int(tip.edited), tip.row_id))
+
+    def _materialize_tip(self, row):
+        row_id, kind, content, author, user_id, rating, edited, creation_time, squad, activity = row
+        tip = self.live_tips.get(row_id)
+        if tip is not None:
+            return tip
+
+        if kind == "counter":
+            tip = CounterTip(squad=squad, content=content, activity=activity, author=author, rating=rating,
+                             user_id=user_id, edited=bool(edited))
+        else:
+            tip = Tip(content=content, author=author, rating=rating, user_id=user_id)
+            tip.edited = bool(edited)
+        tip.creation_time = datetime.datetime.fromisoformat(creation_time)
+        tip.row_id = row_id
+        self.live_tips[row_id] = tip
+        return tip
+
+    # Squads and aliases
+    def fetch_squad(self, holocron, lead_id):
+        cursor = self.connection.execute("SELECT lead_id, lead, squad, variants, author, user_id, edited, "
+                                         "creation_time FROM squads WHERE holocron = ? AND lead_id = ?",
+                                         (holocron, lead_id))
+        row = cursor.fetchone()
+        return self._materialize_squad(holocron, row) if row else None
+
+    def fetch_squads(self, holocron):
+        cursor = self.connection.execute("SELECT lead_id, lead, squad, variants, author, user_id, edited, "
+                                         "creation_time FROM squads WHERE holocron = ? ORDER BY lead_id", (holocron,))
+        return [self._materialize_squad(holocron, row) for row in cursor]
+
+    def count_rows(self, table, holocron):
+        cursor = self.connection.execute(f"SELECT COUNT(*) FROM {table} WHERE holocron = ?", (holocron,))
+        return cursor.fetchone()[0]
+
+    def put_squad(self, holocron, squad):
+        with self.connection:
+            self._write_squad(holocron, squad)
+            if not isinstance(squad.tips, SqliteTipList):
+                # brand new squads carry their tips as a plain list
+                address = join_address("squads", squad.lead_id)
+                self.connection.execute("DELETE FROM tips WHERE holocron = ? AND address = ?", (holocron, address))
+                self._insert_tips(holocron, address, squad.tips)
+        squad.tips = SqliteTipList(self, holocron, join_address("squads", squad.lead_id))
+
+    def _write_squad(self, holocron, squad):
+        self.connection.execute("INSERT OR REPLACE INTO squads VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (holocron, squad.lead_id, squad.lead, squad.squad, json.dumps(squad.variants),
+                                 squad.author, squad.user_id, int(squad.edited), squad.creation_time.isoformat()))
+
+    def _materialize_squad(self, holocron, row):
+        lead_id, lead, squad_text, variants, author, user_id, edited, creation_time = row
+        squad = Squad(lead_id=lead_id, lead=lead, squad=squad_text, variants=json.loads(variants), author=author,
+                      user_id=user_id)
+        squad.edited = bool(edited)
+        squad.creation_time = datetime.datetime.fromisoformat(creation_time)
+        squad.tips = SqliteTipList(self, holocron, join_address("squads", lead_id))
+        return squad
+
+    def fetch_alias(self, holocron, alias_key):
+        cursor = self.connection.execute("SELECT alias, squad_lead_id, author, user_id, creation_time FROM aliases "
+                                         "WHERE holocron = ? AND alias = ?", (holocron, alias_key))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        alias_key, squad_lead_id, author, user_id, creation_time = row
+        alias = Alias(alias_key, squad_lead_id, author, user_id)
+        alias.creation_time = datetime.datetime.fromisoformat(creation_time)
+        return alias
+
+    def put_alias(self, holocron, alias):
+        with self.connection:
+            self._write_alias(holocron, alias)
+
+    def _write_alias(self, holocron, alias):
+        self.connection.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?, ?, ?, ?, ?)",
+                                (holocron, alias.alias, alias.squad_lead_id, alias.author, alias.user_id,
+                                 alias.creation_time.isoformat()))
+
+
+class SqliteTipList:
+    """
+    List of the tips stored at one address. Rows are read on every use and not kept, so a full scan leaves nothing
+    behind, and appends/removes are written through.
+    """
+
+    def __init__(self, store: SqliteTipStore, holocron, address):
+        self.store = store
+        self.holocron = holocron
+        self.address = address
+
+    @property
+    def tips(self):
+        return self.store.fetch_tips(self.holocron, self.address)
+
+    def append(self, tip):
+        self.store.add_tip(self.holocron, self.address, tip)
+
+    def remove(self, tip):
+        self.store.delete_tip(tip)
+
+    def view(self, sort_method="recent", limit=None) -> list:
+        # the tips in display order, sorted and cut to limit by the database
+        order = TIP_ORDERS.get(sort_method, TIP_ORDERS["recent"])
+        return self.store.fetch_tips(self.holocron, self.address, order, limit)
+
+    def count_authors(self):
+        return self.store.count_authors(self.holocron, self.address)
+
+    def __len__(self):
+        return self.store.count_tips(self.holocron, self.address)
+
+    def __iter__(self):
+        return iter(self.tips)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.tips[index]
+        # a single row, counted from the newest for negative indices
+        if index < 0:
+            rows = self.store.fetch_tips(self.holocron, self.address, "id DESC", 1, -index - 1)
+        else:
+            rows = self.store.fetch_tips(self.holocron, self.address, "id", 1, index)
+        if not rows:
+            raise IndexError("tip index out of range")
+        return rows[0]
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class SqliteUserTipIndex:
+    """
+    UserTipIndex read from the user_id index of the tips table on each lookup, instead of holding every tip. Rows are
+    stored by their storage tree path, so paths are mapped to the Holocron's addresses, from iter_addresses again
+    whenever a path is new, e.g. a squad added since.
+    """
+
+    def __init__(self, store: SqliteTipStore, holocron, iter_addresses):
+        self.store = store
+        self.holocron = holocron
+        self.iter_addresses = iter_addresses
+        self.addresses = {}
+        self.paths = {}
+
+    def refresh(self):
+        self.addresses = {tips.address: address for address, tips in self.iter_addresses()}
+        self.paths = {address: path for path, address in self.addresses.items()}
+
+    def add(self, address, tip):
+        # rows are written by the storage views
+        pass
+
+    def remove(self, address, tip):
+        pass
+
+    def get_tips(self, user_id, address):
+        if address not in self.paths:
+            self.refresh()
+        path = self.paths.get(address)
+        if path is None:
+            return []
+        return [tip for tip_path, tip in self.store.fetch_user_tips(self.holocron, user_id, path)]
+
+    def iter_user_tips(self, user_id):
+        for path, tip in self.store.fetch_user_tips(self.holocron, user_id):
+            if path not in self.addresses:
+                self.refresh()
+            address = self.addresses.get(path)
+            if address is not None:
+                yield address, tip
+
+    def count(self, user_id):
+        return self.store.count_user_tips(self.holocron, user_id)
+
+
+class SqliteStorageNode:
+    """
+    One level of a Holocron's storage tree. Sections come from base.json, while open sections (such as conquest
+    nodes) find their children from the stored addresses.
+    """
+
+    def __init__(self, store: SqliteTipStore, holocron, address, layout):
+        self.store = store
+        self.holocron = holocron
+        self.address = address
+        self.layout = layout
+        self.is_open = isinstance(layout, dict) and not layout
+
+    def _child(self, key, layout):
+        address = join_address(self.address, key)
+        if isinstance(layout, dict):
+            return SqliteStorageNode(self.store, self.holocron, address, layout)
+        return SqliteTipList(self.store, self.holocron, address)
+
+    def keys(self):
+        if self.is_open:
+            return self.store.child_keys(self.holocron, self.address)
+        return list(self.layout.keys())
+
+    def __getitem__(self, key):
+        if key in self.layout:
+            return self._child(key, self.layout[key])
+        if self.is_open:
+            return self._child(key, [])
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, tips):
+        self.store.replace_tips(self.holocron, join_address(self.address, key), tips)
+
+    def __contains__(self, key):
+        if self.is_open:
+            return key in self.keys()
+        return key in self.layout
+
+    def pop(self, key):
+        child = self[key]
+        self.store.delete_address_tree(self.holocron, child.address)
+        self.layout.pop(key, None)
+        return child
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class SqliteSquadMap:
+    def __init__(self, store: SqliteTipStore, holocron):
+        self.store = store
+        self.holocron = holocron
+
+    def get(self, lead_id, default=None):
+        return self.store.fetch_squad(self.holocron, lead_id) or default
+
+    def __getitem__(self, lead_id):
+        squad = self.get(lead_id)
+        if squad is None:
+            raise KeyError(lead_id)
+        return squad
+
+    def __setitem__(self, lead_id, squad: Squad):
+        self.store.put_squad(self.holocron, squad)
+
+    def __contains__(self, lead_id):
+        return self.get(lead_id) is not None
+
+    def values(self):
+        return self.store.fetch_squads(self.holocron)
+
+    def items(self):
+        return [(squad.lead_id, squad) for squad in self.values()]
+
+    def __len__(self):
+        return self.store.count_rows("squads", self.holocron)
+
+
+class SqliteAliasMap:
+    def __init__(self, store: SqliteTipStore, holocron):
+        self.store = store
+        self.holocron = holocron
+
+    def get(self, alias_key, default=None):
+        return self.store.fetch_alias(self.holocron, alias_key) or default
+
+    def __getitem__(self, alias_key):
+        alias = self.get(alias_key)
+        if alias is None:
+            raise KeyError(alias_key)
+        return alias
+
+    def __setitem__(self, alias_key, alias: Alias):
+        self.store.put_alias(self.holocron, alias)
+
+    def __contains__(self, alias_key):
+        return self.get(alias_key) is not None
+
+    def __len__(self):
+        return self.store.count_rows("aliases", self.holocron)
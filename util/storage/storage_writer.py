@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+
+class StorageWriter:
+    """
+    Write-behind persistence for a Holocron. Changes only mark it dirty, and a single background task coalesces each
+    burst into one call of write on a thread executor, no later than max_delay seconds after the burst started.
+    """
+
+    def __init__(self, write, prepare=None, delay=1.0, max_delay=5.0):
+        self.write = write
+        # called on the event loop before each write, to take anything the write must not read while it changes
+        self.prepare = prepare
+        self.delay = delay
+        self.max_delay = max_delay
+        self.write_lock = threading.Lock()
+        self.dirty = asyncio.Event()
+        self.dirty_since = None
+        self.last_marked = None
+        self.task = None
+        self.write_count = 0
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def mark_dirty(self):
+        now = time.monotonic()
+        if self.dirty_since is None:
+            self.dirty_since = now
+        self.last_marked = now
+        self.dirty.set()
+
+    async def run(self):
+        while True:
+            await self.dirty.wait()
+            # wait for the burst to go quiet, but never past max_delay from its first change
+            while True:
+                now = time.monotonic()
+                deadline = min(self.last_marked + self.delay, self.dirty_since + self.max_delay)
+                if now >= deadline:
+                    break
+                await asyncio.sleep(deadline - now)
+            await self.write_now()
+
+    async def write_now(self):
+        self.dirty.clear()
+        self.dirty_since = None
+        try:
+            if self.prepare:
+                # a write cancelled by shutdown may still be running, so wait for it
+                with self.write_lock:
+                    self.prepare()
+            await asyncio.get_running_loop().run_in_executor(None, self._locked_write)
+            self.write_count += 1
+        except Exception as write_error:
+            print(f"Storage write failed, retrying with the next write: {write_error!r}")
+            self.mark_dirty()
+
+    def _locked_write(self):
+        # a write cancelled by shutdown keeps running on its thread, so the final flush waits for it here
+        with self.write_lock:
+            self.write()
+
+    async def flush(self):
+        # stops the background task and writes anything still outstanding, used on shutdown
+        if self.task:
+            self.task.cancel()
+            self.task = None
+        if self.dirty.is_set():
+            await self.write_now()
@@ -0,0 +1,118 @@
+from bisect import bisect_left, insort
+
+from entities.tip import Tip
+from util.settings.tip_sorting_handler import sort_keys
+
+
+class TipList(list):
+    """
+    The tips of one location, in insertion order. Ordered views for each sort method are built on first use and then
+    kept in order with bisect as tips are added and removed, instead of sorting the location on every read. Likewise
+    tips are found by key through a dict built on the first lookup.
+    """
+    __slots__ = ("views", "by_key")
+
+    def __init__(self, tips=()):
+        super().__init__(tips)
+        self.views = {}
+        self.by_key = None
+
+    def view(self, sort_method="recent", limit=None) -> list[Tip]:
+        sort_method = sort_method if sort_method in sort_keys else "recent"
+        order = self.views.get(sort_method)
+        if order is None:
+            order = self.views[sort_method] = sorted(self, key=sort_keys[sort_method])
+        return order if limit is None else order[:limit]
+
+    def find(self, tip_key) -> Tip | None:
+        if self.by_key is None:
+            self.by_key = {tip.get_key(): tip for tip in self}
+        return self.by_key.get(tip_key)
+
+    def append(self, tip):
+        super().append(tip)
+        if self.by_key is not None:
+            self.by_key[tip.get_key()] = tip
+        for sort_method, order in self.views.items():
+            insort(order, tip, key=sort_keys[sort_method])
+
+    def extend(self, tips):
+        for tip in tips:
+            self.append(tip)
+
+    def remove(self, tip):
+        super().remove(tip)
+        if self.by_key is not None:
+            self.by_key.pop(tip.get_key(), None)
+        for sort_method, order in self.views.items():
+            key = sort_keys[sort_method]
+            index = bisect_left(order, key(tip), key=key)
+            # tips sharing a key sit together, find this one among them
+            while order[index] is not tip:
+                index += 1
+            del order[index]
+
+    def refresh(self):
+        # drops the views, e.g. after a tip's rating changes
+        self.views.clear()
+
+    def reindex(self):
+        # drops the views and the keys, after changes that are not a single append or remove
+        self.views.clear()
+        self.by_key = None
+
+    def insert(self, index, tip):
+        super().insert(index, tip)
+        self.reindex()
+
+    def pop(self, index=-1):
+        tip = super().pop(index)
+        self.reindex()
+        return tip
+
+    def clear(self):
+        super().clear()
+        self.reindex()
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.reindex()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.reindex()
+
+    def __iadd__(self, tips):
+        self.extend(tips)
+        return self
+
+    def __reduce__(self):
+        # views and keys are rebuilt on demand and never pickled
+        return TipList, (list(self),)
+
+
+def dedupe_keys(tips) -> int:
+    # moves tips sharing a key, stored before keys were kept unique, to the next free key. returns how many moved
+    seen = set()
+    moved = 0
+    for tip in tips:
+        if tip.get_key() in seen:
+            moved += 1
+            while tip.get_key() in seen:
+                tip.creation_micros += 1
+        seen.add(tip.get_key())
+    if moved and isinstance(tips, TipList):
+        tips.reindex()
+    return moved
+
+
+def to_tip_lists(storage: dict):
+    # converts every plain list of tips in a loaded storage tree, including counter squads, to a TipList
+    for key, value in storage.items():
+        if isinstance(value, dict):
+            to_tip_lists(value)
+        elif type(value) is list:
+            storage[key] = TipList(value)
+        elif type(getattr(value, "tips", None)) is list:
+            value.tips = TipList(value.tips)
+    return storage
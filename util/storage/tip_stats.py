@@ -0,0 +1,49 @@
+from collections import Counter
+
+
+class TipStats:
+    """
+    Tip counts for one shard, kept up to date as tips are added, removed and reassigned. Each tip counts toward the
+    total, toward every prefix of its location's stat path (e.g. ("sectors",) and ("sectors", 2)) and toward its
+    author, so an update costs O(depth) and a stats report never walks the storage.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.nodes = Counter()
+        self.authors = Counter()
+
+    @classmethod
+    def from_groups(cls, groups):
+        # full scan, from (stat path, tips) pairs
+        stats = cls()
+        for path, tips in groups:
+            # database backed lists count their rows without reading them
+            counts = tips.count_authors() if hasattr(tips, "count_authors") else Counter(tip.author for tip in tips)
+            for author, count in counts.items():
+                stats.add(path, author, count)
+        return stats
+
+    def add(self, path, author, count=1):
+        self.total += count
+        for depth in range(1, len(path) + 1):
+            self.nodes[path[:depth]] += count
+        self.authors[author] += count
+
+    def remove(self, path, author):
+        self.add(path, author, count=-1)
+
+    def reassign(self, old_author, new_author):
+        self.authors[old_author] -= 1
+        self.authors[new_author] += 1
+
+    def count(self, *path):
+        return self.nodes.get(path, 0)
+
+    def top_authors(self, limit=3):
+        return [(author, count) for author, count in self.authors.most_common(limit) if count > 0]
+
+    def __eq__(self, other):
+        # counters that dropped to zero are equal to missing ones
+        return isinstance(other, TipStats) and self.total == other.total and \
+            +self.nodes == +other.nodes and +self.authors == +other.authors
@@ -0,0 +1,41 @@
+class UserTipIndex:
+    """
+    Tips of one shard by the user_id of their author, then by storage address, then by tip key. Kept up to date as
+    tips are added, removed and reassigned, so a user's tips are found without scanning the storage.
+    """
+
+    def __init__(self):
+        self.users = {}
+
+    @classmethod
+    def from_addresses(cls, addresses):
+        # full scan, from (storage address, tips) pairs
+        index = cls()
+        for address, tips in addresses:
+            for tip in tips:
+                index.add(address, tip)
+        return index
+
+    def add(self, address, tip):
+        self.users.setdefault(tip.user_id, {}).setdefault(address, {})[tip.get_key()] = tip
+
+    def remove(self, address, tip):
+        user_addresses = self.users.get(tip.user_id, {})
+        address_tips = user_addresses.get(address, {})
+        address_tips.pop(tip.get_key(), None)
+        if not address_tips:
+            user_addresses.pop(address, None)
+        if not user_addresses:
+            self.users.pop(tip.user_id, None)
+
+    def get_tips(self, user_id, address):
+        return list(self.users.get(user_id, {}).get(address, {}).values())
+
+    def iter_user_tips(self, user_id):
+        # yields (storage address, tip) for every tip of the user
+        for address, address_tips in self.users.get(user_id, {}).items():
+            for tip in address_tips.values():
+                yield address, tip
+
+    def count(self, user_id):
+        return sum(len(address_tips) for address_tips in self.users.get(user_id, {}).values())